@@ -0,0 +1,250 @@
+"""
+Tenancy sintética e clientes falsos (Identity, Compute, Search, Monitoring)
+para os benchmarks. Nada sai da máquina: os clientes respondem em memória,
+com paginação, instâncias paradas, shape_config ausente em parte da frota e
+latência opcional por chamada.
+
+As métricas partem de uma série fina de 5 minutos (nível por hora do dia +
+um pico no começo de cada hora) e cada janela da consulta é agregada com a
+estatística pedida (mean, max, min, percentile), como no Monitoring.
+
+Uso (dentro de um benchmark):
+    from fake_oci import Tenancy
+    Tenancy(instances=1000, regions=4).install()
+"""
+import math
+import random
+import re
+import time
+import zlib
+from functools import lru_cache
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from oci.response import Response
+
+import oci_session
+
+SHAPES = (
+    ("VM.Standard.E4.Flex", 2, 16),
+    ("VM.Standard.E5.Flex", 4, 32),
+    ("VM.Standard.A1.Flex", 4, 24),
+    ("VM.Standard3.Flex", 8, 64),
+    ("VM.Standard.E4.Flex", 1, 8),
+)
+BASELINES = (None, None, None, "BASELINE_1_2", "BASELINE_1_8")
+STEPS = {"m": 60, "h": 3600, "d": 86400}
+
+PAGE_LIMIT = 100   # list_instances / list_compartments
+QUERY_RE = re.compile(r'^(\w+)\[(\w+)\]\{resourceId =?~? ?"([^"]*)"\}')
+STATISTIC_RE = re.compile(r'\.(mean|max|min|percentile)\(([\d.]*)\)$')
+FINE_STEP = 300    # resolução da série "real" por trás das agregações
+
+
+class Point:
+    """Datapoint agregado mínimo (o coletor só lê timestamp e value)."""
+    __slots__ = ("timestamp", "value")
+
+    def __init__(self, timestamp, value):
+        self.timestamp = timestamp
+        self.value = value
+
+
+def ok(data, next_page=None):
+    headers = {"opc-next-page": next_page} if next_page else {}
+    return Response(200, headers, data, None)
+
+
+def parse_statistic(query):
+    """("mean", None), ("percentile", 0.95)... a partir do fim da consulta MQL."""
+    m = STATISTIC_RE.search(query)
+    if m is None:
+        return "mean", None
+    return m.group(1), float(m.group(2)) if m.group(2) else None
+
+
+@lru_cache(maxsize=65536)
+def aggregate(base, amp, peak, first_hour, hours, statistic, q):
+    """
+    Estatística de `hours` horas inteiras da série fina a partir de
+    `first_hour` (hora do dia): em cada hora, 12 pontos no nível da hora e
+    o primeiro deles somado ao pico.
+    """
+    levels = [base + amp * ((first_hour + h) % 24) / 4 for h in range(hours)]
+    slots = 3600 // FINE_STEP
+    if statistic == "mean":
+        return sum(levels) / hours + peak / slots
+    if statistic == "max":
+        return max(levels) + peak
+    if statistic == "min":
+        return min(levels)
+    values = sorted([lv + peak for lv in levels] + [lv for lv in levels for _ in range(slots - 1)])
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+def page_of(items, page, limit):
+    start = int(page or 0)
+    end = start + (limit or PAGE_LIMIT)
+    return ok(items[start:end], str(end) if end < len(items) else None)
+
+
+class Tenancy:
+    """
+    `instances` instâncias espalhadas por `regions` regiões e `compartments`
+    compartments (padrão: 1 a cada 200 instâncias). `stopped` é a fração
+    parada e `latency_ms`, a latência média (log-normal) de cada chamada.
+    """
+
+    def __init__(self, instances, regions=4, compartments=None, stopped=0.1,
+                 missing_shape=0.02, latency_ms=0.0, seed=1):
+        rnd = random.Random(seed)
+        self.latency = latency_ms / 1000.0
+        self.regions = [f"bench-region-{r + 1}" for r in range(regions)]
+        n_comps = compartments or max(1, instances // 200)
+        self.compartments = [
+            SimpleNamespace(id=f"ocid1.compartment.oc1..bench{c:05d}", name=f"bench-{c:05d}",
+                            lifecycle_state="ACTIVE", compartment_id="ocid1.tenancy.oc1..bench")
+            for c in range(n_comps)
+        ]
+        self.root = SimpleNamespace(id="ocid1.tenancy.oc1..bench", name="bench-root",
+                                    lifecycle_state="ACTIVE", compartment_id=None)
+
+        # região -> compartment -> [instâncias]
+        self.by_region = {r: {} for r in self.regions}
+        self.by_id = {}
+        for n in range(instances):
+            region = self.regions[n % regions]
+            comp = self.compartments[(n // regions) % n_comps]
+            shape, ocpus, mem = SHAPES[n % len(SHAPES)]
+            config = SimpleNamespace(
+                ocpus=float(ocpus), memory_in_gbs=float(mem),
+                baseline_ocpu_utilization=BASELINES[n % len(BASELINES)],
+            )
+            inst = SimpleNamespace(
+                id=f"ocid1.instance.oc1.{region}.bench{n:07d}",
+                display_name=f"bench-vm-{n:07d}",
+                compartment_id=comp.id,
+                shape=shape,
+                lifecycle_state="STOPPED" if rnd.random() < stopped else "RUNNING",
+                shape_config=None if rnd.random() < missing_shape else config,
+            )
+            self.by_region[region].setdefault(comp.id, []).append(inst)
+            self.by_id[inst.id] = (inst, config)
+
+        self._timestamps = {}
+
+    # ---------- injeção ----------
+    def install(self):
+        """Passa a atender todos os make_client (sem ~/.oci/config)."""
+        oci_session.set_factory(self.client, {"tenancy": self.root.id, "region": self.regions[0]})
+        return self
+
+    def client(self, kind, config):
+        cls = {
+            "identity": FakeIdentity,
+            "compute": FakeCompute,
+            "search": FakeSearch,
+            "monitoring": FakeMonitoring,
+        }[kind]
+        return cls(self, config["region"])
+
+    # ---------- séries ----------
+    def wait(self):
+        if self.latency:
+            time.sleep(random.lognormvariate(0, 0.5) * self.latency)
+
+    def window(self, start, end, step):
+        """(datetimes, epochs) do fim de cada janela de `step` segundos."""
+        key = (int(start.timestamp()) // step, int(end.timestamp()), step)
+        if key not in self._timestamps:
+            epochs = list(range((key[0] + 1) * step, key[1], step))
+            self._timestamps[key] = ([datetime.fromtimestamp(ts, timezone.utc) for ts in epochs], epochs)
+        return self._timestamps[key]
+
+    def timestamps(self, start, end, step):
+        return self.window(start, end, step)[0]
+
+    def values(self, resource_id, metric, epochs, step, statistic="mean", q=None):
+        # padrão estável por instância: nível base + variação diária + pico horário
+        h = zlib.crc32(f"{resource_id}|{metric}".encode())
+        base, amp, peak = h % 55, h % 7, (h >> 8) % 10
+        if step >= 3600:
+            hours = step // 3600
+            return [aggregate(base, amp, peak, (ts // 3600 - hours) % 24, hours, statistic, q)
+                    for ts in epochs]
+        # janelas menores que 1h: um ponto fino (o pico cai no primeiro de cada hora)
+        return [float(base + amp * ((ts - 1) // 3600 % 24) / 4
+                      + (peak if (ts - 1) // FINE_STEP % (3600 // FINE_STEP) == 0 else 0))
+                for ts in epochs]
+
+    def series(self, resource_id, metric, start, end, step, statistic="mean", q=None):
+        stamps, epochs = self.window(start, end, step)
+        return [Point(ts, v) for ts, v in zip(stamps, self.values(resource_id, metric, epochs, step, statistic, q))]
+
+
+class FakeClient:
+    def __init__(self, tenancy, region):
+        self.tenancy = tenancy
+        self.region = region
+        self.base_client = SimpleNamespace(endpoint=f"https://fake.{region}.oraclecloud.com")
+
+
+class FakeIdentity(FakeClient):
+    def list_region_subscriptions(self, tenancy_id, **kwargs):
+        self.tenancy.wait()
+        return ok([SimpleNamespace(region_name=r) for r in self.tenancy.regions])
+
+    def list_compartments(self, compartment_id, page=None, limit=None, **kwargs):
+        self.tenancy.wait()
+        return page_of(self.tenancy.compartments, page, limit)
+
+    def get_compartment(self, compartment_id, **kwargs):
+        self.tenancy.wait()
+        return ok(self.tenancy.root)
+
+
+class FakeCompute(FakeClient):
+    def list_instances(self, compartment_id, page=None, limit=None, **kwargs):
+        self.tenancy.wait()
+        return page_of(self.tenancy.by_region[self.region].get(compartment_id, []), page, limit)
+
+    def get_instance(self, instance_id, **kwargs):
+        self.tenancy.wait()
+        inst, config = self.tenancy.by_id[instance_id]
+        return ok(SimpleNamespace(**dict(vars(inst), shape_config=config)))
+
+
+class FakeSearch(FakeClient):
+    def search_resources(self, details, limit=None, page=None, **kwargs):
+        self.tenancy.wait()
+        running_only = "RUNNING" in details.query
+        items = [
+            SimpleNamespace(identifier=i.id, compartment_id=i.compartment_id)
+            for instances in self.tenancy.by_region[self.region].values()
+            for i in instances
+            if not running_only or i.lifecycle_state == "RUNNING"
+        ]
+        resp = page_of(items, page, limit)
+        resp.data = SimpleNamespace(items=resp.data)
+        return resp
+
+
+class FakeMonitoring(FakeClient):
+    def summarize_metrics_data(self, compartment_id, summarize_metrics_data_details, **kwargs):
+        self.tenancy.wait()
+        d = summarize_metrics_data_details
+        metric, interval, ids = QUERY_RE.match(d.query).groups()
+        step = int(interval[:-1]) * STEPS[interval[-1]]
+        statistic, q = parse_statistic(d.query)
+        data = []
+        for rid in ids.split("|"):
+            entry = self.tenancy.by_id.get(rid)
+            if entry is None or entry[0].lifecycle_state != "RUNNING":
+                continue
+            data.append(SimpleNamespace(
+                name=metric,
+                dimensions={"resourceId": rid},
+                aggregated_datapoints=self.tenancy.series(rid, metric, d.start_time, d.end_time,
+                                                          step, statistic, q),
+            ))
+        return ok(data)
@@ -0,0 +1,425 @@
+"""
+Servidor HTTP local que imita as APIs REST da OCI usadas pelos coletores,
+para testes de carga com o SDK de verdade (serialização, paginação,
+retentativas e limitador incluídos).
+
+APIs atendidas (uma "região" por prefixo de caminho, /<região>/...):
+    Identity    ListRegionSubscriptions, ListCompartments, GetCompartment
+    Compute     ListInstances, GetInstance
+    Monitoring  SummarizeMetricsData
+    Search      SearchResources
+
+Falhas controladas:
+    --latency [OPERAÇÃO=]DIST   fixed:50 | uniform:20,200 | lognormal:80,0.5 | exp:80 (ms)
+    --quota N                   req/s por (região, operação); acima disso, HTTP 429
+    --error-rate P              fração de respostas 5xx (--error-codes 500,502,503)
+
+Os dados vêm da tenancy sintética de benchmarks/fake_oci.py.
+
+Uso:
+    # servidor avulso
+    python benchmarks/oci_standin.py --serve --instances 5000 --quota 20
+    # sobe o servidor em outro processo e roda um coletor apontado para ele
+    python benchmarks/oci_standin.py --instances 5000 --quota 10 --error-rate 0.02 \\
+        --latency SummarizeMetricsData=lognormal:300,0.5 -- src/oci_metrics_cpu_mem_media_ndays.py
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import runpy
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [SRC, HERE]
+
+from fake_oci import PAGE_LIMIT, QUERY_RE, STEPS, Tenancy, parse_statistic  # noqa: E402
+
+PORT = 8765
+ERROR_CODES = {
+    500: "InternalServerError",
+    502: "BadGateway",
+    503: "ServiceUnavailable",
+    504: "GatewayTimeout",
+}
+
+ROUTES = [
+    ("GET", re.compile(r"^/20160918/tenancies/[^/]+/regionSubscriptions$"), "ListRegionSubscriptions"),
+    ("GET", re.compile(r"^/20160918/compartments$"), "ListCompartments"),
+    ("GET", re.compile(r"^/20160918/compartments/(?P<id>[^/]+)$"), "GetCompartment"),
+    ("GET", re.compile(r"^/20160918/instances$"), "ListInstances"),
+    ("GET", re.compile(r"^/20160918/instances/(?P<id>[^/]+)$"), "GetInstance"),
+    ("POST", re.compile(r"^/20180401/metrics/actions/summarizeMetricsData$"), "SummarizeMetricsData"),
+    ("POST", re.compile(r"^/20180409/resources$"), "SearchResources"),
+]
+
+
+# ---------- distribuições e cotas ----------
+def parse_latency(spec):
+    """'lognormal:80,0.5' -> função sem argumentos que devolve segundos."""
+    kind, _, params = spec.partition(":")
+    p = [float(x) for x in params.split(",") if x]
+    if kind == "fixed":
+        return lambda: p[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(p[0], p[1]) / 1000
+    if kind == "lognormal":
+        # p[0] é a mediana em ms, p[1] o sigma
+        mu = math.log(p[0])
+        return lambda: random.lognormvariate(mu, p[1] if len(p) > 1 else 0.5) / 1000
+    if kind == "exp":
+        return lambda: random.expovariate(1000 / p[0])
+    raise ValueError(f"distribuição desconhecida: {spec}")
+
+
+class Quota:
+    """Token bucket por (região, operação); sem token a resposta é 429."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def allow(self, key):
+        if not self.rate:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            tokens, updated = self.buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            self.buckets[key] = (tokens - 1 if allowed else tokens, now)
+            return allowed
+
+
+# ---------- serialização (JSON no formato da API) ----------
+def iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def compartment_json(c):
+    return {"id": c.id, "name": c.name, "compartmentId": c.compartment_id,
+            "lifecycleState": c.lifecycle_state, "description": c.name,
+            "timeCreated": "2020-01-01T00:00:00.000Z"}
+
+
+def instance_json(inst, region, config=None):
+    cfg = config if config is not None else inst.shape_config
+    data = {
+        "id": inst.id, "displayName": inst.display_name, "compartmentId": inst.compartment_id,
+        "availabilityDomain": f"{region}-AD-1", "region": region, "shape": inst.shape,
+        "lifecycleState": inst.lifecycle_state, "timeCreated": "2020-01-01T00:00:00.000Z",
+    }
+    if cfg is not None:
+        data["shapeConfig"] = {"ocpus": cfg.ocpus, "memoryInGBs": cfg.memory_in_gbs,
+                               "baselineOcpuUtilization": cfg.baseline_ocpu_utilization}
+    return data
+
+
+def page(items, query):
+    start = int(query.get("page", ["0"])[0])
+    limit = int(query.get("limit", [str(PAGE_LIMIT)])[0])
+    end = start + limit
+    return items[start:end], (str(end) if end < len(items) else None)
+
+
+# ---------- servidor ----------
+class StandIn:
+    def __init__(self, tenancy, latency=None, quota=0.0, burst=5.0, error_rate=0.0,
+                 error_codes=(500, 503), retry_after=None):
+        self.tenancy = tenancy
+        self.latency = latency or {}
+        self.quota = Quota(quota, burst)
+        self.error_rate = error_rate
+        self.error_codes = list(error_codes)
+        self.retry_after = retry_after
+        self.stats = {}
+        self.lock = threading.Lock()
+        self._stamps = {}
+
+    def count(self, op, status, size):
+        with self.lock:
+            entry = self.stats.setdefault(op, {"calls": 0, "bytes": 0, "status": {}})
+            entry["calls"] += 1
+            entry["bytes"] += size
+            entry["status"][str(status)] = entry["status"].get(str(status), 0) + 1
+
+    def delay(self, op):
+        dist = self.latency.get(op) or self.latency.get("*")
+        if dist:
+            time.sleep(dist())
+
+    def fault(self, region, op):
+        """(status, código, headers) de uma falha injetada, ou None."""
+        if not self.quota.allow((region, op)):
+            headers = {"retry-after": str(self.retry_after)} if self.retry_after is not None else {}
+            return 429, "TooManyRequests", headers
+        if self.error_rate and random.random() < self.error_rate:
+            status = random.choice(self.error_codes)
+            return status, ERROR_CODES.get(status, "InternalServerError"), {}
+        return None
+
+    def stamps(self, start, end, step):
+        """(timestamps ISO, epochs) das janelas."""
+        key = (int(start.timestamp()) // step, int(end.timestamp()), step)
+        if key not in self._stamps:
+            stamps, epochs = self.tenancy.window(start, end, step)
+            self._stamps[key] = ([iso(ts) for ts in stamps], epochs)
+        return self._stamps[key]
+
+    # ---------- operações ----------
+    def handle(self, op, region, match, query, body):
+        """Devolve (dados, próxima página)."""
+        t = self.tenancy
+        if op == "ListRegionSubscriptions":
+            return [{"regionKey": r.upper()[:3], "regionName": r, "status": "READY",
+                     "isHomeRegion": r == t.regions[0]} for r in t.regions], None
+        if op == "ListCompartments":
+            items, nxt = page(t.compartments, query)
+            return [compartment_json(c) for c in items], nxt
+        if op == "GetCompartment":
+            return compartment_json(t.root), None
+        if op == "ListInstances":
+            comp = query.get("compartmentId", [""])[0]
+            items, nxt = page(t.by_region[region].get(comp, []), query)
+            return [instance_json(i, region) for i in items], nxt
+        if op == "GetInstance":
+            inst, config = t.by_id[match.group("id")]
+            return instance_json(inst, region, config), None
+        if op == "SearchResources":
+            running_only = "RUNNING" in body.get("query", "")
+            items = [
+                {"resourceType": "Instance", "identifier": i.id, "compartmentId": i.compartment_id,
+                 "displayName": i.display_name, "lifecycleState": i.lifecycle_state}
+                for instances in t.by_region[region].values()
+                for i in instances
+                if not running_only or i.lifecycle_state == "RUNNING"
+            ]
+            items, nxt = page(items, query)
+            return {"items": items}, nxt
+        if op == "SummarizeMetricsData":
+            metric, interval, ids = QUERY_RE.match(body["query"]).groups()
+            step = int(interval[:-1]) * STEPS[interval[-1]]
+            stamps, epochs = self.stamps(parse_time(body["startTime"]), parse_time(body["endTime"]), step)
+            statistic, q = parse_statistic(body["query"])
+            data = []
+            for rid in ids.split("|"):
+                entry = t.by_id.get(rid)
+                if entry is None or entry[0].lifecycle_state != "RUNNING":
+                    continue
+                values = t.values(rid, metric, epochs, step, statistic, q)
+                data.append({
+                    "namespace": body.get("namespace"), "name": metric,
+                    "compartmentId": query.get("compartmentId", [""])[0],
+                    "dimensions": {"resourceId": rid},
+                    "aggregatedDatapoints": [{"timestamp": ts, "value": v} for ts, v in zip(stamps, values)],
+                })
+            return data, None
+        raise KeyError(op)
+
+
+def make_handler(standin):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, como o SDK espera
+
+        def reply(self, status, payload, op="-", headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("opc-request-id", uuid.uuid4().hex)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+            if op != "-":
+                standin.count(op, status, len(body))
+
+        def route(self, method):
+            url = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+
+            if url.path == "/_standin/stats":
+                return self.reply(200, standin.stats)
+
+            region, _, rest = url.path.lstrip("/").partition("/")
+            if region not in standin.tenancy.by_region:
+                return self.reply(404, {"code": "NotAuthorizedOrNotFound", "message": f"região {region}"})
+            for verb, pattern, op in ROUTES:
+                match = pattern.match("/" + rest)
+                if verb == method and match:
+                    break
+            else:
+                return self.reply(404, {"code": "NotFound", "message": url.path})
+
+            standin.delay(op)
+            failure = standin.fault(region, op)
+            if failure:
+                status, code, headers = failure
+                return self.reply(status, {"code": code, "message": f"{op} ({status}) injetado"}, op, headers)
+            try:
+                data, next_page = standin.handle(op, region, match, parse_qs(url.query),
+                                                 json.loads(raw) if raw else {})
+            except KeyError as e:
+                return self.reply(404, {"code": "NotAuthorizedOrNotFound", "message": str(e)}, op)
+            self.reply(200, data, op, {"opc-next-page": next_page} if next_page else None)
+
+        def do_GET(self):
+            self.route("GET")
+
+        def do_POST(self):
+            self.route("POST")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(args):
+    tenancy = Tenancy(args.instances, regions=args.regions, compartments=args.compartments)
+    standin = StandIn(tenancy, args.latency, args.quota, args.burst, args.error_rate,
+                      args.error_codes, args.retry_after)
+    server = ThreadingHTTPServer((args.bind, args.port), make_handler(standin))
+    server.daemon_threads = True
+    print(f"🧪 Stand-in OCI em http://{args.bind}:{args.port} ({args.instances} instâncias, "
+          f"{args.regions} regiões)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+# ---------- cliente: SDK apontado para o stand-in ----------
+def install(url, tenancy_id="ocid1.tenancy.oc1..bench", region="bench-region-1"):
+    """make_client passa a criar os clientes do SDK com endpoint no stand-in."""
+    import oci_session
+
+    class Signer:
+        """Assinador vazio: o stand-in não confere a assinatura."""
+
+        def __call__(self, request):
+            return request
+
+    def factory(kind, config):
+        return oci_session.sdk_client(kind, config, service_endpoint=f"{url}/{config['region']}",
+                                      signer=Signer())
+
+    # o SDK valida o formato destes campos; a chave nunca é lida (assinador vazio)
+    config = {
+        "tenancy": tenancy_id,
+        "region": region,
+        "user": "ocid1.user.oc1..standin",
+        "fingerprint": ":".join(["00"] * 16),
+        "key_file": os.devnull,
+    }
+    oci_session.set_factory(factory, config)
+
+
+def wait_ready(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/_standin/stats", timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def print_stats(stats):
+    print(f"\n🧪 Stand-in: {'OPERAÇÃO':24} {'CHAMADAS':>8} {'MB':>8}  STATUS")
+    for op, s in sorted(stats.items()):
+        status = ", ".join(f"{k}×{v}" for k, v in sorted(s["status"].items()))
+        print(f"            {op:24} {s['calls']:8d} {s['bytes'] / 1e6:8.2f}  {status}")
+
+
+def run(args):
+    url = f"http://127.0.0.1:{args.port}"
+    server_args = [a for a in sys.argv[1:args.split]] + ["--serve"]
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__)] + server_args)
+    try:
+        if not wait_ready(url):
+            sys.exit("❌ stand-in não respondeu")
+        # dados falsos não devem ir para os caches reais
+        for var in ("METRICS_CACHE", "METRICS_SKETCHES", "OCI_TENANCY_CACHE"):
+            os.environ.setdefault(var, "off")
+        install(url)
+        sys.argv = [args.script] + args.script_args
+        sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+        t0 = time.monotonic()
+        try:
+            runpy.run_path(args.script, run_name="__main__")
+        finally:
+            print(f"\n⏱  {os.path.basename(args.script)}: {time.monotonic() - t0:.1f}s")
+            with urllib.request.urlopen(f"{url}/_standin/stats") as resp:
+                print_stats(json.load(resp))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def parse_args(argv):
+    split = argv.index("--") if "--" in argv else len(argv)
+    p = argparse.ArgumentParser(description="Stand-in HTTP local das APIs da OCI (testes de carga)")
+    p.add_argument("--serve", action="store_true", help="só sobe o servidor")
+    p.add_argument("--bind", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=PORT)
+    p.add_argument("--instances", type=int, default=1000)
+    p.add_argument("--regions", type=int, default=4)
+    p.add_argument("--compartments", type=int, help="padrão: 1 a cada 200 instâncias")
+    p.add_argument("--latency", action="append", default=[], metavar="[OPERAÇÃO=]DIST",
+                   help="fixed:MS | uniform:MIN,MAX | lognormal:MEDIANA,SIGMA | exp:MÉDIA (repetível)")
+    p.add_argument("--quota", type=float, default=0.0, help="req/s por (região, operação); 0 = sem cota")
+    p.add_argument("--burst", type=float, default=5.0)
+    p.add_argument("--retry-after", type=float, help="envia Retry-After (s) nas respostas 429")
+    p.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas 5xx")
+    p.add_argument("--error-codes", default="500,503")
+    args = p.parse_args(argv[1:split])
+    args.split = split
+
+    rest = argv[split + 1:]
+    if not args.serve and not rest:
+        p.error("informe --serve ou um script depois de --")
+    args.script, args.script_args = (rest[0], rest[1:]) if rest else (None, [])
+
+    latency = {}
+    for spec in args.latency:
+        op, _, dist = spec.rpartition("=")
+        try:
+            latency[op or "*"] = parse_latency(dist)
+        except (ValueError, IndexError):
+            p.error(f"latência inválida: {spec}")
+    args.latency = latency
+    args.error_codes = [int(c) for c in args.error_codes.split(",") if c]
+    return args
+
+
+def main():
+    args = parse_args(sys.argv)
+    if args.serve:
+        serve(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Benchmark offline das etapas do relatório FinOps em tenancies sintéticas.
+
+Para cada tamanho (instâncias) um processo novo monta a tenancy falsa
+(benchmarks/fake_oci.py), injeta os clientes via oci_session.set_factory e
+mede tempo de parede e pico de memória (tracemalloc) de cada etapa:
+
+    collect -> recollect -> analyse -> csv -> xlsx -> parquet -> technical -> report -> top5
+
+Cenários (--scenario):
+    production  30 dias a 5m, como em produção: cache de datapoints e sketches
+                ligados; recollect mede a segunda coleta (só o delta) e o
+                tamanho dos arquivos de cache é reportado. 100 e 300 instâncias,
+                sem tracemalloc (com ele a coleta fica ~6x mais lenta nessa escala).
+    quick       7 dias a 1h, caches desligados; 100, 1k, 10k e 50k instâncias
+                (custo das etapas de relatório em frotas grandes).
+
+Nenhuma chamada sai da máquina e nada é gravado fora de um diretório
+temporário (HOME falso).
+
+Uso:
+    python benchmarks/run_benchmarks.py                          # cenário production
+    python benchmarks/run_benchmarks.py --scenario quick --sizes 100,1000 --output base.json
+    python benchmarks/run_benchmarks.py --scenario quick --sizes 100,1000 --compare base.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+STAGES = ("collect", "recollect", "analyse", "csv", "xlsx", "parquet", "technical", "report", "top5")
+SCENARIOS = {
+    "production": {"days": 30, "interval": "5m", "sizes": "100,300", "cache": True, "tracemalloc": False},
+    "quick": {"days": 7, "interval": "1h", "sizes": "100,1000,10000,50000", "cache": False, "tracemalloc": True},
+}
+
+# diferenças abaixo destes limites são ruído e não contam como regressão
+NOISE_SECONDS = 0.05
+NOISE_MB = 1.0
+
+
+# ---------- etapas (processo filho) ----------
+def stage_functions(collector):
+    def word(module, fn):
+        def run(rows):
+            try:
+                mod = __import__(module)
+                getattr(mod, fn)(rows)
+            except ImportError:
+                return "skipped"
+        return run
+
+    def table(kind):
+        def run(rows):
+            return None if collector.render(rows, [kind]) else "skipped"
+        return run
+
+    state = {}
+
+    def collect(_rows):
+        state["rows"] = collector.collect()
+
+    def recollect(_rows):
+        # segunda execução: com cache, só o delta desde a marca d'água
+        if collector.is_off(collector.CACHE_PATH):
+            return "skipped"
+        state["rows"] = collector.collect()
+
+    return state, {
+        "collect": collect,
+        "recollect": recollect,
+        "analyse": lambda rows: collector.analyse(rows) and None,
+        "csv": table("csv"),
+        "xlsx": table("xlsx"),
+        "parquet": table("parquet"),
+        "technical": word("oci_metrics_cpu_mem_word_technical", "generate_report"),
+        "report": word("oci_metrics_cpu_mem_word_report", "generate_report"),
+        "top5": word("oci_metrics_cpu_mem_word_top5", "generate"),
+    }
+
+
+def worker(args):
+    sys.path[:0] = [SRC, HERE]
+    from fake_oci import Tenancy
+
+    t0 = time.perf_counter()
+    tenancy = Tenancy(args.size, regions=args.regions, compartments=args.compartments,
+                      latency_ms=args.latency_ms).install()
+    setup = time.perf_counter() - t0
+
+    import oci_metrics_cpu_mem_media_ndays as collector
+
+    state, functions = stage_functions(collector)
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    results = []
+    for name in args.stages:
+        if name != "collect" and not state.get("rows"):
+            results.append({"stage": name, "status": "skipped"})
+            continue
+        if args.tracemalloc:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            status = functions[name](state.get("rows"))
+        elapsed = time.perf_counter() - t0
+        peak = (tracemalloc.get_traced_memory()[1] - base) / 1e6 if args.tracemalloc else None
+        results.append({"stage": name, "status": status or "ok", "seconds": round(elapsed, 4),
+                        "peak_mb": None if peak is None else round(peak, 2)})
+
+    running = sum(1 for inst, _cfg in tenancy.by_id.values() if inst.lifecycle_state == "RUNNING")
+    with open(args.result, "w", encoding="utf-8") as f:
+        json.dump({
+            "size": args.size,
+            "running": running,
+            "rows": len(state.get("rows") or []),
+            "setup_seconds": round(setup, 3),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "cache_mb": file_mb(collector.CACHE_PATH),
+            "sketches_mb": file_mb(collector.SKETCHES_PATH),
+            "stages": results,
+        }, f)
+
+
+def file_mb(path):
+    """Tamanho de um banco SQLite (com o WAL), None quando desligado."""
+    if not path or path.lower() in ("off", "0", "no", "false"):
+        return None
+    path = os.path.expanduser(path)
+    size = sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+    return round(size / 1e6, 2)
+
+
+# ---------- orquestração ----------
+def run_size(size, args):
+    home = tempfile.mkdtemp(prefix=f"bench-{size}-")
+    result = os.path.join(home, "result.json")
+    env = dict(
+        os.environ,
+        HOME=home,
+        PYTHONPATH=SRC,
+        METRICS_DAYS=str(args.days),
+        METRICS_INTERVAL=args.interval,
+        METRICS_AGGREGATION=args.aggregation,
+        OCI_TENANCY_CACHE="off",
+        OCI_TELEMETRY="off",
+    )
+    if not args.cache:
+        env.update(METRICS_CACHE="off", METRICS_SKETCHES="off")
+    if not args.rate:
+        # sem limitador: mede o custo de CPU da coleta, não a espera por tokens
+        env.update(OCI_RATE_INITIAL="1e6", OCI_RATE_MAX="1e6", OCI_RATE_BURST="1e6")
+    else:
+        env.update(OCI_RATE_INITIAL=str(args.rate))
+    cmd = [
+        sys.executable, os.path.abspath(__file__), "--worker", str(size),
+        "--result", result, "--regions", str(args.regions),
+        "--latency-ms", str(args.latency_ms), "--stages", ",".join(args.stages),
+    ]
+    if args.compartments:
+        cmd += ["--compartments", str(args.compartments)]
+    cmd.append("--tracemalloc" if args.tracemalloc else "--no-tracemalloc")
+    try:
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            tail = proc.stderr.strip().splitlines()[-1:] or ["?"]
+            return {"size": size, "error": tail[0]}
+        with open(result, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+def fmt_stage(s):
+    if s is None:
+        return "-"
+    if s["status"] != "ok":
+        return "n/d"
+    mem = f" {s['peak_mb']:7.1f}MB" if s.get("peak_mb") is not None else ""
+    return f"{s['seconds']:8.2f}s{mem}"
+
+
+def print_table(runs, stages):
+    width = 20
+    print("\n" + f"{'ETAPA':10}" + "".join(f"{r['size']:>{width}}" for r in runs))
+    for name in stages:
+        cells = []
+        for r in runs:
+            by_name = {s["stage"]: s for s in r.get("stages", [])}
+            cells.append("erro" if "error" in r else fmt_stage(by_name.get(name)))
+        print(f"{name:10}" + "".join(f"{c:>{width}}" for c in cells))
+    print(f"{'RSS máx.':10}" + "".join(
+        f"{'-' if 'error' in r else str(r['max_rss_mb']) + 'MB':>{width}}" for r in runs))
+    for key, label in (("cache_mb", "cache"), ("sketches_mb", "sketches")):
+        if any(r.get(key) is not None for r in runs):
+            print(f"{label:10}" + "".join(
+                f"{'-' if r.get(key) is None else str(r[key]) + 'MB':>{width}}" for r in runs))
+    for r in runs:
+        if "error" in r:
+            print(f"❌ {r['size']} instâncias: {r['error']}")
+
+
+def compare(runs, baseline_path, tolerance, args_params):
+    """Lista as etapas mais lentas ou mais pesadas que a base além da tolerância."""
+    with open(baseline_path, encoding="utf-8") as f:
+        data = json.load(f)
+    baseline = {r["size"]: r for r in data["runs"] if "error" not in r}
+    params = data.get("params", {})
+    if (params.get("days"), params.get("interval")) != (args_params["days"], args_params["interval"]):
+        # janelas diferentes não são comparáveis
+        raise SystemExit(f"❌ Base medida com {params.get('days')}d a {params.get('interval')}; "
+                         f"esta execução usa {args_params['days']}d a {args_params['interval']}")
+    regressions = []
+    for run in runs:
+        base = baseline.get(run["size"])
+        if base is None or "error" in run:
+            continue
+        base_stages = {s["stage"]: s for s in base["stages"] if s["status"] == "ok"}
+        for s in run["stages"]:
+            b = base_stages.get(s["stage"])
+            if b is None or s["status"] != "ok":
+                continue
+            if s["seconds"] > b["seconds"] * (1 + tolerance) and s["seconds"] - b["seconds"] > NOISE_SECONDS:
+                regressions.append(f"{run['size']:>6} {s['stage']:10} tempo {b['seconds']:.2f}s -> {s['seconds']:.2f}s")
+            if (s.get("peak_mb") is not None and b.get("peak_mb") is not None
+                    and s["peak_mb"] > b["peak_mb"] * (1 + tolerance) and s["peak_mb"] - b["peak_mb"] > NOISE_MB):
+                regressions.append(f"{run['size']:>6} {s['stage']:10} memória {b['peak_mb']:.1f}MB -> {s['peak_mb']:.1f}MB")
+    return regressions
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Benchmark offline das etapas do relatório FinOps")
+    p.add_argument("--scenario", choices=sorted(SCENARIOS), default="production",
+                   help="padrões de janela, resolução, tamanhos e cache (ver o topo do arquivo)")
+    p.add_argument("--sizes", help="quantidades de instâncias, separadas por vírgula")
+    p.add_argument("--regions", type=int, default=4)
+    p.add_argument("--compartments", type=int, help="padrão: 1 a cada 200 instâncias")
+    p.add_argument("--days", type=int)
+    p.add_argument("--interval", help="resolução das métricas (1m, 5m, 1h, 1d)")
+    p.add_argument("--cache", dest="cache", action="store_true", default=None,
+                   help="cache de datapoints e sketches ligados (METRICS_CACHE/METRICS_SKETCHES)")
+    p.add_argument("--no-cache", dest="cache", action="store_false")
+    p.add_argument("--aggregation", choices=("raw", "server"), default="raw",
+                   help="modo de coleta (METRICS_AGGREGATION)")
+    p.add_argument("--latency-ms", type=float, default=0.0, help="latência média de cada chamada falsa")
+    p.add_argument("--rate", type=float, default=0.0,
+                   help="taxa inicial do oci_ratelimit (req/s por região e API); 0 = sem limite")
+    p.add_argument("--stages", default=",".join(STAGES), help=f"subconjunto de: {','.join(STAGES)}")
+    p.add_argument("--tracemalloc", dest="tracemalloc", action="store_true", default=None,
+                   help="mede o pico de memória por etapa")
+    p.add_argument("--no-tracemalloc", dest="tracemalloc", action="store_false",
+                   help="não mede pico por etapa (tempos sem o custo do tracemalloc)")
+    p.add_argument("--output", help="grava os resultados em JSON")
+    p.add_argument("--compare", metavar="BASE.json", help="falha se alguma etapa piorar além da tolerância")
+    p.add_argument("--tolerance", type=float, default=0.25, help="piora relativa aceita no --compare")
+    p.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    p.add_argument("--result", help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    for key, value in SCENARIOS[args.scenario].items():
+        if getattr(args, key) is None:
+            setattr(args, key, value)
+    args.stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = sorted(set(args.stages) - set(STAGES))
+    if unknown:
+        p.error(f"etapas desconhecidas: {', '.join(unknown)}")
+    if args.stages[0] != "collect":
+        # as demais etapas precisam das linhas coletadas
+        args.stages = ["collect"] + [s for s in args.stages if s != "collect"]
+    return args
+
+
+def main():
+    args = parse_args()
+    if args.worker is not None:
+        args.size = args.worker
+        worker(args)
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    print(f"🏁 Benchmark ({args.scenario}): {args.regions} regiões, {args.days}d a {args.interval} "
+          f"({args.aggregation}, cache {'on' if args.cache else 'off'}), "
+          f"latência {args.latency_ms:g}ms, taxa {args.rate or 'sem limite'}, tracemalloc {'on' if args.tracemalloc else 'off'}")
+    runs = []
+    for size in sizes:
+        t0 = time.perf_counter()
+        run = run_size(size, args)
+        runs.append(run)
+        status = f"erro: {run['error']}" if "error" in run else f"{run['rows']} linhas"
+        print(f"  ⏱  {size:>6} instâncias: {time.perf_counter() - t0:.1f}s ({status})")
+
+    print_table(runs, args.stages)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": sys.version.split()[0],
+                "params": {k: getattr(args, k) for k in ("scenario", "regions", "compartments", "days", "interval",
+                                                        "aggregation", "cache", "latency_ms", "tracemalloc")},
+                "runs": runs,
+            }, f, indent=2)
+        print(f"\n➡ Resultados: {args.output}")
+
+    failed = any("error" in r for r in runs)
+    if args.compare:
+        regressions = compare(runs, args.compare, args.tolerance,
+                              {"days": args.days, "interval": args.interval})
+        if regressions:
+            print(f"\n❌ Regressões (tolerância {args.tolerance:.0%}):")
+            for line in regressions:
+                print("  " + line)
+            failed = True
+        else:
+            print(f"\n✅ Sem regressões em relação a {args.compare}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Mede o tempo de inicialização dos scripts e confere o orçamento.
+
+- `<script> --help` de cada ponto de entrada deve terminar dentro do
+  orçamento (STARTUP_BUDGET, padrão 1s), sem ler ~/.oci/config.
+- Importar os módulos usados nos caminhos "só relatório" não pode carregar
+  o SDK da OCI nem openpyxl/docx/numpy/pyarrow.
+
+Uso:
+    python scripts/check_startup.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+BUDGET = float(os.getenv("STARTUP_BUDGET", "1.0"))
+RUNS = int(os.getenv("STARTUP_RUNS", "3"))
+
+SCRIPTS = [
+    "oci_finops_pipeline.py",
+    "oci_metrics_cpu_mem_media_ndays.py",
+    "oci_metrics_cpu_mem_realtime.py",
+    "oci_metrics_exporter.py",
+    "oci_cpu_mem_report.py",
+    "oci_finops_cpu_mem_collect.py",
+    "oci_burstable_report.py",
+    "inventarioStartStop.py",
+    "logs.py",
+    "Untitled.py",
+    "oci_metrics_cpu_mem_word_report.py",
+    "oci_metrics_cpu_mem_word_technical.py",
+    "oci_metrics_cpu_mem_word_top5.py",
+    "oci_finops_word_downsize_strong.py",
+    "organiza_tags_csv.py",
+    "relatorio_finops_tags_from_csv.py",
+    "oci_sketch.py",
+    "oci_tenancy.py",
+    "oci_telemetry.py",
+    "oci_schedule.py",
+    "oci_pricing.py",
+]
+
+LIGHT_MODULES = [
+    "oci_finops_pipeline",
+    "oci_metrics_cpu_mem_media_ndays",
+    "oci_metrics_cpu_mem_word_report",
+    "oci_metrics_cpu_mem_word_technical",
+    "oci_metrics_cpu_mem_word_top5",
+    "oci_cpu_mem_report",
+    "oci_finops_cpu_mem_collect",
+    "oci_burstable_report",
+    "inventarioStartStop",
+    "logs",
+    "Untitled",
+]
+HEAVY = ("oci", "openpyxl", "docx", "numpy", "pyarrow")
+
+
+def env():
+    # HOME vazio: garante que nada depende de ~/.oci/config na inicialização
+    e = dict(os.environ, HOME=tempfile.mkdtemp(prefix="startup-"), PYTHONPATH=SRC)
+    e.pop("OCI_CONFIG_FILE", None)
+    return e
+
+
+def time_help(script, e):
+    best = None
+    for _ in range(RUNS):
+        t0 = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, os.path.join(SRC, script), "--help"],
+            env=e, capture_output=True, text=True,
+        )
+        elapsed = time.perf_counter() - t0
+        if proc.returncode != 0:
+            return None, proc.stderr.strip().splitlines()[-1:]
+        best = elapsed if best is None else min(best, elapsed)
+    return best, []
+
+
+def heavy_imports(module, e):
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(sorted({{m.split('.')[0] for m in sys.modules}} & set({HEAVY!r}))))"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], env=e, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return ["erro: " + (proc.stderr.strip().splitlines() or ["?"])[-1]]
+    return [m for m in proc.stdout.strip().split(",") if m]
+
+
+def main():
+    e = env()
+    failures = 0
+
+    print(f"⏱  --help (melhor de {RUNS}, orçamento {BUDGET:.2f}s)")
+    for script in SCRIPTS:
+        elapsed, err = time_help(script, e)
+        if elapsed is None:
+            failures += 1
+            print(f"  ❌ {script:42} falhou: {' '.join(err)}")
+            continue
+        ok = elapsed <= BUDGET
+        failures += not ok
+        print(f"  {'✅' if ok else '❌'} {script:42} {elapsed:.3f}s")
+
+    print("\n📦 Importação sem dependências pesadas")
+    for module in LIGHT_MODULES:
+        loaded = heavy_imports(module, e)
+        failures += bool(loaded)
+        print(f"  {'❌' if loaded else '✅'} {module:42} {', '.join(loaded) or '-'}")
+
+    if failures:
+        print(f"\n{failures} verificação(ões) fora do orçamento.")
+        sys.exit(1)
+    print("\n✅ Inicialização dentro do orçamento.")
+
+
+if __name__ == "__main__":
+    main()
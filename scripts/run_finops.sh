@@ -3,12 +3,18 @@ set -e
 
 echo "▶️ OCI FinOps Analyzer – Execução completa"
 
-python3 -m venv .venv
+# venv criado uma única vez; dependências reinstaladas só quando requirements.txt muda
+if [ ! -d .venv ]; then
+  python3 -m venv .venv
+fi
 source .venv/bin/activate
-pip install -r requirements.txt
 
-python3 src/oci_metrics_cpu_mem_media_ndays.py
-python3 src/oci_metrics_cpu_mem_word_technical.py
-python3 src/oci_metrics_cpu_mem_word_top5.py
+STAMP=.venv/.requirements.sha256
+if ! sha256sum --check --status "$STAMP" 2>/dev/null; then
+  pip install -r requirements.txt
+  sha256sum requirements.txt > "$STAMP"
+fi
+
+python3 src/oci_finops_pipeline.py "$@"
 
 echo "✅ Relatórios gerados com sucesso"
@@ -19,12 +19,17 @@ import math
 import os
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-import oci
-from oci.monitoring.models import SummarizeMetricsDataDetails
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill
+from oci_inventory import running_instances, with_shape_config
+from oci_ratelimit import call
+from oci_session import make_client
+from oci_tenancy import get_compartments, get_regions
+from oci_xlsx import GREEN, RED, YELLOW, equals, otherwise, starts_with, write_xlsx
+
+if TYPE_CHECKING:
+    import oci
+    from oci.monitoring.models import SummarizeMetricsDataDetails
 
 # ---------- Defaults / thresholds ----------
 DAYS = int(os.getenv("METRICS_DAYS", "30"))
@@ -36,48 +41,20 @@ CPU_HIGH = int(os.getenv("CPU_HIGH", "80"))
 
 MEM_LOW = int(os.getenv("MEM_LOW", "40"))
 MEM_HIGH = int(os.getenv("MEM_HIGH", "85"))
-
-MAX_RETRIES = int(os.getenv("METRICS_MAX_RETRIES", "3"))
-RETRY_SLEEP = float(os.getenv("METRICS_RETRY_SLEEP", "1.5"))
 # ------------------------------------------
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger("oci-finops-readonly")
 
 
-def mean_p95(values: List[float]) -> Tuple[Optional[float], Optional[float]]:
-    if not values:
-        return None, None
-    vals = sorted(values)
-    mean = sum(vals) / len(vals)
-    # p95 via rank interpolation
-    n = len(vals)
-    rank = 0.95 * (n - 1)
-    lo = int(math.floor(rank))
-    hi = int(math.ceil(rank))
-    if lo == hi:
-        p95 = vals[int(rank)]
-    else:
-        frac = rank - lo
-        p95 = vals[lo] * (1 - frac) + vals[hi] * frac
-    return mean, p95
-
-
-def summarize_with_retry(monitoring: oci.monitoring.MonitoringClient, compartment_id: str, details: SummarizeMetricsDataDetails):
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            return monitoring.summarize_metrics_data(compartment_id=compartment_id, summarize_metrics_data_details=details)
-        except oci.exceptions.ServiceError as e:
-            status = getattr(e, "status", None)
-            logger.debug("summarize_metrics_data ServiceError status=%s attempt=%d", status, attempt)
-            if status == 429 and attempt < MAX_RETRIES:
-                import time
-                time.sleep(RETRY_SLEEP * attempt)
-                continue
-            raise
-
-
-def get_metric(monitoring: oci.monitoring.MonitoringClient, compartment_id: str, instance_id: str, metric: str, start: datetime, end: datetime) -> Tuple[Optional[float], Optional[float]]:
+def summarize_with_retry(monitoring: "oci.monitoring.MonitoringClient", compartment_id: str, details: "SummarizeMetricsDataDetails"):
+    return call(monitoring.summarize_metrics_data, compartment_id=compartment_id, summarize_metrics_data_details=details)
+
+
+def get_metric(monitoring: "oci.monitoring.MonitoringClient", compartment_id: str, instance_id: str, metric: str, start: datetime, end: datetime) -> Tuple[Optional[float], Optional[float]]:
+    from oci.monitoring.models import SummarizeMetricsDataDetails
+    from oci_stats import mean_p95
+
     query = f'{metric}[{INTERVAL}]{{resourceId = "{instance_id}"}}.mean()'
     details = SummarizeMetricsDataDetails(namespace="oci_computeagent", query=query, start_time=start, end_time=end)
     resp = summarize_with_retry(monitoring, compartment_id, details)
@@ -186,25 +163,11 @@ def save_csv(rows: List[Dict[str, Any]], path: Path):
 
 def save_xlsx(rows: List[Dict[str, Any]], path: Path):
     headers = list(rows[0].keys())
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Recommendations"
-    ws.append(headers)
-    fill_up = PatternFill("solid", fgColor="FFEB9C")
-    fill_down = PatternFill("solid", fgColor="FFC7CE")
-    fill_keep = PatternFill("solid", fgColor="C6EFCE")
-    rec_col = headers.index("finops_recommendation") + 1
-    for r in rows:
-        ws.append([r.get(h) for h in headers])
-        row = ws.max_row
-        rec = r.get("finops_recommendation", "")
-        if isinstance(rec, str) and rec.startswith("DOWNSIZE"):
-            ws.cell(row=row, column=rec_col).fill = fill_down
-        elif rec == "UPSCALE":
-            ws.cell(row=row, column=rec_col).fill = fill_up
-        else:
-            ws.cell(row=row, column=rec_col).fill = fill_keep
-    wb.save(str(path))
+    write_xlsx(
+        str(path), headers, rows, "Recommendations",
+        color_column="finops_recommendation",
+        rules=[starts_with("DOWNSIZE", RED), equals("UPSCALE", YELLOW), otherwise(GREEN)],
+    )
     logger.info("XLSX salvo em: %s", path)
 
 
@@ -213,14 +176,8 @@ def main(days: int = DAYS, outdir: Optional[str] = None):
     csv_path = outdir / f"finops_recommendations_{days}d.csv"
     xlsx_path = outdir / f"finops_recommendations_{days}d.xlsx"
 
-    cfg = oci.config.from_file()
-    tenancy_id = cfg["tenancy"]
-    identity = oci.identity.IdentityClient(cfg)
-
-    regions = [r.region_name for r in identity.list_region_subscriptions(tenancy_id).data]
-    compartments = oci.pagination.list_call_get_all_results(identity.list_compartments, tenancy_id, compartment_id_in_subtree=True).data
-    root = identity.get_compartment(tenancy_id).data
-    compartments = [c for c in compartments if c.lifecycle_state == "ACTIVE"] + [root]
+    regions = get_regions()
+    compartments = get_compartments()
 
     start = datetime.now(timezone.utc) - timedelta(days=days)
     end = datetime.now(timezone.utc)
@@ -230,23 +187,15 @@ def main(days: int = DAYS, outdir: Optional[str] = None):
 
     for region in regions:
         logger.info("Região: %s", region)
-        cfg_r = dict(cfg)
-        cfg_r["region"] = region
-        compute = oci.core.ComputeClient(cfg_r)
-        monitoring = oci.monitoring.MonitoringClient(cfg_r)
-
-        for comp in compartments:
-            try:
-                instances = oci.pagination.list_call_get_all_results(compute.list_instances, compartment_id=comp.id).data
-            except Exception:
-                continue
-            running = [i for i in instances if i.lifecycle_state == "RUNNING"]
-            if not running:
-                continue
+        compute = make_client("compute", region)
+        monitoring = make_client("monitoring", region)
+        search = make_client("search", region)
+
+        for comp, running in running_instances(compute, search, compartments):
             logger.info("  %s RUNNING=%d", comp.name, len(running))
             for inst in running:
                 try:
-                    inst_full = compute.get_instance(inst.id).data  # leitura apenas
+                    inst_full = with_shape_config(compute, inst)  # leitura apenas
                 except Exception:
                     continue
                 cpu_mean, cpu_p95 = get_metric(monitoring, comp.id, inst.id, "CpuUtilization", start, end)
@@ -1,11 +1,14 @@
 import os
 import csv
 import json
+import argparse
 from datetime import datetime
 
-import oci
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill
+from oci_inventory import ALL_INSTANCES_QUERY, candidate_compartments
+from oci_ratelimit import limited
+from oci_session import make_client
+from oci_tenancy import get_compartments, get_regions, mark_denied
+from oci_xlsx import GREEN, RED, equals, otherwise, write_xlsx
 
 # ================= CONFIG =================
 HOME = os.path.expanduser("~")
@@ -13,27 +16,10 @@ CSV_PATH = os.path.join(HOME, "Relatorio_Instancias_Tags_OCI.csv")
 XLSX_PATH = os.path.join(HOME, "Relatorio_Instancias_Tags_OCI.xlsx")
 # =========================================
 
-cfg = oci.config.from_file()
-tenancy_id = cfg["tenancy"]
-
-identity = oci.identity.IdentityClient(cfg)
-
-
-def get_regions():
-    return [r.region_name for r in identity.list_region_subscriptions(tenancy_id).data]
-
-
-def get_compartments():
-    comps = oci.pagination.list_call_get_all_results(
-        identity.list_compartments,
-        tenancy_id,
-        compartment_id_in_subtree=True
-    ).data
-    root = identity.get_compartment(tenancy_id).data
-    return [c for c in comps if c.lifecycle_state == "ACTIVE"] + [root]
-
 
 def main():
+    import oci
+
     regions = get_regions()
     compartments = get_compartments()
     rows = []
@@ -43,18 +29,17 @@ def main():
     for region in regions:
         print(f"🟢 Região: {region}")
 
-        cfg_r = dict(cfg)
-        cfg_r["region"] = region
-
-        compute = oci.core.ComputeClient(cfg_r)
+        compute = make_client("compute", region)
+        search = make_client("search", region)
 
-        for comp in compartments:
+        for comp in candidate_compartments(search, compartments, ALL_INSTANCES_QUERY):
             try:
                 instances = oci.pagination.list_call_get_all_results(
-                    compute.list_instances,
+                    limited(compute.list_instances),
                     compartment_id=comp.id
                 ).data
-            except oci.exceptions.ServiceError:
+            except oci.exceptions.ServiceError as e:
+                mark_denied("list_instances", region, comp.id, e.status)
                 continue
 
             if not instances:
@@ -67,6 +52,7 @@ def main():
                     "region": region,
                     "compartment": comp.name,
                     "instance_name": inst.display_name,
+                    "instance_ocid": inst.id,
                     "instance_state": inst.lifecycle_state,
                     "shape": inst.shape,
                     "ocpus": getattr(inst.shape_config, "ocpus", None),
@@ -84,25 +70,11 @@ def main():
         writer.writerows(rows)
 
     # ================= XLSX =================
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "INSTANCIAS_TAGS"
-    ws.append(headers)
-
-    fill_running = PatternFill("solid", fgColor="C6EFCE")
-    fill_stopped = PatternFill("solid", fgColor="FFC7CE")
-
-    col_state = headers.index("instance_state") + 1
-
-    for r in rows:
-        ws.append([r[h] for h in headers])
-        row = ws.max_row
-        if r["instance_state"] == "RUNNING":
-            ws.cell(row=row, column=col_state).fill = fill_running
-        else:
-            ws.cell(row=row, column=col_state).fill = fill_stopped
-
-    wb.save(XLSX_PATH)
+    write_xlsx(
+        XLSX_PATH, headers, rows, "INSTANCIAS_TAGS",
+        color_column="instance_state",
+        rules=[equals("RUNNING", GREEN), otherwise(RED)],
+    )
 
     print("\n✅ Relatórios gerados:")
     print(f"➡ CSV : {CSV_PATH}")
@@ -110,4 +82,5 @@ def main():
 
 
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="Inventário de instâncias e tags (CSV/XLSX)").parse_args()
     main()
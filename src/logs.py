@@ -1,10 +1,12 @@
 import os
 import csv
+import argparse
 from datetime import datetime, timezone
 
-import oci
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill
+from oci_ratelimit import limited
+from oci_session import make_client
+from oci_tenancy import accessible, get_compartments, get_regions, mark_denied
+from oci_xlsx import GREEN, RED, YELLOW, equals, otherwise, write_xlsx
 
 # ================= CONFIG =================
 HOME = os.path.expanduser("~")
@@ -20,11 +22,6 @@ NOISY_SERVICES = [
 ]
 # =========================================
 
-cfg = oci.config.from_file()
-tenancy_id = cfg["tenancy"]
-
-identity = oci.identity.IdentityClient(cfg)
-
 
 def finops_recommendation(log_type, lifecycle, source_service):
     source_service = (source_service or "").lower()
@@ -42,39 +39,31 @@ def finops_recommendation(log_type, lifecycle, source_service):
 
 
 def main():
-    rows = []
+    import oci
 
-    regions = [r.region_name for r in identity.list_region_subscriptions(tenancy_id).data]
-
-    compartments = oci.pagination.list_call_get_all_results(
-        identity.list_compartments,
-        tenancy_id,
-        compartment_id_in_subtree=True
-    ).data
+    rows = []
 
-    root = identity.get_compartment(tenancy_id).data
-    compartments.append(root)
+    regions = get_regions()
+    compartments = get_compartments()
 
     for region in regions:
         print(f"\n🌎 Região: {region}")
-        cfg_r = dict(cfg)
-        cfg_r["region"] = region
-
-        logging_client = oci.logging.LoggingManagementClient(cfg_r)
+        logging_client = make_client("logging", region)
 
-        for comp in compartments:
+        for comp in accessible("list_log_groups", region, compartments):
             try:
                 log_groups = oci.pagination.list_call_get_all_results(
-                    logging_client.list_log_groups,
+                    limited(logging_client.list_log_groups),
                     compartment_id=comp.id
                 ).data
-            except Exception:
+            except Exception as e:
+                mark_denied("list_log_groups", region, comp.id, getattr(e, "status", None))
                 continue
 
             for lg in log_groups:
                 try:
                     logs = oci.pagination.list_call_get_all_results(
-                        logging_client.list_logs,
+                        limited(logging_client.list_logs),
                         log_group_id=lg.id
                     ).data
                 except Exception:
@@ -114,30 +103,11 @@ def main():
         writer.writerows(rows)
 
     # ================= EXCEL =================
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "OCI Logs FinOps"
-    ws.append(headers)
-
-    fill_remove = PatternFill("solid", fgColor="FFC7CE")
-    fill_review = PatternFill("solid", fgColor="FFEB9C")
-    fill_keep = PatternFill("solid", fgColor="C6EFCE")
-
-    rec_col = headers.index("finops_recommendation") + 1
-
-    for r in rows:
-        ws.append([r[h] for h in headers])
-        row = ws.max_row
-        rec = r["finops_recommendation"]
-
-        if rec == "REMOVE":
-            ws.cell(row=row, column=rec_col).fill = fill_remove
-        elif rec == "REVIEW":
-            ws.cell(row=row, column=rec_col).fill = fill_review
-        else:
-            ws.cell(row=row, column=rec_col).fill = fill_keep
-
-    wb.save(XLSX_PATH)
+    write_xlsx(
+        XLSX_PATH, headers, rows, "OCI Logs FinOps",
+        color_column="finops_recommendation",
+        rules=[equals("REMOVE", RED), equals("REVIEW", YELLOW), otherwise(GREEN)],
+    )
 
     print("\n✅ Relatórios gerados:")
     print(CSV_PATH)
@@ -145,4 +115,5 @@ def main():
 
 
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="Inventário FinOps de logs do OCI Logging (CSV/XLSX)").parse_args()
     main()
@@ -1,28 +1,15 @@
 import os
 import csv
-import oci
+import argparse
+
+from oci_inventory import ALL_INSTANCES_QUERY, candidate_compartments
+from oci_ratelimit import limited
+from oci_session import make_client
+from oci_tenancy import get_compartments, get_regions, mark_denied
 
 HOME = os.path.expanduser("~")
 CSV_PATH = os.path.join(HOME, "Relatorio_Burstable_OCI.csv")
 
-cfg = oci.config.from_file()
-tenancy_id = cfg["tenancy"]
-identity = oci.identity.IdentityClient(cfg)
-
-
-def get_regions():
-    return [r.region_name for r in identity.list_region_subscriptions(tenancy_id).data]
-
-
-def get_compartments():
-    comps = oci.pagination.list_call_get_all_results(
-        identity.list_compartments,
-        tenancy_id,
-        compartment_id_in_subtree=True
-    ).data
-    root = identity.get_compartment(tenancy_id).data
-    return [c for c in comps if c.lifecycle_state == "ACTIVE"] + [root]
-
 
 def parse_baseline(inst):
     baseline = getattr(inst, "baseline_ocpu_utilization", None)
@@ -39,6 +26,8 @@ def parse_baseline(inst):
 
 
 def main():
+    import oci
+
     regions = get_regions()
     compartments = get_compartments()
 
@@ -48,18 +37,17 @@ def main():
 
     for region in regions:
         print(f"🟢 Região: {region}")
-        cfg_r = dict(cfg)
-        cfg_r["region"] = region
-
-        compute = oci.core.ComputeClient(cfg_r)
+        compute = make_client("compute", region)
+        search = make_client("search", region)
 
-        for comp in compartments:
+        for comp in candidate_compartments(search, compartments, ALL_INSTANCES_QUERY):
             try:
                 instances = oci.pagination.list_call_get_all_results(
-                    compute.list_instances,
+                    limited(compute.list_instances),
                     compartment_id=comp.id
                 ).data
-            except oci.exceptions.ServiceError:
+            except oci.exceptions.ServiceError as e:
+                mark_denied("list_instances", region, comp.id, e.status)
                 print(f"⚠️ Sem acesso ao compartment {comp.name}")
                 continue
 
@@ -90,4 +78,5 @@ def main():
 
 
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="Inventário de configuração Burstable (CSV)").parse_args()
     main()
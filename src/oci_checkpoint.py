@@ -0,0 +1,207 @@
+"""
+Progresso de coletas longas: diário append-only + fila de repetição.
+
+- Journal: arquivo JSONL onde cada linha é um evento (cabeçalho da coleta,
+  linha de instância concluída, falha, fim). Com --resume, as instâncias já
+  gravadas são recarregadas e só o que falta é coletado, na mesma janela
+  de tempo da coleta original.
+- run_deferred: executa as tarefas isolando falhas; o que falhar por erro
+  transitório (429, 5xx, timeout, conexão) vai para uma fila repetida depois
+  da rodada, sem derrubar as outras regiões; os demais erros (400, 404...)
+  são registrados como falha na hora.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from oci_ratelimit import RETRYABLE_STATUS
+
+DEFERRED_RETRIES = int(os.getenv("METRICS_DEFERRED_RETRIES", "2"))
+DEFERRED_DELAY = float(os.getenv("METRICS_DEFERRED_DELAY", "30"))   # segundos antes de cada repetição
+
+
+class Journal:
+    def __init__(self, path, meta, start, end, rows=None, finished=False):
+        self.path = path
+        self.meta = meta
+        self.start = start
+        self.end = end
+        self.rows = rows or {}      # instance_ocid -> linha
+        self.profiles = {}          # instance_ocid -> perfil semanal (oci_schedule.Profiles.export)
+        self.finished = finished
+        self.lock = threading.Lock()
+        self.file = None
+
+    # ---------- abertura ----------
+    @classmethod
+    def create(cls, path, meta, start, end):
+        journal = cls(path, meta, start, end)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        journal.file = open(path, "w", encoding="utf-8")
+        journal._write([{
+            "type": "header",
+            "meta": meta,
+            "start": int(start.timestamp()),
+            "end": int(end.timestamp()),
+            "created": datetime.now().isoformat(timespec="seconds"),
+        }])
+        return journal
+
+    @classmethod
+    def load(cls, path, meta):
+        """Journal compatível com `meta` (mesmos dias, resolução e shard), ou None."""
+        try:
+            f = open(path, encoding="utf-8")
+        except OSError:
+            return None
+        journal = None
+        with f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue    # última linha cortada por uma queda no meio da escrita
+                kind = event.get("type")
+                if kind == "header":
+                    if event.get("meta") != meta:
+                        return None
+                    journal = cls(path, meta,
+                                  datetime.fromtimestamp(event["start"], timezone.utc),
+                                  datetime.fromtimestamp(event["end"], timezone.utc))
+                elif journal is None:
+                    return None
+                elif kind == "row":
+                    journal.rows[event["row"]["instance_ocid"]] = event["row"]
+                    if event.get("profile"):
+                        journal.profiles[event["row"]["instance_ocid"]] = event["profile"]
+                elif kind == "done":
+                    journal.finished = True
+        if journal is not None:
+            journal.file = open(path, "a", encoding="utf-8")
+        return journal
+
+    # ---------- escrita ----------
+    def _write(self, events):
+        with self.lock:
+            self.file.write("".join(json.dumps(e, default=str) + "\n" for e in events))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def append(self, rows, profiles=None):
+        """Registra linhas concluídas (uma entrada por instância, com o perfil semanal se houver)."""
+        if rows:
+            profiles = profiles or {}
+            self._write([
+                {"type": "row", "row": r, **({"profile": profiles[r["instance_ocid"]]}
+                                             if r["instance_ocid"] in profiles else {})}
+                for r in rows
+            ])
+            with self.lock:
+                for r in rows:
+                    self.rows[r["instance_ocid"]] = r
+
+    def failed(self, label, error):
+        self._write([{"type": "failed", "task": label, "error": error,
+                      "ts": datetime.now().isoformat(timespec="seconds")}])
+
+    def finish(self):
+        self._write([{"type": "done", "ts": datetime.now().isoformat(timespec="seconds")}])
+        self.finished = True
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def open_journal(path, meta, start, end, resume=False):
+    """
+    Journal da coleta. Com `resume`, reaproveita o anterior se for
+    compatível; senão (ou sem `resume`) começa um novo. "off" desativa.
+    """
+    if not path or path.lower() in ("off", "0", "no", "false"):
+        return None
+    path = os.path.expanduser(path)
+    if resume:
+        journal = Journal.load(path, meta)
+        if journal is not None:
+            return journal
+        print(f"ℹ️ Nenhum progresso compatível em {path}; coleta completa.")
+    return Journal.create(path, meta, start, end)
+
+
+# ---------- fila de repetição ----------
+class Failed:
+    """Resultado de uma tarefa que levantou exceção."""
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+    def __str__(self):
+        return f"{type(self.error).__name__}: {self.error}"
+
+
+def retryable(error):
+    """Erros transitórios, que valem uma nova tentativa: 429, 5xx, timeout e conexão."""
+    status = getattr(error, "status", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        import oci
+    except ImportError:
+        return False
+    # requests (empacotado no SDK): ConnectionError, ConnectTimeout, ReadTimeout...
+    return isinstance(error, oci.exceptions.BaseRequestException)
+
+
+def isolated(fn):
+    def run():
+        try:
+            return fn()
+        except Exception as e:
+            return Failed(e)
+    return run
+
+
+def run_deferred(tasks, execute, retries=DEFERRED_RETRIES, delay=DEFERRED_DELAY):
+    """
+    Executa tarefas (chave, rótulo, fn) com `execute` (recebe [(chave, fn)] e
+    devolve os resultados na ordem, ex.: oci_pool.run_ordered).
+
+    Uma falha não interrompe as demais: com erro transitório (`retryable`) a
+    tarefa vai para a fila e é repetida depois da rodada, até `retries` vezes;
+    com qualquer outro erro vira falha na hora, sem esperar. Retorna
+    (resultados, falhas), com None no lugar do resultado de cada tarefa que
+    falhou e falhas = [(rótulo, erro)].
+    """
+    results = [None] * len(tasks)
+    pending = list(range(len(tasks)))
+    errors = {}
+    final = []
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        if attempt:
+            print(f"\n🔁 Repetindo {len(pending)} tarefa(s) com falha "
+                  f"(tentativa {attempt + 1} de {retries + 1}, em {delay:g}s)")
+            time.sleep(delay)
+        outcome = execute([(tasks[i][0], isolated(tasks[i][2])) for i in pending])
+        still = []
+        for i, result in zip(pending, outcome):
+            if isinstance(result, Failed):
+                errors[i] = result
+                if retryable(result.error):
+                    still.append(i)
+                    print(f"  ⚠️ {tasks[i][1]}: {result}")
+                else:
+                    final.append(i)
+                    print(f"  ❌ {tasks[i][1]}: {result} (sem nova tentativa)")
+            else:
+                results[i] = result
+        pending = still
+    return results, [(tasks[i][1], str(errors[i])) for i in sorted(final + pending)]
@@ -1,12 +1,13 @@
 import os
-import time
 import csv
+import argparse
 from datetime import datetime, timedelta, timezone
 
-import oci
-from oci.monitoring.models import SummarizeMetricsDataDetails
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill
+from oci_inventory import RUNNING_INSTANCES_QUERY, candidate_compartments
+from oci_ratelimit import call, limited
+from oci_session import make_client
+from oci_tenancy import get_compartments, get_regions, mark_denied
+from oci_xlsx import GREEN, RED, YELLOW, equals, otherwise, starts_with, write_xlsx
 
 # ================= CONFIG =================
 DAYS = int(os.getenv("METRICS_DAYS", "30"))
@@ -19,57 +20,24 @@ CPU_HIGH = 80
 MEM_LOW = 40
 MEM_HIGH = 85
 
-MAX_RETRIES = 3
-RETRY_SLEEP = 3
-
 HOME = os.path.expanduser("~")
 CSV_PATH = os.path.join(HOME, f"Relatorio_CPU_MEM_{DAYS}d.csv")
 XLSX_PATH = os.path.join(HOME, f"Relatorio_CPU_MEM_{DAYS}d.xlsx")
 # =========================================
 
-cfg = oci.config.from_file()
-tenancy_id = cfg["tenancy"]
-identity = oci.identity.IdentityClient(cfg)
-
-
-def get_regions():
-    return [r.region_name for r in identity.list_region_subscriptions(tenancy_id).data]
-
-
-def get_compartments():
-    comps = oci.pagination.list_call_get_all_results(
-        identity.list_compartments,
-        tenancy_id,
-        compartment_id_in_subtree=True
-    ).data
-    root = identity.get_compartment(tenancy_id).data
-    return [c for c in comps if c.lifecycle_state == "ACTIVE"] + [root]
-
 
 def summarize_with_retry(monitoring, compartment_id, details):
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            return monitoring.summarize_metrics_data(
-                compartment_id=compartment_id,
-                summarize_metrics_data_details=details
-            )
-        except oci.exceptions.ServiceError as e:
-            if e.status == 429 and attempt < MAX_RETRIES:
-                time.sleep(RETRY_SLEEP)
-                continue
-            raise
-
-
-def mean_p95(values):
-    if not values:
-        return None, None
-    values = sorted(values)
-    mean = sum(values) / len(values)
-    p95 = values[int(len(values) * 0.95) - 1]
-    return mean, p95
+    return call(
+        monitoring.summarize_metrics_data,
+        compartment_id=compartment_id,
+        summarize_metrics_data_details=details
+    )
 
 
 def get_metric(monitoring, compartment_id, instance_id, metric, start, end):
+    from oci.monitoring.models import SummarizeMetricsDataDetails
+    from oci_stats import mean_p95
+
     query = f'{metric}[{INTERVAL}]{{resourceId = "{instance_id}"}}.mean()'
     details = SummarizeMetricsDataDetails(
         namespace="oci_computeagent",
@@ -102,6 +70,8 @@ def finops(cpu_mean, cpu_p95, mem_mean, mem_p95):
 
 
 def main():
+    import oci
+
     regions = get_regions()
     compartments = get_compartments()
 
@@ -114,19 +84,18 @@ def main():
 
     for region in regions:
         print(f"🟢 Região: {region}")
-        cfg_r = dict(cfg)
-        cfg_r["region"] = region
+        compute = make_client("compute", region)
+        monitoring = make_client("monitoring", region)
+        search = make_client("search", region)
 
-        compute = oci.core.ComputeClient(cfg_r)
-        monitoring = oci.monitoring.MonitoringClient(cfg_r)
-
-        for comp in compartments:
+        for comp in candidate_compartments(search, compartments, RUNNING_INSTANCES_QUERY):
             try:
                 instances = oci.pagination.list_call_get_all_results(
-                    compute.list_instances,
+                    limited(compute.list_instances),
                     compartment_id=comp.id
                 ).data
-            except oci.exceptions.ServiceError:
+            except oci.exceptions.ServiceError as e:
+                mark_denied("list_instances", region, comp.id, e.status)
                 print(f"⚠️ Sem acesso ao compartment {comp.name}")
                 continue
 
@@ -165,30 +134,15 @@ def main():
         writer.writeheader()
         writer.writerows(rows)
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "CPU_MEM"
-
-    ws.append(headers)
-
-    fill_keep = PatternFill("solid", fgColor="C6EFCE")
-    fill_down = PatternFill("solid", fgColor="FFC7CE")
-    fill_up = PatternFill("solid", fgColor="FFEB9C")
-
-    rec_col = headers.index("finops_recommendation") + 1
-
-    for r in rows:
-        ws.append([r[h] for h in headers])
-        row = ws.max_row
-        rec = r["finops_recommendation"]
-        if rec.startswith("DOWNSIZE"):
-            ws.cell(row=row, column=rec_col).fill = fill_down
-        elif rec == "UPSCALE":
-            ws.cell(row=row, column=rec_col).fill = fill_up
-        else:
-            ws.cell(row=row, column=rec_col).fill = fill_keep
-
-    wb.save(XLSX_PATH)
+    write_xlsx(
+        XLSX_PATH, headers, rows, "CPU_MEM",
+        color_column="finops_recommendation",
+        rules=[
+            starts_with("DOWNSIZE", RED),
+            equals("UPSCALE", YELLOW),
+            otherwise(GREEN),
+        ],
+    )
 
     print("\n✅ Relatórios gerados:")
     print(f"➡ CSV : {CSV_PATH}")
@@ -196,4 +150,5 @@ def main():
 
 
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="CPU/Memória de N dias (METRICS_DAYS) por instância RUNNING (CSV/XLSX)").parse_args()
     main()
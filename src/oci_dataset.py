@@ -0,0 +1,126 @@
+"""
+Dataset colunar (Parquet) entre a coleta e os relatórios.
+
+Layout (particionado por região, compressão zstd):
+    <raiz>/instances/region=<região>/*.parquet    estatísticas por instância
+    <raiz>/datapoints/region=<região>/*.parquet   datapoints brutos (opcional)
+
+Os tipos numéricos são preservados, então os relatórios não precisam
+reconverter texto em número a cada leitura.
+"""
+import os
+import shutil
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+INSTANCES_SCHEMA = pa.schema([
+    ("region", pa.string()),
+    ("compartment", pa.string()),
+    ("instance_name", pa.string()),
+    ("instance_ocid", pa.string()),
+    ("shape", pa.string()),
+    ("ocpus", pa.float64()),
+    ("memory_gb", pa.float64()),
+    ("burstable_enabled", pa.string()),
+    ("baseline_percent", pa.string()),
+    ("baseline_raw", pa.string()),
+    ("cpu_mean_percent", pa.float64()),
+    ("cpu_p95_percent", pa.float64()),
+    ("mem_mean_percent", pa.float64()),
+    ("mem_p95_percent", pa.float64()),
+    ("cpu_p99_percent", pa.float64()),
+    ("cpu_max_percent", pa.float64()),
+    ("mem_p99_percent", pa.float64()),
+    ("mem_max_percent", pa.float64()),
+    ("data_coverage_percent", pa.float64()),
+    ("finops_recommendation", pa.string()),
+])
+
+DATAPOINTS_SCHEMA = pa.schema([
+    ("region", pa.string()),
+    ("instance_ocid", pa.string()),
+    ("metric", pa.string()),
+    ("ts", pa.timestamp("s", tz="UTC")),
+    ("value", pa.float32()),
+])
+
+
+def dataset_path(csv_path):
+    """Relatorio_X.csv -> Relatorio_X.parquet (diretório)."""
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def rows_to_table(rows):
+    schema = pa.schema([f for f in INSTANCES_SCHEMA if f.name in rows[0]])
+    extra = [k for k in rows[0] if k not in schema.names]
+    table = pa.Table.from_pylist([{k: r.get(k) for k in schema.names} for r in rows], schema=schema)
+    for name in extra:
+        table = table.append_column(name, pa.array([r.get(name) for r in rows]))
+    return table
+
+
+def datapoints_batch(region, metric, series):
+    """{instance_ocid: [(ts, value), ...]} -> RecordBatch de datapoints."""
+    ids, ts, values = [], [], []
+    for rid, points in series.items():
+        ids.extend([rid] * len(points))
+        for t, v in points:
+            ts.append(t)
+            values.append(v)
+    n = len(ids)
+    return pa.RecordBatch.from_arrays([
+        pa.array([region] * n, pa.string()),
+        pa.array(ids, pa.string()),
+        pa.array([metric] * n, pa.string()),
+        pa.array(ts, pa.int64()).cast(pa.timestamp("s", tz="UTC")),
+        pa.array(values, pa.float32()),
+    ], schema=DATAPOINTS_SCHEMA)
+
+
+def _write(table, path):
+    pq.write_to_dataset(
+        table,
+        root_path=path,
+        partition_cols=["region"],
+        compression="zstd",
+    )
+
+
+def write_dataset(root, rows, datapoints=None):
+    """
+    Grava em um diretório novo e troca pelo anterior: uma região (ou os
+    datapoints) ausente nesta execução não deixa partições antigas para trás.
+    """
+    root = root.rstrip(os.sep)
+    tmp, old = root + ".tmp", root + ".old"
+    for path in (tmp, old):
+        shutil.rmtree(path, ignore_errors=True)
+    _write(rows_to_table(rows), os.path.join(tmp, "instances"))
+    if datapoints:
+        _write(pa.Table.from_batches(datapoints, schema=DATAPOINTS_SCHEMA), os.path.join(tmp, "datapoints"))
+    if os.path.exists(root):
+        os.replace(root, old)
+    os.replace(tmp, root)
+    shutil.rmtree(old, ignore_errors=True)
+    # a data do diretório marca a coleta (comparada com a do CSV em is_current)
+    os.utime(root)
+
+
+def is_current(root, csv_path):
+    """O dataset só vale se não for mais antigo que o CSV (coleta com --outputs csv ou METRICS_DATASET=off)."""
+    if not os.path.isdir(root):
+        return False
+    return not os.path.exists(csv_path) or os.path.getmtime(root) >= os.path.getmtime(csv_path)
+
+
+def read_rows(root, columns=None):
+    """
+    Lê as estatísticas por instância como lista de dicts tipados.
+    `columns` projeta apenas as colunas pedidas (as ausentes são ignoradas).
+    """
+    dataset = ds.dataset(os.path.join(root, "instances"), format="parquet", partitioning="hive")
+    if columns is not None:
+        columns = [c for c in columns if c in dataset.schema.names]
+    return dataset.to_table(columns=columns).to_pylist()
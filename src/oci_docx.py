@@ -0,0 +1,168 @@
+"""
+Geração de DOCX em lote, sem o modelo de objetos do python-docx.
+
+Com milhares de recomendações, um add_paragraph / cell.text por linha no
+python-docx (lxml + objetos por elemento) leva minutos. Aqui o corpo do
+documento é montado como texto WordprocessingML e gravado de uma vez:
+
+- o modelo (default.docx do python-docx ou OCI_DOCX_TEMPLATE) vira, uma
+  única vez, um pacote "casca" sem word/document.xml em ~/.oci_finops/,
+  reaproveitado entre execuções: cada relatório copia a casca e só
+  acrescenta o document.xml, sem reabrir nem recomprimir estilos e tema;
+- títulos, parágrafos e tabelas são strings XML gravadas em streaming no
+  pacote.
+
+Uso:
+    doc = DocxWriter()
+    doc.heading("Relatório FinOps", 0)
+    doc.paragraph("Janela de análise: 30 dias", italic=True, size=9)
+    doc.table(["Rank", "Instância"], [["1", "vm-01"], ["2", "vm-02"]])
+    doc.save(os.path.expanduser("~/relatorio.docx"))
+"""
+import os
+import re
+import shutil
+import threading
+import zipfile
+import zlib
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+TEMPLATE = os.getenv("OCI_DOCX_TEMPLATE", "")
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".oci_finops")
+
+DOCUMENT_PART = "word/document.xml"
+# caracteres de controle não são válidos em XML 1.0
+_INVALID_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_ALIGN = {"left": "left", "center": "center", "right": "right", "justify": "both"}
+
+_lock = threading.Lock()
+_templates = {}
+
+
+# ---------- modelo ----------
+def default_template():
+    """default.docx do python-docx, localizado sem importar o pacote."""
+    import importlib.util
+
+    spec = importlib.util.find_spec("docx")
+    if spec is None or not spec.origin:
+        raise ImportError("python-docx não instalado (modelo default.docx indisponível)")
+    return os.path.join(os.path.dirname(spec.origin), "templates", "default.docx")
+
+
+class Template:
+    """Casca do pacote + início/fim do document.xml do modelo."""
+
+    def __init__(self, path):
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        key = zlib.crc32(f"{path}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+        self.shell = os.path.join(CACHE_DIR, f"docx_shell_{key:08x}.docx")
+
+        with zipfile.ZipFile(path) as src:
+            document = src.read(DOCUMENT_PART).decode("utf-8")
+            if not os.path.exists(self.shell):
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                tmp = f"{self.shell}.{os.getpid()}.tmp"
+                with zipfile.ZipFile(tmp, "w") as dst:
+                    for info in src.infolist():
+                        if info.filename != DOCUMENT_PART:
+                            dst.writestr(info, src.read(info))
+                os.replace(tmp, self.shell)
+
+        # o conteúdo do modelo (capa, por exemplo) fica antes do corpo gerado
+        cut = document.rfind("<w:sectPr")
+        if cut < 0:
+            cut = document.rindex("</w:body>")
+        self.head = document[:cut]
+        self.tail = document[cut:]
+
+        page = re.search(r'<w:pgSz w:w="(\d+)"', self.tail)
+        margins = re.search(r'<w:pgMar[^>]*w:right="(\d+)"[^>]*w:left="(\d+)"', self.tail)
+        self.width = int(page.group(1)) - sum(map(int, margins.groups())) if page and margins else 8640
+
+
+def get_template(path=None):
+    path = path or TEMPLATE or default_template()
+    with _lock:
+        template = _templates.get(path)
+        if template is None:
+            template = _templates[path] = Template(path)
+        return template
+
+
+# ---------- XML ----------
+def xml_text(value):
+    return escape(_INVALID_XML.sub("", "" if value is None else str(value)))
+
+
+def run_xml(text, bold=False, italic=False, size=None):
+    """Um run; quebras de linha viram <w:br/> (como no add_paragraph do python-docx)."""
+    props = ("<w:b/>" if bold else "") + ("<w:i/>" if italic else "") + (
+        f'<w:sz w:val="{int(size * 2)}"/>' if size else "")
+    rpr = f"<w:rPr>{props}</w:rPr>" if props else ""
+    lines = xml_text(text).split("\n")
+    return f"<w:r>{rpr}" + "<w:br/>".join(f'<w:t xml:space="preserve">{line}</w:t>' for line in lines) + "</w:r>"
+
+
+def paragraph_xml(text="", style=None, align=None, **run):
+    ppr = (f'<w:pStyle w:val="{style}"/>' if style else "") + (
+        f'<w:jc w:val="{_ALIGN[align]}"/>' if align else "")
+    ppr = f"<w:pPr>{ppr}</w:pPr>" if ppr else ""
+    return f"<w:p>{ppr}{run_xml(text, **run) if text else ''}</w:p>"
+
+
+def table_xml(header, rows, width, style=None):
+    cols = len(header)
+    col_w = width // max(1, cols)
+    cell = f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{col_w}"/></w:tcPr>'
+
+    def row(values):
+        return "<w:tr>" + "".join(
+            f"{cell}<w:p>{run_xml(v) if v not in (None, '') else ''}</w:p></w:tc>" for v in values
+        ) + "</w:tr>"
+
+    style = f'<w:tblStyle w:val="{style}"/>' if style else ""
+    return "".join((
+        f'<w:tbl><w:tblPr>{style}<w:tblW w:type="auto" w:w="0"/>'
+        '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+        'w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>',
+        "<w:tblGrid>" + f'<w:gridCol w:w="{col_w}"/>' * cols + "</w:tblGrid>",
+        row(header),
+        "".join(row(r) for r in rows),
+        "</w:tbl>",
+    ))
+
+
+# ---------- documento ----------
+class DocxWriter:
+    def __init__(self, template=None):
+        self.template = get_template(template)
+        self.parts = []
+
+    def heading(self, text, level=1, align=None):
+        self.parts.append(paragraph_xml(text, "Title" if level == 0 else f"Heading{level}", align))
+
+    def paragraph(self, text="", bold=False, italic=False, size=None, align=None):
+        self.parts.append(paragraph_xml(text, align=align, bold=bold, italic=italic, size=size))
+
+    def paragraphs(self, texts):
+        """Vários parágrafos simples de uma vez (ex.: uma seção com milhares de linhas)."""
+        self.parts.append("".join(paragraph_xml(t) for t in texts))
+
+    def table(self, header, rows, style=None):
+        self.parts.append(table_xml(header, rows, self.template.width, style))
+
+    def save(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        shutil.copyfile(self.template.shell, tmp)
+        info = zipfile.ZipInfo(DOCUMENT_PART, datetime.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with zipfile.ZipFile(tmp, "a") as package, package.open(info, "w") as f:
+            f.write(self.template.head.encode("utf-8"))
+            for part in self.parts:
+                f.write(part.encode("utf-8"))
+            f.write(self.template.tail.encode("utf-8"))
+        os.replace(tmp, path)
+        return path
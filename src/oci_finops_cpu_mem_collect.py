@@ -1,12 +1,13 @@
 import os
 import csv
-import time
+import argparse
 from datetime import datetime, timedelta, timezone
 
-import oci
-from oci.monitoring.models import SummarizeMetricsDataDetails
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill
+from oci_inventory import RUNNING_INSTANCES_QUERY, candidate_compartments
+from oci_ratelimit import call, limited
+from oci_session import make_client
+from oci_tenancy import get_compartments, get_regions, mark_denied
+from oci_xlsx import GREEN, RED, YELLOW, equals, otherwise, write_xlsx
 
 # ================= CONFIG =================
 DAYS = int(os.getenv("METRICS_DAYS", "30"))
@@ -22,21 +23,11 @@ CSV_PATH = os.path.join(HOME, f"Relatorio_FinOps_CPU_MEM_{DAYS}d.csv")
 XLSX_PATH = os.path.join(HOME, f"Relatorio_FinOps_CPU_MEM_{DAYS}d.xlsx")
 # =========================================
 
-cfg = oci.config.from_file()
-tenancy_id = cfg["tenancy"]
-identity = oci.identity.IdentityClient(cfg)
-
-
-def mean_p95(values):
-    if not values:
-        return None, None
-    values = sorted(values)
-    mean = sum(values) / len(values)
-    p95 = values[int(len(values) * 0.95) - 1]
-    return mean, p95
-
 
 def get_metric(monitoring, compartment_id, instance_id, metric, start, end):
+    from oci.monitoring.models import SummarizeMetricsDataDetails
+    from oci_stats import mean_p95
+
     query = f'{metric}[{INTERVAL}]{{resourceId = "{instance_id}"}}.mean()'
     details = SummarizeMetricsDataDetails(
         namespace="oci_computeagent",
@@ -44,7 +35,8 @@ def get_metric(monitoring, compartment_id, instance_id, metric, start, end):
         start_time=start,
         end_time=end
     )
-    resp = monitoring.summarize_metrics_data(
+    resp = call(
+        monitoring.summarize_metrics_data,
         compartment_id=compartment_id,
         summarize_metrics_data_details=details
     )
@@ -68,35 +60,29 @@ def finops_recommendation(cpu_mean, cpu_p95, mem_mean, mem_p95):
 
 
 def main():
+    import oci
+
     start = datetime.now(timezone.utc) - timedelta(days=DAYS)
     end = datetime.now(timezone.utc)
 
     rows = []
 
-    regions = [r.region_name for r in identity.list_region_subscriptions(tenancy_id).data]
-    compartments = oci.pagination.list_call_get_all_results(
-        identity.list_compartments,
-        tenancy_id,
-        compartment_id_in_subtree=True
-    ).data
-
-    root = identity.get_compartment(tenancy_id).data
-    compartments.append(root)
+    regions = get_regions()
+    compartments = get_compartments()
 
     for region in regions:
-        cfg_r = dict(cfg)
-        cfg_r["region"] = region
+        compute = make_client("compute", region)
+        monitoring = make_client("monitoring", region)
+        search = make_client("search", region)
 
-        compute = oci.core.ComputeClient(cfg_r)
-        monitoring = oci.monitoring.MonitoringClient(cfg_r)
-
-        for comp in compartments:
+        for comp in candidate_compartments(search, compartments, RUNNING_INSTANCES_QUERY):
             try:
                 instances = oci.pagination.list_call_get_all_results(
-                    compute.list_instances,
+                    limited(compute.list_instances),
                     compartment_id=comp.id
                 ).data
-            except Exception:
+            except Exception as e:
+                mark_denied("list_instances", region, comp.id, getattr(e, "status", None))
                 continue
 
             for inst in instances:
@@ -134,29 +120,15 @@ def main():
         writer.writerows(rows)
 
     # Excel
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "FinOps"
-    ws.append(headers)
-
-    fill_down = PatternFill("solid", fgColor="FFC7CE")
-    fill_keep = PatternFill("solid", fgColor="C6EFCE")
-    fill_up = PatternFill("solid", fgColor="FFEB9C")
-
-    rec_col = headers.index("finops_recommendation") + 1
-
-    for r in rows:
-        ws.append([r[h] for h in headers])
-        row = ws.max_row
-        rec = r["finops_recommendation"]
-        if rec == "DOWNSIZE-STRONG":
-            ws.cell(row=row, column=rec_col).fill = fill_down
-        elif rec == "UPSCALE":
-            ws.cell(row=row, column=rec_col).fill = fill_up
-        else:
-            ws.cell(row=row, column=rec_col).fill = fill_keep
-
-    wb.save(XLSX_PATH)
+    write_xlsx(
+        XLSX_PATH, headers, rows, "FinOps",
+        color_column="finops_recommendation",
+        rules=[
+            equals("DOWNSIZE-STRONG", RED),
+            equals("UPSCALE", YELLOW),
+            otherwise(GREEN),
+        ],
+    )
 
     print("✅ Relatórios gerados:")
     print(CSV_PATH)
@@ -164,4 +136,5 @@ def main():
 
 
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="Coleta FinOps de CPU/Memória de N dias (METRICS_DAYS) (CSV/XLSX)").parse_args()
     main()
@@ -0,0 +1,150 @@
+"""
+Pipeline FinOps completo em um único processo:
+
+    coleta -> análise -> CSV/XLSX/Parquet -> relatórios Word
+
+As linhas coletadas ficam em memória e são entregues direto aos geradores
+de Word, sem reler o CSV nem reimportar os módulos em novos interpretadores.
+
+Uso:
+    python src/oci_finops_pipeline.py --days 30
+    python src/oci_finops_pipeline.py --from-last-run --outputs technical,top5
+    python src/oci_finops_pipeline.py --resume        # depois de uma coleta interrompida
+    python src/oci_finops_pipeline.py --aggregation server   # estatísticas agregadas no Monitoring
+
+Coleta distribuída (cada host grava um parcial; um último passo junta tudo):
+    python src/oci_finops_pipeline.py --shard-index 1 --shard-count 3   # host 1..3
+    python src/oci_finops_pipeline.py --merge
+"""
+import argparse
+import os
+import time
+
+OUTPUTS = ("csv", "xlsx", "parquet", "technical", "top5", "report")
+DEFAULT_OUTPUTS = "csv,xlsx,parquet,technical,top5"
+WORD_MODULES = {
+    "technical": "oci_metrics_cpu_mem_word_technical",
+    "report": "oci_metrics_cpu_mem_word_report",
+    "top5": "oci_metrics_cpu_mem_word_top5",
+}
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Coleta + relatórios FinOps OCI em um único processo")
+    p.add_argument("--days", type=int, default=int(os.getenv("METRICS_DAYS", "30")))
+    p.add_argument("--outputs", default=DEFAULT_OUTPUTS,
+                   help=f"lista separada por vírgula entre: {','.join(OUTPUTS)}")
+    p.add_argument("--from-last-run", action="store_true",
+                   help="não coleta; reaproveita o dataset/CSV da última execução")
+    p.add_argument("--shard-index", type=int, default=int(os.getenv("METRICS_SHARD_INDEX", "1")),
+                   help="shard deste host, de 1 a --shard-count")
+    p.add_argument("--shard-count", type=int, default=int(os.getenv("METRICS_SHARD_COUNT", "1")),
+                   help="total de shards; com mais de 1, grava apenas o parcial deste shard")
+    p.add_argument("--merge", nargs="*", metavar="PARCIAL",
+                   help="não coleta; junta os parciais dos shards e gera as saídas")
+    p.add_argument("--resume", action="store_true",
+                   help="retoma a última coleta interrompida, buscando só o que falta")
+    p.add_argument("--aggregation", choices=("raw", "server"),
+                   default=os.getenv("METRICS_AGGREGATION", "raw"),
+                   help="raw: todos os pontos, estatísticas locais; server: agregadas pelo Monitoring")
+    args = p.parse_args()
+
+    if args.shard_count < 1 or not 1 <= args.shard_index <= args.shard_count:
+        p.error("--shard-index deve estar entre 1 e --shard-count")
+
+    args.outputs = [o.strip() for o in args.outputs.split(",") if o.strip()]
+    unknown = sorted(set(args.outputs) - set(OUTPUTS))
+    if unknown:
+        p.error(f"saídas desconhecidas: {', '.join(unknown)}")
+    return args
+
+
+def output_paths(collector, outputs):
+    """{saída: arquivo gravado}; os módulos Word só leem caminhos na importação."""
+    paths = {"csv": collector.CSV_PATH, "xlsx": collector.XLSX_PATH, "parquet": collector.DATASET_PATH}
+    result = {}
+    for name in outputs:
+        if name in WORD_MODULES:
+            result[name] = __import__(WORD_MODULES[name]).DOCX_PATH
+        elif not (name == "parquet" and collector.DATASET_PATH.lower() == "off"):
+            result[name] = paths[name]
+    return result
+
+
+def check_outputs(paths):
+    """Duas saídas no mesmo arquivo: a segunda sobrescreveria a primeira em silêncio."""
+    by_path = {}
+    for name, path in paths.items():
+        by_path.setdefault(os.path.realpath(path), []).append(name)
+    clashes = [(path, names) for path, names in by_path.items() if len(names) > 1]
+    if clashes:
+        for path, names in clashes:
+            print(f"❌ Saídas {', '.join(names)} gravariam o mesmo arquivo: {path}")
+        raise SystemExit(2)
+
+
+def stage(name, fn, *args):
+    t0 = time.monotonic()
+    result = fn(*args)
+    print(f"⏱  {name}: {time.monotonic() - t0:.1f}s")
+    return result
+
+
+def main():
+    args = parse_args()
+    # os módulos leem METRICS_DAYS na importação (caminhos dos arquivos)
+    os.environ["METRICS_DAYS"] = str(args.days)
+    os.environ["METRICS_AGGREGATION"] = args.aggregation
+
+    import oci_metrics_cpu_mem_media_ndays as collector
+
+    check_outputs(output_paths(collector, args.outputs))
+
+    if args.merge is not None:
+        rows = stage("merge dos shards", collector.load_partials, args.merge,
+                     args.shard_count if args.shard_count > 1 else None)
+    elif args.from_last_run:
+        rows = stage("leitura", collector.load_rows)
+    else:
+        rows = stage("coleta", collector.collect, args.shard_index - 1, args.shard_count, args.resume)
+
+    if args.merge is None and args.shard_count > 1:
+        stage("análise", collector.analyse, rows)
+        path = collector.write_partial(rows, args.shard_index - 1, args.shard_count)
+        print(f"\n✅ Parcial do shard {args.shard_index}/{args.shard_count}: {path} ({len(rows)} instâncias)")
+        return
+
+    if not rows:
+        print("Nenhuma instância encontrada.")
+        return
+
+    stage("análise", collector.analyse, rows)
+
+    written = []
+    tables = [o for o in args.outputs if o in ("csv", "xlsx", "parquet")]
+    if tables:
+        written = stage("planilhas", collector.render, rows, tables)
+
+    if "technical" in args.outputs:
+        technical = __import__(WORD_MODULES["technical"])
+        stage("Word técnico", technical.generate_report, rows)
+        written.append(("Word técnico", technical.DOCX_PATH))
+    if "report" in args.outputs:
+        report = __import__(WORD_MODULES["report"])
+        stage("Word executivo", report.generate_report, rows)
+        written.append(("Word executivo", report.DOCX_PATH))
+    if "top5" in args.outputs:
+        top5 = __import__(WORD_MODULES["top5"])
+        stage("Word TOP 5", top5.generate, rows)
+        written.append(("Word TOP 5", top5.DOCX_PATH))
+
+    if args.merge is not None:
+        collector.summary(rows)
+
+    print("\n✅ Pipeline concluído:")
+    for kind, path in written:
+        print(f"➡ {kind}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 import os
 import csv
+import argparse
 from datetime import datetime
-from docx import Document
-from docx.shared import Pt
+
+from oci_pricing import get_prices
 
 DAYS = int(os.getenv("METRICS_DAYS", "30"))
 HOME = os.path.expanduser("~")
@@ -10,9 +11,7 @@ HOME = os.path.expanduser("~")
 CSV_PATH = os.path.join(HOME, f"Relatorio_FinOps_CPU_MEM_{DAYS}d.csv")
 DOCX_PATH = os.path.join(HOME, f"Relatorio_FinOps_Downsizes_Strong_{DAYS}d.docx")
 
-OCPU_PRICE = 0.05
-MEM_PRICE = 0.003
-HOURS_MONTH = 730
+CURRENCY = "USD"   # preços da tabela local versionada (oci_pricing)
 
 
 def to_float(v):
@@ -22,15 +21,13 @@ def to_float(v):
         return 0.0
 
 
-def estimate_cost(ocpus, mem):
-    return (ocpus * OCPU_PRICE + mem * MEM_PRICE) * HOURS_MONTH
-
-
 def format_usd(v):
     return f"US$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 
 def main():
+    from oci_docx import DocxWriter
+
     rows = []
     with open(CSV_PATH, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -38,29 +35,34 @@ def main():
             if r["finops_recommendation"] == "DOWNSIZE-STRONG":
                 rows.append(r)
 
-    doc = Document()
-    doc.add_heading("Relatório FinOps – Oportunidades de Economia", level=0)
+    doc = DocxWriter()
+    doc.heading("Relatório FinOps – Oportunidades de Economia", level=0)
 
-    doc.add_paragraph(
+    doc.paragraph(
         f"Janela de análise: últimos {DAYS} dias\n"
-        f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-    ).italic = True
+        f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}",
+        italic=True,
+    )
 
     total = 0.0
 
-    for r in rows:
-        ocpus = to_float(r["ocpus"])
-        mem = to_float(r["memory_gb"])
-
-        new_ocpus = max(1, ocpus * 0.5)
-        new_mem = max(1, mem * 0.5)
+    ocpus_all = [to_float(r["ocpus"]) for r in rows]
+    mem_all = [to_float(r["memory_gb"]) for r in rows]
+    targets = [(max(1, o * 0.5), max(1, m * 0.5)) for o, m in zip(ocpus_all, mem_all)]
+    if rows:
+        current, target = get_prices().fleet_costs(
+            [r["shape"] for r in rows], ocpus_all, mem_all, CURRENCY,
+            [t[0] for t in targets], [t[1] for t in targets],
+        )
+        all_savings = (current - target).tolist()
+    else:
+        all_savings = []
 
-        cur = estimate_cost(ocpus, mem)
-        new = estimate_cost(new_ocpus, new_mem)
-        savings = cur - new
+    texts = []
+    for r, ocpus, mem, (new_ocpus, new_mem), savings in zip(rows, ocpus_all, mem_all, targets, all_savings):
         total += savings
 
-        doc.add_paragraph(
+        texts.append(
             f"Instância: {r['instance_name']}\n"
             f"Região: {r['region']} | Compartment: {r['compartment']}\n"
             f"OCPUs: {ocpus} → {new_ocpus:.1f}\n"
@@ -68,8 +70,10 @@ def main():
             f"Economia estimada: {format_usd(savings)}/mês\n"
         )
 
-    doc.add_heading("Resumo financeiro", level=1)
-    doc.add_paragraph(
+    doc.paragraphs(texts)
+
+    doc.heading("Resumo financeiro", level=1)
+    doc.paragraph(
         f"Economia total potencial estimada: {format_usd(total)}/mês."
     )
 
@@ -78,4 +82,5 @@ def main():
 
 
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="Relatório Word das instâncias DOWNSIZE-STRONG (METRICS_DAYS)").parse_args()
     main()
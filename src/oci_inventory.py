@@ -0,0 +1,99 @@
+from collections import defaultdict
+
+from oci_ratelimit import call, limited, region_of
+from oci_tenancy import accessible, mark_denied
+
+RUNNING_INSTANCES_QUERY = "query instance resources where lifeCycleState = 'RUNNING'"
+ALL_INSTANCES_QUERY = "query instance resources"
+SEARCH_PAGE_LIMIT = 1000
+
+
+# ---------- helpers ----------
+def search_resources(search, query):
+    """
+    Executa uma consulta estruturada do Resource Search (paginada).
+    Uma única consulta cobre todos os compartments da região.
+    """
+    from oci.resource_search.models import StructuredSearchDetails
+
+    details = StructuredSearchDetails(
+        query=query,
+        type="Structured",
+        matching_context_type="NONE",
+    )
+    items = []
+    page = None
+    while True:
+        resp = call(search.search_resources, details, limit=SEARCH_PAGE_LIMIT, page=page)
+        items.extend(resp.data.items or [])
+        if not resp.has_next_page:
+            return items
+        page = resp.next_page
+
+
+def instance_ids_by_compartment(search, query=RUNNING_INSTANCES_QUERY):
+    by_comp = defaultdict(set)
+    for item in search_resources(search, query):
+        by_comp[item.compartment_id].add(item.identifier)
+    return by_comp
+
+
+def list_running(compute, compartment_id):
+    import oci
+
+    instances = oci.pagination.list_call_get_all_results(
+        limited(compute.list_instances),
+        compartment_id=compartment_id
+    ).data
+    return [i for i in instances if i.lifecycle_state == "RUNNING"]
+
+
+def with_shape_config(compute, inst):
+    """
+    O list_instances já traz shape_config (ocpus, memória e baseline).
+    get_instance só é chamado quando o campo não veio na listagem.
+    """
+    if getattr(inst, "shape_config", None) is not None:
+        return inst
+    return call(compute.get_instance, inst.id).data
+
+
+# ---------- pré-filtro ----------
+def candidate_compartments(search, compartments, query=RUNNING_INSTANCES_QUERY):
+    """
+    Compartments da região que têm ao menos uma instância (1 consulta ao
+    Resource Search por região), na ordem de `compartments`.
+
+    Se a busca falhar (ex.: sem permissão), devolve todos, exceto os que já
+    negaram acesso ao list_instances (cache em oci_tenancy).
+    """
+    import oci
+
+    try:
+        by_comp = instance_ids_by_compartment(search, query)
+    except oci.exceptions.ServiceError:
+        return accessible("list_instances", region_of(search), compartments)
+    return [c for c in compartments if c.id in by_comp]
+
+
+# ---------- inventário ----------
+def running_instances(compute, search, compartments):
+    """
+    Inventário de instâncias RUNNING de uma região.
+
+    Retorna [(compartment, [Instance, ...])] na ordem de `compartments`,
+    listando apenas os compartments indicados por candidate_compartments.
+    """
+    import oci
+
+    region = region_of(compute)
+    result = []
+    for comp in candidate_compartments(search, compartments):
+        try:
+            running = list_running(compute, comp.id)
+        except oci.exceptions.ServiceError as e:
+            mark_denied("list_instances", region, comp.id, e.status)
+            continue
+        if running:
+            result.append((comp, running))
+    return result
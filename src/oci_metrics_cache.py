@@ -0,0 +1,234 @@
+"""
+Cache local (SQLite) de datapoints do OCI Monitoring.
+
+Cada série (region, resource_id, metric, interval) tem um id inteiro e uma
+marca d'água (último timestamp armazenado), de forma que a próxima execução
+só busca o delta desde essa marca. Os pontos ficam em um blob comprimido por
+série e dia (timestamps em delta + valores float64, numpy), e não uma linha
+por datapoint com a chave em texto repetida.
+"""
+import os
+import sqlite3
+import struct
+import threading
+import zlib
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".oci_finops", "metrics_cache.sqlite")
+
+DAY = 86400
+SCHEMA_VERSION = 2
+# limite de parâmetros por consulta (SQLite antigo aceita 999)
+BATCH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id          INTEGER PRIMARY KEY,
+    region      TEXT NOT NULL,
+    resource_id TEXT NOT NULL,
+    metric      TEXT NOT NULL,
+    interval    TEXT NOT NULL,
+    watermark   INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (region, metric, interval, resource_id)
+);
+
+CREATE TABLE IF NOT EXISTS chunks (
+    series_id   INTEGER NOT NULL,
+    day         INTEGER NOT NULL,
+    data        BLOB NOT NULL,
+    PRIMARY KEY (series_id, day)
+) WITHOUT ROWID;
+"""
+
+_COUNT = struct.Struct("<I")
+
+
+# ---------- blobs ----------
+def encode(ts, values):
+    """
+    Pontos ordenados de um dia -> blob: contagem, deltas de ts (int64) e os
+    bytes dos valores float64 transpostos (expoentes juntos comprimem melhor).
+    """
+    import numpy as np
+
+    deltas = np.diff(np.asarray(ts, dtype="<i8"), prepend=0)
+    shuffled = np.ascontiguousarray(values, dtype="<f8").view(np.uint8).reshape(-1, 8).T
+    return zlib.compress(_COUNT.pack(len(deltas)) + deltas.tobytes() + shuffled.tobytes(), 1)
+
+
+def decode(data):
+    """Blob -> (ts, valores) como arrays numpy."""
+    import numpy as np
+
+    raw = zlib.decompress(data)
+    (n,) = _COUNT.unpack_from(raw)
+    ts = np.cumsum(np.frombuffer(raw, dtype="<i8", count=n, offset=_COUNT.size))
+    shuffled = np.frombuffer(raw, dtype=np.uint8, count=8 * n, offset=_COUNT.size + 8 * n)
+    values = np.ascontiguousarray(shuffled.reshape(8, n).T).view("<f8").ravel()
+    return ts, values
+
+
+def by_day(points):
+    """[(ts, value)] -> {dia: (ts, valores)} ordenados, sem timestamps repetidos."""
+    import numpy as np
+
+    data = np.array(points, dtype=float).reshape(-1, 2)
+    ts = data[:, 0].astype(np.int64)
+    order = np.argsort(ts, kind="stable")
+    ts, values = ts[order], data[order, 1]
+    # timestamp repetido: vale o último recebido
+    keep = np.append(ts[1:] != ts[:-1], True)
+    ts, values = ts[keep], values[keep]
+    days = ts // DAY
+    cuts = np.flatnonzero(np.diff(days)) + 1
+    return {int(d[0]): (t, v) for d, t, v in zip(np.split(days, cuts), np.split(ts, cuts), np.split(values, cuts))}
+
+
+def batches(values):
+    values = list(values)
+    return [values[i:i + BATCH] for i in range(0, len(values), BATCH)]
+
+
+class MetricsCache:
+    def __init__(self, path=DEFAULT_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = self._connect()
+        self._ids = {}                      # (region, metric, interval, resource_id) -> id
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=60)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        old = conn.execute("SELECT 1 FROM sqlite_master WHERE name='datapoints'").fetchone()
+        if old and version < SCHEMA_VERSION:
+            # formato antigo (uma linha por datapoint): descartado, a próxima coleta refaz
+            conn.close()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+            print(f"♻️  Cache de métricas no formato antigo descartado: {self.path}")
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=60)
+        # páginas de 16 KB acomodam vários blobs diários (só vale para arquivo novo)
+        conn.execute("PRAGMA page_size=16384")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return conn
+
+    def _series_ids(self, region, metric, interval, resource_ids, create=False):
+        """{resource_id: id} das séries conhecidas (criadas com `create`). Chamar com o lock."""
+        ids, missing = {}, []
+        for rid in resource_ids:
+            sid = self._ids.get((region, metric, interval, rid))
+            if sid is None:
+                missing.append(rid)
+            else:
+                ids[rid] = sid
+        if missing and create:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO series (region, resource_id, metric, interval) VALUES (?, ?, ?, ?)",
+                [(region, rid, metric, interval) for rid in missing],
+            )
+        for batch in batches(missing):
+            marks = ",".join("?" * len(batch))
+            for rid, sid in self.conn.execute(
+                f"SELECT resource_id, id FROM series WHERE region=? AND metric=? AND interval=? "
+                f"AND resource_id IN ({marks})",
+                (region, metric, interval, *batch),
+            ):
+                self._ids[(region, metric, interval, rid)] = ids[rid] = sid
+        return ids
+
+    def watermarks(self, region, resource_ids, metric, interval):
+        """Retorna {resource_id: último ts armazenado} (epoch em segundos)."""
+        result = {}
+        with self.lock:
+            for batch in batches(resource_ids):
+                marks = ",".join("?" * len(batch))
+                for rid, sid, ts in self.conn.execute(
+                    f"SELECT resource_id, id, watermark FROM series WHERE region=? AND metric=? AND interval=? "
+                    f"AND resource_id IN ({marks}) AND watermark > 0",
+                    (region, metric, interval, *batch),
+                ):
+                    self._ids[(region, metric, interval, rid)] = sid
+                    result[rid] = ts
+        return result
+
+    def store(self, region, metric, interval, series):
+        """Grava {resource_id: [(ts, value), ...]} e avança as marcas d'água."""
+        series = {rid: by_day(points) for rid, points in series.items() if points}
+        if not series:
+            return
+        with self.lock:
+            known = set(self._series_ids(region, metric, interval, series))
+            ids = self._series_ids(region, metric, interval, series, create=True)
+            # dias já gravados (borda do delta) são mesclados com os pontos novos
+            stored = {}
+            for rid in known:
+                days = series[rid]
+                stored[rid] = self.conn.execute(
+                    "SELECT day, data FROM chunks WHERE series_id=? AND day BETWEEN ? AND ?",
+                    (ids[rid], min(days), max(days)),
+                ).fetchall()
+
+        chunks, marks = [], []
+        for rid, days in series.items():
+            for day, data in stored.get(rid, ()):
+                if day in days:
+                    old = dict(zip(*(a.tolist() for a in decode(data))))
+                    old.update(zip(*(a.tolist() for a in days[day])))
+                    days[day] = by_day(sorted(old.items()))[day]
+            for day, (ts, values) in days.items():
+                chunks.append((ids[rid], day, encode(ts, values)))
+            marks.append((int(days[max(days)][0][-1]), ids[rid]))
+
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)", chunks)
+            self.conn.executemany("UPDATE series SET watermark = MAX(watermark, ?) WHERE id=?", marks)
+
+    def load(self, region, resource_ids, metric, interval, since):
+        """{resource_id: [(ts, value), ...]} com ts >= since, em uma consulta por lote de séries."""
+        result = {rid: [] for rid in resource_ids}
+        rows = []
+        with self.lock:
+            ids = self._series_ids(region, metric, interval, resource_ids)
+            names = {sid: rid for rid, sid in ids.items()}
+            for batch in batches(names):
+                marks = ",".join("?" * len(batch))
+                rows.extend(self.conn.execute(
+                    f"SELECT series_id, data FROM chunks WHERE series_id IN ({marks}) AND day >= ? "
+                    "ORDER BY series_id, day",
+                    (*batch, since // DAY),
+                ))
+        for sid, data in rows:
+            ts, values = decode(data)
+            if len(ts) and ts[0] < since:
+                keep = ts >= since
+                ts, values = ts[keep], values[keep]
+            result[names[sid]].extend(zip(ts.tolist(), values.tolist()))
+        return result
+
+    def series(self, region, resource_id, metric, interval, since):
+        return self.load(region, [resource_id], metric, interval, since)[resource_id]
+
+    def expire(self, before):
+        """Remove os dias inteiramente anteriores a `before` (epoch em segundos) e as séries paradas."""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM chunks WHERE day < ?", (before // DAY,))
+            self.conn.execute(
+                "DELETE FROM chunks WHERE series_id IN (SELECT id FROM series WHERE watermark < ?)", (before,)
+            )
+            self.conn.execute("DELETE FROM series WHERE watermark < ?", (before,))
+            self._ids.clear()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def open_cache(path):
+    """`path` vazio ou "off" desativa o cache."""
+    if not path or path.lower() in ("off", "0", "no", "false"):
+        return None
+    return MetricsCache(os.path.expanduser(path))
@@ -1,16 +1,27 @@
 import os
-import time
 import csv
+import glob
+import json
+import zlib
+import argparse
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
-import oci
-from oci.monitoring.models import SummarizeMetricsDataDetails
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill
+from oci_checkpoint import open_journal, run_deferred
+from oci_inventory import running_instances, with_shape_config
+from oci_metrics_cache import DEFAULT_PATH as CACHE_DEFAULT_PATH, open_cache
+from oci_pool import run_ordered
+from oci_ratelimit import call
+from oci_session import make_client
+from oci_tenancy import get_compartments, get_regions
+from oci_xlsx import GREEN, RED, YELLOW, equals, otherwise, starts_with, to_number, write_xlsx
+from oci_sketch import DEFAULT_PATH as SKETCH_DEFAULT_PATH, open_store
 
 # ================= CONFIGURAÇÕES =================
 DAYS = int(os.getenv("METRICS_DAYS", "30"))
-INTERVAL = "5m"
+INTERVAL = os.getenv("METRICS_INTERVAL", "5m")
 
 CPU_LOW = 5
 CPU_MED = 15
@@ -19,65 +30,244 @@ CPU_HIGH = 80
 MEM_LOW = 40
 MEM_HIGH = 85
 
-MAX_RETRIES = 3
-RETRY_SLEEP = 3
+# "compartment": 1 consulta por métrica/compartment (demultiplexada por resourceId)
+# "instance": 1 consulta por métrica/instância (modo antigo)
+QUERY_MODE = os.getenv("METRICS_QUERY_MODE", "compartment")
+# limite de datapoints por resposta do summarize_metrics_data
+MAX_DATAPOINTS = int(os.getenv("METRICS_MAX_DATAPOINTS", "100000"))
+# limite de OCIDs por consulta agrupada (tamanho do texto MQL)
+GROUP_SIZE = int(os.getenv("METRICS_GROUP_SIZE", "100"))
+
+# "raw": todos os pontos de INTERVAL e estatísticas no cliente
+# "server": o Monitoring agrega em janelas de SERVER_INTERVAL (mean, max,
+# percentile) e cada série volta com poucos pontos; uma amostra
+# (ACCURACY_SAMPLE) é buscada também no modo bruto para medir o erro
+AGGREGATION = os.getenv("METRICS_AGGREGATION", "raw")
+SERVER_INTERVAL = os.getenv("METRICS_SERVER_INTERVAL", "1d")
+ACCURACY_SAMPLE = float(os.getenv("METRICS_ACCURACY_SAMPLE", "0.02"))
+SERVER_STATISTICS = (("mean", "mean()"), ("max", "max()"), ("p95", "percentile(0.95)"), ("p99", "percentile(0.99)"))
+# maior janela aceita por consulta para cada resolução; janelas maiores são fatiadas
+MAX_WINDOW_DAYS = {"1m": 7, "5m": 30, "1h": 90, "1d": 90}
+# fatias de tempo buscadas em paralelo por tarefa
+CHUNK_WORKERS = int(os.getenv("METRICS_CHUNK_WORKERS", "4"))
+
+# Cache local de datapoints ("off" desativa); só o delta desde a última execução é buscado
+CACHE_PATH = os.getenv("METRICS_CACHE", CACHE_DEFAULT_PATH)
+CACHE_RETENTION_DAYS = max(DAYS, int(os.getenv("METRICS_CACHE_RETENTION_DAYS", str(DAYS))))
+
+# Sketches diários mescláveis (p95/p99/max de qualquer janela via src/oci_sketch.py)
+SKETCHES_PATH = os.getenv("METRICS_SKETCHES", SKETCH_DEFAULT_PATH)
+
+# Paralelismo da coleta (limite global e por região)
+WORKERS = int(os.getenv("METRICS_WORKERS", "16"))
+WORKERS_PER_REGION = int(os.getenv("METRICS_WORKERS_PER_REGION", "8"))
 
 homedir = os.path.expanduser("~")
 CSV_PATH = os.path.join(homedir, f"Relatorio_CPU_Memoria_media_{DAYS}d_multi_region.csv")
 XLSX_PATH = os.path.join(homedir, f"Relatorio_CPU_Memoria_media_{DAYS}d_multi_region.xlsx")
+# Dataset Parquet tipado ao lado do CSV ("off" desativa); datapoints brutos são opcionais
+DATASET_PATH = os.getenv("METRICS_DATASET", os.path.splitext(CSV_PATH)[0] + ".parquet")
+DATASET_RAW = os.getenv("METRICS_DATASET_RAW", "0").lower() in ("1", "yes", "true")
+
+# Coleta particionada entre vários hosts: cada shard cobre parte dos pares
+# (região, compartment) e grava um arquivo parcial; --merge junta os parciais
+SHARD_INDEX = int(os.getenv("METRICS_SHARD_INDEX", "1")) - 1   # 1..SHARD_COUNT
+SHARD_COUNT = int(os.getenv("METRICS_SHARD_COUNT", "1"))
+SHARD_DIR = os.path.expanduser(os.getenv("METRICS_SHARD_DIR", homedir))
+# identifica a execução nos parciais; o merge só junta parciais da mesma
+# execução (padrão: data UTC do fim da janela de coleta)
+RUN_ID = os.getenv("METRICS_RUN_ID", "")
+SORT_KEY = ("region", "compartment", "instance_name")
+
+# Journal append-only das instâncias concluídas ("off" desativa); --resume
+# retoma uma coleta interrompida buscando só o que faltou
+JOURNAL_PATH = os.getenv("METRICS_JOURNAL", os.path.splitext(CSV_PATH)[0] + ".journal.jsonl")
+
+# Perfil semanal (dia da semana x hora) de CPU/memória para agendas de
+# start/stop, montado dos mesmos datapoints ("off" desativa; ver oci_schedule)
+PROFILES_PATH = os.getenv("METRICS_PROFILES", os.path.splitext(CSV_PATH)[0] + ".profiles.npz")
 # ================================================
 
-cfg = oci.config.from_file()
-tenancy_id = cfg["tenancy"]
-identity = oci.identity.IdentityClient(cfg)
+# clientes por thread/região (evita compartilhar sessão HTTP entre threads)
+_local = threading.local()
+_cache = None
+_sketches = None
+_raw_batches = None
+_journal = None
+_profiles = None
+_window = None
+_payload = Counter()
+_accuracy = []
+_payload_lock = threading.Lock()
+_chunk_pool = None
+_chunk_pool_lock = threading.Lock()
 
 # ---------- helpers ----------
-def get_regions():
-    return [r.region_name for r in identity.list_region_subscriptions(tenancy_id).data]
-
-def get_compartments():
-    comps = oci.pagination.list_call_get_all_results(
-        identity.list_compartments,
-        tenancy_id,
-        compartment_id_in_subtree=True
-    ).data
-    root = identity.get_compartment(tenancy_id).data
-    return [c for c in comps if c.lifecycle_state == "ACTIVE"] + [root]
-
-def mean_p95(values):
-    if not values:
-        return None, None
-    values = sorted(values)
-    mean = sum(values) / len(values)
-    p95 = values[int(len(values) * 0.95) - 1]
-    return mean, p95
+def region_clients(region):
+    clients = getattr(_local, "clients", None)
+    if clients is None:
+        clients = _local.clients = {}
+    if region not in clients:
+        clients[region] = (
+            make_client("compute", region),
+            make_client("monitoring", region),
+        )
+    return clients[region]
+
+def chunk_pool():
+    """Pool das fatias de tempo, criado no primeiro uso (não na importação)."""
+    global _chunk_pool
+    with _chunk_pool_lock:
+        if _chunk_pool is None:
+            _chunk_pool = ThreadPoolExecutor(max_workers=max(1, CHUNK_WORKERS))
+        return _chunk_pool
 
 def summarize_with_retry(monitoring, compartment_id, details):
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            return monitoring.summarize_metrics_data(
-                compartment_id=compartment_id,
-                summarize_metrics_data_details=details
-            )
-        except oci.exceptions.ServiceError as e:
-            if e.status == 429 and attempt < MAX_RETRIES:
-                time.sleep(RETRY_SLEEP)
-                continue
-            raise
-
-def get_metric(monitoring, compartment_id, instance_id, metric, start, end):
-    query = f'{metric}[{INTERVAL}]{{resourceId = "{instance_id}"}}.mean()'
+    # limitador compartilhado por (região, API) com backoff e jitter
+    return call(
+        monitoring.summarize_metrics_data,
+        compartment_id=compartment_id,
+        summarize_metrics_data_details=details
+    )
+
+def interval_seconds(interval):
+    units = {"m": 60, "h": 3600, "d": 86400}
+    return int(interval[:-1]) * units[interval[-1]]
+
+def to_points(aggregated_datapoints):
+    return [
+        (int(d.timestamp.timestamp()), d.value)
+        for d in aggregated_datapoints or []
+        if d.value is not None
+    ]
+
+def query_series(region, compartment_id, instance_ids, metric, start, end,
+                 interval=INTERVAL, statistic="mean()", resolution=None):
+    """
+    Uma chamada ao summarize_metrics_data para um grupo de instâncias e uma
+    fatia de tempo. Retorna {instance_id: [(ts, value), ...]}.
+    """
+    from oci.monitoring.models import SummarizeMetricsDataDetails
+
+    _compute, monitoring = region_clients(region)
+    if QUERY_MODE == "instance":
+        query = f'{metric}[{interval}]{{resourceId = "{instance_ids[0]}"}}.{statistic}'
+    else:
+        ids = "|".join(instance_ids)
+        query = f'{metric}[{interval}]{{resourceId =~ "{ids}"}}.groupBy(resourceId).{statistic}'
     details = SummarizeMetricsDataDetails(
         namespace="oci_computeagent",
         query=query,
         start_time=start,
         end_time=end,
     )
+    if resolution:
+        # um ponto por janela agregada (o padrão do serviço é 1 ponto/minuto)
+        details.resolution = resolution
     resp = summarize_with_retry(monitoring, compartment_id, details)
-    if not resp.data or not resp.data[0].aggregated_datapoints:
-        return None, None
-    values = [d.value for d in resp.data[0].aggregated_datapoints if d.value is not None]
-    return mean_p95(values)
+
+    if QUERY_MODE == "instance":
+        if not resp.data:
+            return {}
+        return {instance_ids[0]: to_points(resp.data[0].aggregated_datapoints)}
+
+    wanted = set(instance_ids)
+    results = {}
+    for series in resp.data or []:
+        resource_id = (series.dimensions or {}).get("resourceId")
+        if resource_id in wanted:
+            results[resource_id] = to_points(series.aggregated_datapoints)
+    return results
+
+def max_chunk(n_series, interval=INTERVAL):
+    """Maior fatia de tempo legal para uma consulta com `n_series` séries."""
+    step = interval_seconds(interval)
+    by_points = max(1, MAX_DATAPOINTS // max(1, n_series) - 1) * step
+    by_window = MAX_WINDOW_DAYS.get(interval, 90) * 86400
+    return timedelta(seconds=min(by_points, by_window))
+
+def time_chunks(start, end, n_series, interval=INTERVAL):
+    size = max_chunk(n_series, interval)
+    chunks = []
+    cursor = start
+    while cursor < end:
+        chunk_end = min(end, cursor + size)
+        chunks.append((cursor, chunk_end))
+        cursor = chunk_end
+    return chunks or [(start, end)]
+
+def split_by_datapoints(instance_ids, start, end, interval=INTERVAL):
+    """
+    Divide a lista de instâncias em grupos cuja resposta estimada
+    (séries x pontos por série) cabe no limite de datapoints do serviço.
+    Janelas maiores que a fatia legal contam só uma fatia (ver time_chunks).
+    Grupos também são limitados a GROUP_SIZE OCIDs (tamanho da consulta MQL).
+    """
+    if QUERY_MODE == "instance":
+        return [[i] for i in instance_ids]
+    span = min(end - start, max_chunk(1, interval))
+    points_per_series = max(1, int(span.total_seconds() // interval_seconds(interval)) + 1)
+    size = max(1, min(GROUP_SIZE, MAX_DATAPOINTS // points_per_series))
+    return [instance_ids[i:i + size] for i in range(0, len(instance_ids), size)]
+
+def fetch(region, compartment_id, instance_ids, metric, start, end,
+          interval=INTERVAL, statistic="mean()", resolution=None):
+    """
+    Busca a janela [start, end] fatiada em grupos de instâncias e em fatias
+    de tempo legais, com as fatias em paralelo. Os pontos são unidos e
+    deduplicados por timestamp.
+    """
+    parts = [
+        (group, c_start, c_end)
+        for group in split_by_datapoints(instance_ids, start, end, interval)
+        for c_start, c_end in time_chunks(start, end, len(group), interval)
+    ]
+    if len(parts) == 1:
+        group, c_start, c_end = parts[0]
+        results = [query_series(region, compartment_id, group, metric, c_start, c_end,
+                                interval, statistic, resolution)]
+    else:
+        pool = chunk_pool()
+        futures = [
+            pool.submit(query_series, region, compartment_id, group, metric, c_start, c_end,
+                        interval, statistic, resolution)
+            for group, c_start, c_end in parts
+        ]
+        results = [f.result() for f in futures]
+
+    merged = defaultdict(dict)
+    for partial in results:
+        for resource_id, points in partial.items():
+            merged[resource_id].update(points)
+    return {rid: sorted(points.items()) for rid, points in merged.items()}
+
+def load_series(region, compartment_id, instance_ids, metric, start, end):
+    """
+    Retorna {instance_id: [(ts, value), ...]} da janela inteira.
+    Com cache ativo, busca na API só o delta desde a marca d'água de cada série.
+    """
+    if _cache is None:
+        return fetch(region, compartment_id, instance_ids, metric, start, end)
+
+    start_ts = int(start.timestamp())
+    marks = _cache.watermarks(region, instance_ids, metric, INTERVAL)
+    known = [i for i in instance_ids if marks.get(i, 0) >= start_ts]
+    fresh = [i for i in instance_ids if i not in marks or marks[i] < start_ts]
+
+    fetched = {}
+    if fresh:
+        fetched.update(fetch(region, compartment_id, fresh, metric, start, end))
+    if known:
+        # a marca d'água é buscada de novo: o último ponto pode estar incompleto
+        since = datetime.fromtimestamp(min(marks[i] for i in known), timezone.utc)
+        fetched.update(fetch(region, compartment_id, known, metric, since, end))
+    _cache.store(region, metric, INTERVAL, fetched)
+
+    # séries novas já vieram inteiras da API; só as conhecidas são lidas do cache
+    result = {i: fetched.get(i, []) for i in fresh}
+    if known:
+        result.update(_cache.load(region, known, metric, INTERVAL, start_ts))
+    return result
 
 def parse_baseline(instance):
     """
@@ -115,111 +305,551 @@ def finops(cpu_mean, cpu_p95, mem_mean, mem_p95):
         return "UPSCALE"
     return "KEEP"
 
-# ---------- main ----------
-def main():
-    regions = get_regions()
-    compartments = get_compartments()
+def raw_stats(region, compartment_id, ids, start, end):
+    """Todos os pontos de INTERVAL; estatísticas calculadas aqui."""
+    from oci_stats import as_python, fleet_stats
+
+    cpu = load_series(region, compartment_id, ids, "CpuUtilization", start, end)
+    mem = load_series(region, compartment_id, ids, "MemoryUtilization", start, end)
+
+    if _sketches is not None:
+        start_ts, end_ts = int(start.timestamp()), int(end.timestamp())
+        for metric, series in (("CpuUtilization", cpu), ("MemoryUtilization", mem)):
+            for i, points in series.items():
+                _sketches.update_from_points(region, i, metric, INTERVAL, points, start_ts, end_ts)
+
+    if _profiles is not None:
+        _profiles.add("cpu", ids, cpu)
+        _profiles.add("mem", ids, mem)
+
+    if _raw_batches is not None:
+        from oci_dataset import datapoints_batch
+        _raw_batches.append(datapoints_batch(region, "CpuUtilization", cpu))
+        _raw_batches.append(datapoints_batch(region, "MemoryUtilization", mem))
+
+    # estatísticas do lote inteiro em uma passada vetorizada
+    expected = int((end - start).total_seconds() // interval_seconds(INTERVAL))
+    result = {i: {} for i in ids}
+    for prefix, series in (("cpu", cpu), ("mem", mem)):
+        values = [[v for _ts, v in series.get(i, [])] for i in ids]
+        stats = fleet_stats(values, expected)
+        for pos, i in enumerate(ids):
+            result[i].update({
+                f"{prefix}_{name}": as_python(stats[name][pos])
+                for name in ("mean", "p95", "p99", "max", "coverage")
+            })
+        with _payload_lock:
+            _payload["raw"] += sum(len(v) for v in values)
+    return result
+
+def server_stats(region, compartment_id, ids, start, end):
+    """
+    Estatísticas agregadas pelo Monitoring em janelas de SERVER_INTERVAL.
+    Cada estatística é uma consulta; o resultado da janela inteira sai das
+    janelas: média das médias, máximo dos máximos e percentil (nearest-rank)
+    dos percentis de cada janela.
+    """
+    from oci_stats import as_python, fleet_stats
+
+    expected = max(1, int((end - start).total_seconds() // interval_seconds(SERVER_INTERVAL)))
+    result = {i: {} for i in ids}
+    for prefix, metric in (("cpu", "CpuUtilization"), ("mem", "MemoryUtilization")):
+        for name, statistic in SERVER_STATISTICS:
+            # resolução sempre explícita: mesmo com SERVER_INTERVAL == INTERVAL o
+            # serviço voltaria a 1 ponto/minuto
+            series = fetch(region, compartment_id, ids, metric, start, end,
+                           SERVER_INTERVAL, statistic, resolution=SERVER_INTERVAL)
+            values = [[v for _ts, v in series.get(i, [])] for i in ids]
+            stats = fleet_stats(values, expected)
+            for pos, i in enumerate(ids):
+                result[i][f"{prefix}_{name}"] = as_python(stats[name][pos])
+                if name == "mean":
+                    result[i][f"{prefix}_coverage"] = as_python(stats["coverage"][pos])
+            with _payload_lock:
+                _payload["server"] += sum(len(v) for v in values)
+    return result
+
+def in_accuracy_sample(instance_id):
+    return zlib.crc32(instance_id.encode()) % 10000 < ACCURACY_SAMPLE * 10000
+
+def collect_metrics(region, comp, instances, start, end):
+    ids = [i.id for i in instances]
+    if AGGREGATION != "server":
+        return raw_stats(region, comp.id, ids, start, end)
+
+    result = server_stats(region, comp.id, ids, start, end)
+    sample = [i for i in ids if in_accuracy_sample(i)]
+    if sample:
+        raw = raw_stats(region, comp.id, sample, start, end)
+        with _payload_lock:
+            _accuracy.extend((raw[i], result[i]) for i in sample)
+    return result
+
+def accuracy_report(instances, start, end):
+    """Erro do modo servidor em relação ao bruto na amostra + redução de payload."""
+    raw_points = _payload["raw"]
+    per_series = int((end - start).total_seconds() // interval_seconds(INTERVAL))
+    estimated_raw = instances * 2 * per_series
+    print(f"\n📦 Modo servidor ([{SERVER_INTERVAL}], {len(SERVER_STATISTICS)} estatísticas): "
+          f"{_payload['server']} pontos; o modo bruto ([{INTERVAL}]) traria ~{estimated_raw}"
+          + (f" ({estimated_raw / _payload['server']:.0f}x mais)" if _payload["server"] else ""))
+    if not _accuracy:
+        print("   Sem amostra para medir a precisão (METRICS_ACCURACY_SAMPLE).")
+        return
+    print(f"\n🎯 Precisão na amostra ({len(_accuracy)} instâncias, {raw_points} pontos brutos), "
+          "diferença servidor - bruto em pontos percentuais:")
+    print(f"   {'estatística':14} {'média':>8} {'|média|':>8} {'máx |dif|':>10}")
+    for prefix in ("cpu", "mem"):
+        for name in ("mean", "p95", "p99", "max"):
+            key = f"{prefix}_{name}"
+            diffs = [s[key] - r[key] for r, s in _accuracy if r[key] is not None and s[key] is not None]
+            if diffs:
+                print(f"   {key:14} {sum(diffs) / len(diffs):8.2f} "
+                      f"{sum(abs(d) for d in diffs) / len(diffs):8.2f} {max(abs(d) for d in diffs):10.2f}")
+    same = sum(
+        finops(r["cpu_mean"], r["cpu_p95"], r["mem_mean"], r["mem_p95"])
+        == finops(s["cpu_mean"], s["cpu_p95"], s["mem_mean"], s["mem_p95"])
+        for r, s in _accuracy
+    )
+    print(f"   Recomendação FinOps igual em {same}/{len(_accuracy)} ({same / len(_accuracy):.0%}) instâncias")
+
+def get_instance_full(region, inst):
+    compute, _monitoring = region_clients(region)
+    return with_shape_config(compute, inst)
+
+def build_row(region, comp, inst, inst_full, stats):
+    coverage = min(stats["cpu_coverage"], stats["mem_coverage"])
+    burst, baseline, baseline_raw = parse_baseline(inst_full)
+
+    return {
+        "region": region,
+        "compartment": comp.name,
+        "instance_name": inst.display_name,
+        "instance_ocid": inst.id,
+        "shape": inst.shape,
+        "ocpus": getattr(inst.shape_config, "ocpus", None),
+        "memory_gb": getattr(inst.shape_config, "memory_in_gbs", None),
+        "burstable_enabled": burst,
+        "baseline_percent": baseline,
+        "baseline_raw": baseline_raw,
+        "cpu_mean_percent": stats["cpu_mean"],
+        "cpu_p95_percent": stats["cpu_p95"],
+        "mem_mean_percent": stats["mem_mean"],
+        "mem_p95_percent": stats["mem_p95"],
+        "cpu_p99_percent": stats["cpu_p99"],
+        "cpu_max_percent": stats["cpu_max"],
+        "mem_p99_percent": stats["mem_p99"],
+        "mem_max_percent": stats["mem_max"],
+        "data_coverage_percent": coverage,
+        "finops_recommendation": None,  # preenchido em analyse()
+    }
 
+def write_dataset(rows):
+    if DATASET_PATH.lower() == "off":
+        return None
+    try:
+        import oci_dataset
+    except ImportError:
+        print("⚠️ pyarrow não instalado: dataset Parquet não gerado.")
+        return None
+    oci_dataset.write_dataset(DATASET_PATH, rows, _raw_batches)
+    return DATASET_PATH
+
+def in_shard(region, compartment_id, shard_index, shard_count):
+    """Partição estável (CRC32) do par (região, compartment) entre os shards."""
+    return zlib.crc32(f"{region}|{compartment_id}".encode()) % shard_count == shard_index
+
+def shard_path(shard_index, shard_count):
+    stem = os.path.splitext(os.path.basename(CSV_PATH))[0]
+    return os.path.join(SHARD_DIR, f"{stem}.shard-{shard_index + 1:02d}-of-{shard_count:02d}.json")
+
+def run_id(end):
+    return RUN_ID or end.strftime("%Y-%m-%d")
+
+def sort_rows(rows):
+    """Ordem estável das saídas (região, compartment, instância), qualquer que seja a origem das linhas."""
+    rows.sort(key=lambda r: tuple(r.get(k) or "" for k in SORT_KEY))
+    return rows
+
+def write_partial(rows, shard_index, shard_count):
+    path = shard_path(shard_index, shard_count)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    now = datetime.now(timezone.utc)
+    start, end = _window or (now - timedelta(days=DAYS), now)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({
+            "run_id": run_id(end),
+            "shard_index": shard_index,
+            "shard_count": shard_count,
+            "days": DAYS,
+            "interval": INTERVAL,
+            "aggregation": AGGREGATION,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "created": now.isoformat(),
+            "rows": rows,
+        }, f)
+    os.replace(tmp, path)
+    return path
+
+def partial_mismatch(partial, expected):
+    """Motivo para não juntar o parcial nesta execução (None se ele pertence a ela)."""
+    for key, value in expected.items():
+        if partial.get(key) != value:
+            return f"{key} = {partial.get(key)} (esperado {value})"
+    return None
+
+def load_partials(paths=None, shard_count=None):
+    """
+    Junta os arquivos parciais dos shards de uma execução (padrão: a mais
+    recente em METRICS_SHARD_DIR, ou METRICS_RUN_ID). Parciais de outra
+    execução ou quantidade de shards são ignorados com aviso; passados
+    explicitamente, interrompem o merge. Avisa quando falta algum shard.
+    """
+    explicit = bool(paths)
+    if not paths:
+        stem = os.path.splitext(os.path.basename(CSV_PATH))[0]
+        paths = sorted(glob.glob(os.path.join(SHARD_DIR, f"{stem}.shard-*-of-*.json")))
+
+    partials = []
+    for path in paths:
+        with open(os.path.expanduser(path), encoding="utf-8") as f:
+            partials.append((path, json.load(f)))
+
+    # parciais coletados com outra janela, resolução ou modo não se misturam
+    expected = {"days": DAYS, "interval": INTERVAL, "aggregation": AGGREGATION}
+    candidates = [p for _path, p in partials if partial_mismatch(p, expected) is None]
+    if candidates:
+        latest = max(candidates, key=lambda p: p.get("created", ""))
+        expected["run_id"] = RUN_ID or latest.get("run_id")
+        expected["shard_count"] = shard_count or latest["shard_count"]
+
+    rows, seen, accepted = [], set(), []
+    for path, partial in partials:
+        reason = partial_mismatch(partial, expected)
+        if reason and explicit:
+            raise SystemExit(f"❌ {path}: {reason}")
+        if reason:
+            print(f"  ⚠️ Ignorado {path}: {reason}")
+            continue
+        accepted.append(path)
+        seen.add(partial["shard_index"])
+        rows.extend(partial["rows"])
+        print(f"  🧩 shard {partial['shard_index'] + 1}/{partial['shard_count']}: {len(partial['rows'])} instâncias ({path})")
+
+    if accepted:
+        print(f"  🏷  Execução {expected['run_id']} ({expected['shard_count']} shards)")
+        missing = sorted(set(range(expected["shard_count"])) - seen)
+        if missing:
+            print(f"⚠️ Shards ausentes: {', '.join(str(i + 1) for i in missing)}")
+        merge_profiles_shards(accepted, expected["shard_count"], sorted(seen))
+
+    return sort_rows(rows)
+
+def summary(rows):
+    print(f"\n📋 Resumo: {len(rows)} instâncias")
+    for region, n in sorted(Counter(r["region"] for r in rows).items()):
+        print(f"  🟢 {region}: {n}")
+    for rec, n in Counter(r["finops_recommendation"] for r in rows).most_common():
+        print(f"  • {rec}: {n}")
+
+# ---------- estágios ----------
+def is_off(path):
+    return path.lower() in ("off", "0", "no", "false")
+
+def sharded(path, shard_index, shard_count):
+    """Caminho próprio de cada shard (journal, perfis)."""
+    if is_off(path) or shard_count == 1:
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.shard-{shard_index + 1:02d}-of-{shard_count:02d}{ext}"
+
+def profiles_shard_path(shard_index, shard_count):
+    """Perfis do shard ficam em METRICS_SHARD_DIR, ao lado do parcial, para o --merge juntar."""
+    path = os.path.expanduser(PROFILES_PATH)
+    if shard_count == 1 or is_off(path):
+        return path
+    return os.path.join(SHARD_DIR, os.path.basename(sharded(path, shard_index, shard_count)))
+
+def merge_profiles_shards(partial_paths, shard_count, shard_indexes):
+    """Junta os perfis dos shards aceitos no merge no arquivo único lido pelos relatórios."""
+    if is_off(PROFILES_PATH):
+        return
+    dirs = sorted({os.path.dirname(os.path.abspath(os.path.expanduser(p))) for p in partial_paths})
+    found = []
+    for shard_index in shard_indexes:
+        name = os.path.basename(profiles_shard_path(shard_index, shard_count))
+        found.extend(p for p in (os.path.join(d, name) for d in dirs) if os.path.exists(p))
+    if not found:
+        return
+    from oci_schedule import merge_profiles
+
+    out = os.path.expanduser(PROFILES_PATH)
+    count = merge_profiles(found, out)
+    print(f"  🕒 Perfis semanais de {len(found)} shard(s), {count} instâncias: {out}")
+
+def inventory(region, compartments):
+    """[(região, compartment, [instâncias RUNNING])] de uma região."""
+    print(f"\n🟢 Região: {region}")
+    compute, _monitoring = region_clients(region)
+    search = make_client("search", region)
+    units = []
+    for comp, running in running_instances(compute, search, compartments):
+        print(f"  📁 {comp.name} | RUNNING: {len(running)}")
+        units.append((region, comp, running))
+    return units
+
+def collect_unit(region, comp, instances, start, end):
+    """Métricas + detalhes de um lote; as linhas prontas vão para o journal."""
+    stats = collect_metrics(region, comp, instances, start, end)
+    rows = [
+        build_row(region, comp, inst, get_instance_full(region, inst), stats[inst.id])
+        for inst in instances
+    ]
+    if _journal is not None:
+        # o perfil semanal vai junto da linha: uma coleta retomada não depende do .npz
+        profiles = _profiles.export([inst.id for inst in instances]) if _profiles is not None else None
+        _journal.append(rows, profiles)
+    return rows
+
+def collect(shard_index=SHARD_INDEX, shard_count=SHARD_COUNT, resume=False):
+    """
+    Inventário + métricas. Retorna as linhas (sem recomendação).
+    Com shard_count > 1, só os pares (região, compartment) do shard.
+    Com resume, reaproveita as instâncias já gravadas no journal.
+    """
+    global _cache, _sketches, _raw_batches, _journal, _profiles, _window
     start = datetime.now(timezone.utc) - timedelta(days=DAYS)
     end = datetime.now(timezone.utc)
 
-    rows = []
-
-    print(f"\n📊 Coletando métricas dos últimos {DAYS} dias\n")
-
-    for region in regions:
-        print(f"\n🟢 Região: {region}")
-        cfg_r = dict(cfg)
-        cfg_r["region"] = region
-
-        compute = oci.core.ComputeClient(cfg_r)
-        monitoring = oci.monitoring.MonitoringClient(cfg_r)
-
-        for comp in compartments:
-            try:
-                instances = oci.pagination.list_call_get_all_results(
-                    compute.list_instances,
-                    compartment_id=comp.id
-                ).data
-            except oci.exceptions.ServiceError:
-                continue
+    meta = {"days": DAYS, "interval": INTERVAL, "aggregation": AGGREGATION,
+            "shard_index": shard_index, "shard_count": shard_count}
+    _journal = open_journal(sharded(JOURNAL_PATH, shard_index, shard_count), meta, start, end, resume)
+    done = {}
+    if _journal is not None:
+        start, end = _journal.start, _journal.end
+        done = dict(_journal.rows)
+        if done:
+            print(f"\n♻️  Retomando: {len(done)} instâncias já coletadas em {_journal.path}")
+    _window = (start, end)
+    if _journal is not None and _journal.finished:
+        print("✅ Coleta anterior já concluída; nada a buscar.")
+        _journal.close()
+        return sort_rows(list(done.values()))
+
+    # cache, sketches e datapoints brutos só existem no modo bruto
+    raw = AGGREGATION != "server"
+    _cache = open_cache(CACHE_PATH) if raw else None
+    _sketches = open_store(SKETCHES_PATH) if raw else None
+    _raw_batches = [] if raw and DATASET_RAW and DATASET_PATH.lower() != "off" else None
+    # perfis por hora precisam de pontos de até 1h (modo bruto)
+    _profiles = None
+    profiles_path = profiles_shard_path(shard_index, shard_count)
+    if raw and not is_off(PROFILES_PATH) and interval_seconds(INTERVAL) <= 3600:
+        from oci_schedule import Profiles
+        _profiles = Profiles()
+        if _journal is not None:
+            _profiles.restore({i: p for i, p in _journal.profiles.items() if i in done})
+    _payload.clear()
+    del _accuracy[:]
+    if _raw_batches is not None:
+        try:
+            import oci_dataset  # noqa: F401
+        except ImportError:
+            _raw_batches = None
 
-            running = [i for i in instances if i.lifecycle_state == "RUNNING"]
-            if not running:
-                continue
+    regions = get_regions()
+    compartments = get_compartments()
 
-            print(f"  📁 {comp.name} | RUNNING: {len(running)}")
+    print(f"\n📊 Coletando métricas dos últimos {DAYS} dias"
+          + (f" (agregadas no serviço em [{SERVER_INTERVAL}])" if AGGREGATION == "server" else "") + "\n")
+    if shard_count > 1:
+        print(f"🧩 Shard {shard_index + 1} de {shard_count}")
 
+    # inventário por região; uma região com erro não interrompe as outras
+    inventory_tasks = []
+    for region in regions:
+        mine = [c for c in compartments if in_shard(region, c.id, shard_index, shard_count)]
+        if mine:
+            inventory_tasks.append((region, f"inventário {region}", lambda r=region, m=mine: inventory(r, m)))
+    found, failures = run_deferred(inventory_tasks, lambda tasks: [fn() for _key, fn in tasks])
+
+    units = []
+    skipped = 0
+    for region_units in found:
+        for region, comp, running in region_units or []:
+            pending = [i for i in running if i.id not in done]
+            skipped += len(running) - len(pending)
+            if pending:
+                units.append((region, comp, pending))
+
+    # métricas: por compartment (agrupado) ou por instância
+    metric_tasks = []
+    for region, comp, running in units:
+        if QUERY_MODE == "instance":
             for inst in running:
-                # 🔴 AQUI está a correção crítica
-                inst_full = compute.get_instance(inst.id).data
-
-                cpu_mean, cpu_p95 = get_metric(
-                    monitoring, comp.id, inst.id, "CpuUtilization", start, end
-                )
-                mem_mean, mem_p95 = get_metric(
-                    monitoring, comp.id, inst.id, "MemoryUtilization", start, end
-                )
-
-                burst, baseline, baseline_raw = parse_baseline(inst_full)
-
-                rows.append({
-                    "region": region,
-                    "compartment": comp.name,
-                    "instance_name": inst.display_name,
-                    "instance_ocid": inst.id,
-                    "shape": inst.shape,
-                    "ocpus": getattr(inst.shape_config, "ocpus", None),
-                    "memory_gb": getattr(inst.shape_config, "memory_in_gbs", None),
-                    "burstable_enabled": burst,
-                    "baseline_percent": baseline,
-                    "baseline_raw": baseline_raw,
-                    "cpu_mean_percent": cpu_mean,
-                    "cpu_p95_percent": cpu_p95,
-                    "mem_mean_percent": mem_mean,
-                    "mem_p95_percent": mem_p95,
-                    "finops_recommendation": finops(cpu_mean, cpu_p95, mem_mean, mem_p95)
-                })
+                metric_tasks.append((
+                    region, f"{region} / {comp.name} / {inst.display_name}",
+                    lambda r=region, c=comp, i=[inst]: collect_unit(r, c, i, start, end)
+                ))
+        else:
+            metric_tasks.append((
+                region, f"{region} / {comp.name}",
+                lambda r=region, c=comp, i=running: collect_unit(r, c, i, start, end)
+            ))
+
+    total = sum(len(running) for _r, _c, running in units)
+    print(f"\n⏳ Coletando {total} instâncias ({len(metric_tasks)} tarefas de métricas, "
+          f"{WORKERS} workers, {WORKERS_PER_REGION} por região)"
+          + (f"; {skipped} já no journal" if skipped else ""))
+    results, metric_failures = run_deferred(
+        metric_tasks, lambda tasks: run_ordered(tasks, WORKERS, WORKERS_PER_REGION)
+    )
+    failures += metric_failures
+
+    if _cache is not None:
+        _cache.expire(int((end - timedelta(days=CACHE_RETENTION_DAYS)).timestamp()))
+        _cache.close()
+    if _sketches is not None:
+        _sketches.close()
+
+    # linhas do journal + novas: ordenadas como no merge, sem depender de onde a coleta parou
+    rows = list(done.values())
+    for unit_rows in results:
+        rows.extend(unit_rows or [])
+    sort_rows(rows)
+
+    if AGGREGATION == "server" and total:
+        accuracy_report(total, start, end)
+
+    if _profiles is not None:
+        count = _profiles.save(profiles_path)
+        print(f"\n🕒 Perfis semanais de {count} instâncias: {profiles_path}")
+
+    if _journal is not None:
+        for label, error in failures:
+            _journal.failed(label, error)
+        if not failures:
+            _journal.finish()
+        _journal.close()
+    if failures:
+        print(f"\n⚠️ {len(failures)} tarefa(s) sem sucesso após as repetições:")
+        for label, error in failures:
+            print(f"  ❌ {label}: {error}")
+        if _journal is not None:
+            print(f"   O progresso está em {_journal.path}; rode de novo com --resume para buscar só o que falta.")
+    return rows
+
+def analyse(rows):
+    """Aplica a recomendação FinOps a partir das estatísticas de cada linha."""
+    for r in rows:
+        r["finops_recommendation"] = finops(
+            r["cpu_mean_percent"], r["cpu_p95_percent"],
+            r["mem_mean_percent"], r["mem_p95_percent"],
+        )
+    return rows
+
+def render(rows, outputs=("csv", "xlsx", "parquet")):
+    """Grava CSV, XLSX e/ou dataset Parquet. Retorna [(tipo, caminho)]."""
+    headers = list(rows[0].keys())
+    written = []
+
+    if "csv" in outputs:
+        with open(CSV_PATH, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=headers)
+            writer.writeheader()
+            writer.writerows(rows)
+        written.append(("CSV ", CSV_PATH))
+
+    if "xlsx" in outputs:
+        write_xlsx(
+            XLSX_PATH, headers, rows, "FinOps",
+            color_column="finops_recommendation",
+            rules=[
+                starts_with("DOWNSIZE", RED),
+                equals("UPSCALE", YELLOW),
+                otherwise(GREEN),
+            ],
+        )
+        written.append(("XLSX", XLSX_PATH))
+
+    if "parquet" in outputs:
+        dataset = write_dataset(rows)
+        if dataset:
+            written.append(("Parquet", dataset))
+
+    return written
+
+def load_rows():
+    """Linhas da última coleta (dataset Parquet ou CSV), com números tipados."""
+    if os.path.isdir(DATASET_PATH):
+        try:
+            from oci_dataset import is_current, read_rows
+            if is_current(DATASET_PATH, CSV_PATH):
+                return read_rows(DATASET_PATH)
+        except ImportError:
+            pass
+    if not os.path.exists(CSV_PATH):
+        return []
+    with open(CSV_PATH, newline="") as f:
+        rows = list(csv.DictReader(f))
+    numeric = [h for h in (rows[0] if rows else {})
+               if h in ("ocpus", "memory_gb") or (h.endswith("_percent") and h != "baseline_percent")]
+    for r in rows:
+        for h in numeric:
+            r[h] = to_number(r[h])
+    return rows
+
+def add_shard_args(parser):
+    parser.add_argument("--shard-index", type=int, default=SHARD_INDEX + 1,
+                        help="shard deste host, de 1 a --shard-count (METRICS_SHARD_INDEX)")
+    parser.add_argument("--shard-count", type=int, default=SHARD_COUNT,
+                        help="total de shards (METRICS_SHARD_COUNT)")
+    parser.add_argument("--merge", nargs="*", metavar="PARCIAL",
+                        help="junta os parciais dos shards (padrão: todos em METRICS_SHARD_DIR)")
+
+def check_shard_args(parser, args):
+    if args.shard_count < 1 or not 1 <= args.shard_index <= args.shard_count:
+        parser.error("--shard-index deve estar entre 1 e --shard-count")
+
+# ---------- main ----------
+def main(shard_index=SHARD_INDEX, shard_count=SHARD_COUNT, merge=None, resume=False):
+    if merge is not None:
+        print("\n🧩 Juntando parciais dos shards")
+        rows = load_partials(merge, shard_count if shard_count > 1 else None)
+    else:
+        rows = collect(shard_index, shard_count, resume)
+
+    if merge is None and shard_count > 1:
+        # o parcial é gravado mesmo vazio, para o merge saber que o shard terminou
+        path = write_partial(analyse(rows), shard_index, shard_count)
+        print(f"\n✅ Parcial do shard {shard_index + 1}/{shard_count}: {path} ({len(rows)} instâncias)")
+        return
 
     if not rows:
         print("Nenhuma instância encontrada.")
         return
 
-    headers = list(rows[0].keys())
-
-    with open(CSV_PATH, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
-        writer.writerows(rows)
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "FinOps"
-
-    ws.append(headers)
-
-    fill_keep = PatternFill("solid", fgColor="C6EFCE")
-    fill_down = PatternFill("solid", fgColor="FFC7CE")
-    fill_up = PatternFill("solid", fgColor="FFEB9C")
-
-    rec_col = headers.index("finops_recommendation") + 1
-
-    for r in rows:
-        ws.append([r[h] for h in headers])
-        row = ws.max_row
-        rec = r["finops_recommendation"]
-        if rec.startswith("DOWNSIZE"):
-            ws.cell(row=row, column=rec_col).fill = fill_down
-        elif rec == "UPSCALE":
-            ws.cell(row=row, column=rec_col).fill = fill_up
-        else:
-            ws.cell(row=row, column=rec_col).fill = fill_keep
+    analyse(rows)
 
-    wb.save(XLSX_PATH)
+    written = render(rows)
+    if merge is not None:
+        summary(rows)
 
     print("\n✅ Relatórios gerados:")
-    print(f"➡ CSV : {CSV_PATH}")
-    print(f"➡ XLSX: {XLSX_PATH}")
+    for kind, path in written:
+        print(f"➡ {kind}: {path}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Coleta de CPU/Memória de N dias (METRICS_DAYS) com recomendação FinOps")
+    add_shard_args(parser)
+    parser.add_argument("--resume", action="store_true",
+                        help="retoma a última coleta interrompida (METRICS_JOURNAL), buscando só o que falta")
+    parser.add_argument("--aggregation", choices=("raw", "server"), default=AGGREGATION,
+                        help="raw: todos os pontos, estatísticas locais; server: agregadas pelo Monitoring "
+                             "(METRICS_AGGREGATION)")
+    args = parser.parse_args()
+    AGGREGATION = args.aggregation
+    check_shard_args(parser, args)
+    main(args.shard_index - 1, args.shard_count, args.merge, args.resume)
@@ -1,86 +1,286 @@
+"""
+CPU/Memória quase em tempo real das instâncias RUNNING.
 
+A primeira leitura (e a consulta única) cobre a janela inteira de WINDOW
+intervalos, o que absorve o atraso de ingestão do Monitoring; as atualizações
+seguintes pedem só os intervalos mais recentes. As consultas são agrupadas por
+compartment (resourceId =~ "a|b|...".groupBy(resourceId)) e os últimos valores
+de cada instância ficam em um buffer circular (array de floats).
+
+Uso:
+    python src/oci_metrics_cpu_mem_realtime.py              # uma leitura
+    python src/oci_metrics_cpu_mem_realtime.py --watch 15   # atualiza a cada 15s
+"""
 import os
+import sys
+import time
+import shutil
+import argparse
+import threading
+from array import array
 from datetime import datetime, timedelta, timezone
 
-import oci
-from oci.monitoring.models import SummarizeMetricsDataDetails
+from oci_inventory import running_instances
+from oci_pool import run_ordered
+from oci_ratelimit import call
+from oci_session import make_client
+from oci_tenancy import get_compartments, get_regions
+
+# ================= CONFIG =================
+INTERVAL = os.getenv("REALTIME_INTERVAL", "1m")
+# quantidade de intervalos guardados por instância (min/méd/máx móveis)
+WINDOW = int(os.getenv("REALTIME_WINDOW", "30"))
+# instâncias por consulta agrupada
+GROUP_SIZE = int(os.getenv("REALTIME_GROUP_SIZE", "100"))
+# o inventário (instâncias RUNNING) é refeito só a cada N segundos
+INVENTORY_REFRESH = int(os.getenv("REALTIME_INVENTORY_REFRESH", "600"))
+WORKERS = int(os.getenv("METRICS_WORKERS", "16"))
+WORKERS_PER_REGION = int(os.getenv("METRICS_WORKERS_PER_REGION", "8"))
+
+METRICS = (("cpu", "CpuUtilization"), ("mem", "MemoryUtilization"))
+# =========================================
+
+_local = threading.local()
+
+
+# ---------- helpers ----------
+def region_clients(region):
+    clients = getattr(_local, "clients", None)
+    if clients is None:
+        clients = _local.clients = {}
+    if region not in clients:
+        clients[region] = (make_client("compute", region), make_client("monitoring", region))
+    return clients[region]
+
+
+def interval_seconds(interval):
+    units = {"m": 60, "h": 3600, "d": 86400}
+    return int(interval[:-1]) * units[interval[-1]]
+
+
+class RingBuffer:
+    """Últimos `size` valores em um array fixo de floats."""
+    __slots__ = ("values", "pos", "count", "last_ts")
+
+    def __init__(self, size=WINDOW):
+        self.values = array("f", bytes(4 * size))
+        self.pos = 0
+        self.count = 0
+        self.last_ts = 0
 
-cfg = oci.config.from_file()
-tenancy_id = cfg["tenancy"]
+    def push(self, ts, value):
+        """Grava o valor se o timestamp for novo (repetições do mesmo intervalo são ignoradas)."""
+        if ts <= self.last_ts:
+            return
+        self.values[self.pos] = value
+        self.pos = (self.pos + 1) % len(self.values)
+        self.count = min(self.count + 1, len(self.values))
+        self.last_ts = ts
 
+    @property
+    def last(self):
+        return self.values[self.pos - 1] if self.count else None
 
-def get_all_regions(identity_client):
-    resp = identity_client.list_region_subscriptions(tenancy_id)
-    return [r.region_name for r in resp.data]
+    def stats(self):
+        """(mínimo, média, máximo) dos valores guardados."""
+        if not self.count:
+            return None, None, None
+        data = self.values[:self.count] if self.count < len(self.values) else self.values
+        return min(data), sum(data) / self.count, max(data)
 
 
-def get_all_compartments(identity_client):
-    result = oci.pagination.list_call_get_all_results(
-        identity_client.list_compartments,
-        tenancy_id,
-        compartment_id_in_subtree=True
+class Target:
+    __slots__ = ("region", "compartment", "compartment_id", "instance_id", "name", "shape", "cpu", "mem", "primed")
+
+    def __init__(self, region, comp, inst):
+        self.region = region
+        self.compartment = comp.name
+        self.compartment_id = comp.id
+        self.instance_id = inst.id
+        self.name = inst.display_name
+        self.shape = inst.shape
+        self.cpu = RingBuffer()
+        self.mem = RingBuffer()
+        self.primed = False     # já consultada com a janela completa
+
+
+def recent(region, compartment_id, ids, metric, start, end):
+    """Datapoints da janela por instância: {instance_id: [(ts, value), ...]} em ordem."""
+    from oci.monitoring.models import SummarizeMetricsDataDetails
+
+    _compute, monitoring = region_clients(region)
+    query = f'{metric}[{INTERVAL}]{{resourceId =~ "{"|".join(ids)}"}}.groupBy(resourceId).mean()'
+    details = SummarizeMetricsDataDetails(
+        namespace="oci_computeagent",
+        query=query,
+        start_time=start,
+        end_time=end,
+    )
+    resp = call(
+        monitoring.summarize_metrics_data,
+        compartment_id=compartment_id,
+        summarize_metrics_data_details=details,
     )
-    return [c for c in result.data if c.lifecycle_state == "ACTIVE"]
+    wanted = set(ids)
+    result = {}
+    for item in resp.data or []:
+        rid = (item.dimensions or {}).get("resourceId")
+        points = [(int(d.timestamp.timestamp()), d.value)
+                  for d in item.aggregated_datapoints or [] if d.value is not None]
+        if rid in wanted and points:
+            result[rid] = sorted(points)
+    return result
+
+
+# ---------- coletor ----------
+class RealtimeCollector:
+    """Inventário + buffers por instância; `poll()` busca os intervalos mais recentes."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.targets = {}
+        self.inventory_ts = 0
+        self.errors = 0
+
+    def refresh_inventory(self):
+        regions = get_regions()
+        compartments = get_compartments()
+        found = {}
+        for region in regions:
+            compute, _monitoring = region_clients(region)
+            search = make_client("search", region)
+            for comp, running in running_instances(compute, search, compartments):
+                for inst in running:
+                    found[inst.id] = (region, comp, inst)
+        with self.lock:
+            # mantém o histórico das instâncias que continuam RUNNING
+            self.targets = {
+                iid: self.targets.get(iid) or Target(region, comp, inst)
+                for iid, (region, comp, inst) in found.items()
+            }
+        self.inventory_ts = time.time()
+
+    def poll(self):
+        if time.time() - self.inventory_ts >= INVENTORY_REFRESH:
+            self.refresh_inventory()
+
+        groups = {}
+        with self.lock:
+            for t in self.targets.values():
+                groups.setdefault((t.region, t.compartment_id), []).append(t)
 
+        # janela completa para lotes com instância ainda não consultada (primeira
+        # leitura, instância nova no inventário): com o atraso de ingestão, 2
+        # intervalos podem vir vazios; depois, 2 intervalos bastam para
+        # garantir o último intervalo fechado
+        end = datetime.now(timezone.utc)
+        step = interval_seconds(INTERVAL)
+        full = end - timedelta(seconds=WINDOW * step)
+        narrow = end - timedelta(seconds=2 * step)
 
-def main():
-    identity = oci.identity.IdentityClient(cfg)
-    regions = get_all_regions(identity)
-    compartments = get_all_compartments(identity)
+        def fetch(region, comp_id, ids, metric, start):
+            import oci
 
-    start = datetime.now(timezone.utc) - timedelta(minutes=30)
-    end = datetime.now(timezone.utc)
+            try:
+                return recent(region, comp_id, ids, metric, start, end)
+            except oci.exceptions.ServiceError:
+                with self.lock:
+                    self.errors += 1
+                return {}
 
-    print("Consulta rápida (30 min) de CPU/Memória para instâncias RUNNING.\n")
+        tasks, keys = [], []
+        for (region, comp_id), targets in groups.items():
+            for pos in range(0, len(targets), GROUP_SIZE):
+                chunk = targets[pos:pos + GROUP_SIZE]
+                ids = [t.instance_id for t in chunk]
+                start = narrow if all(t.primed for t in chunk) else full
+                for prefix, metric in METRICS:
+                    tasks.append((region, lambda r=region, c=comp_id, i=ids, m=metric, s=start: fetch(r, c, i, m, s)))
+                    keys.append(prefix)
 
-    for region in regions:
-        print(f"===== Região: {region} =====")
-        region_cfg = dict(cfg)
-        region_cfg["region"] = region
+        results = run_ordered(tasks, WORKERS, WORKERS_PER_REGION)
+        with self.lock:
+            for prefix, values in zip(keys, results):
+                for iid, points in values.items():
+                    target = self.targets.get(iid)
+                    if target is not None:
+                        buffer = getattr(target, prefix)
+                        for ts, value in points:
+                            buffer.push(ts, value)
+            for t in self.targets.values():
+                t.primed = True
 
-        compute = oci.core.ComputeClient(region_cfg)
-        monitoring = oci.monitoring.MonitoringClient(region_cfg)
+    def snapshot(self):
+        """Linhas ordenadas da mais quente para a mais fria (CPU e memória atuais)."""
+        rows = []
+        with self.lock:
+            for t in self.targets.values():
+                cpu_min, cpu_avg, cpu_max = t.cpu.stats()
+                mem_min, mem_avg, mem_max = t.mem.stats()
+                rows.append({
+                    "region": t.region,
+                    "compartment": t.compartment,
+                    "instance_name": t.name,
+                    "instance_ocid": t.instance_id,
+                    "shape": t.shape,
+                    "cpu": t.cpu.last, "cpu_min": cpu_min, "cpu_avg": cpu_avg, "cpu_max": cpu_max,
+                    "mem": t.mem.last, "mem_min": mem_min, "mem_avg": mem_avg, "mem_max": mem_max,
+                })
+        rows.sort(key=lambda r: (-1 if r["cpu"] is None else r["cpu"], -1 if r["mem"] is None else r["mem"]),
+                  reverse=True)
+        return rows
 
-        for comp in compartments:
-            comp_id = comp.id
-            comp_name = comp.name
 
-            instances = oci.pagination.list_call_get_all_results(
-                compute.list_instances,
-                compartment_id=comp_id
-            ).data
+# ---------- tela ----------
+def fmt(v):
+    return f"{v:5.1f}" if v is not None else "    -"
 
-            running = [i for i in instances if i.lifecycle_state == "RUNNING"]
-            if not running:
-                continue
 
-            print(f"  Compartment: {comp_name}")
+def render(rows, top=None, clear=False, errors=0):
+    height = shutil.get_terminal_size((120, 40)).lines
+    limit = top or (max(1, height - 4) if clear else len(rows))
+    out = []
+    if clear:
+        out.append("\x1b[H\x1b[2J")
+    out.append(f"{datetime.now():%H:%M:%S}  {len(rows)} instâncias RUNNING  (intervalo {INTERVAL}, janela {WINDOW})"
+               + (f"  ⚠️ {errors} consultas com erro" if errors else ""))
+    out.append(f"{'INSTÂNCIA':30} {'REGIÃO':16} {'CPU':>5} {'min':>5} {'méd':>5} {'máx':>5} | "
+               f"{'MEM':>5} {'min':>5} {'méd':>5} {'máx':>5}  COMPARTMENT")
+    for r in rows[:limit]:
+        out.append(
+            f"{r['instance_name'][:30]:30} {r['region'][:16]:16} "
+            f"{fmt(r['cpu'])} {fmt(r['cpu_min'])} {fmt(r['cpu_avg'])} {fmt(r['cpu_max'])} | "
+            f"{fmt(r['mem'])} {fmt(r['mem_min'])} {fmt(r['mem_avg'])} {fmt(r['mem_max'])}  {r['compartment']}"
+        )
+    if len(rows) > limit:
+        out.append(f"... +{len(rows) - limit} instâncias")
+    sys.stdout.write("\n".join(out) + "\n")
+    sys.stdout.flush()
 
-            for inst in running:
-                print(f"  -> {inst.display_name}")
 
-                def get_metric(metric_name):
-                    query = f'{metric_name}[5m]{{resourceId = "{inst.id}"}}.mean()'
-                    details = SummarizeMetricsDataDetails(
-                        namespace="oci_computeagent",
-                        query=query,
-                        start_time=start,
-                        end_time=end,
-                    )
-                    resp = monitoring.summarize_metrics_data(
-                        compartment_id=comp_id,
-                        summarize_metrics_data_details=details,
-                    )
-                    if not resp.data or not resp.data[0].aggregated_datapoints:
-                        return None
-                    return resp.data[0].aggregated_datapoints[-1].value
+def main(watch=None, top=None):
+    collector = RealtimeCollector()
 
-                cpu = get_metric("CpuUtilization")
-                mem = get_metric("MemoryUtilization")
+    if not watch:
+        print("Consulta rápida de CPU/Memória para instâncias RUNNING.\n")
+        collector.poll()
+        render(collector.snapshot(), top, errors=collector.errors)
+        print("\nFim da consulta.")
+        return
 
-                print(f"     CPU={cpu if cpu is not None else 'sem dado'} % | MEM={mem if mem is not None else 'sem dado'} %")
+    try:
+        while True:
+            started = time.monotonic()
+            collector.poll()
+            render(collector.snapshot(), top, clear=True, errors=collector.errors)
+            time.sleep(max(0.0, watch - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        print("\nEncerrado.")
 
-    print("\nFim da consulta.")
 
 if __name__ == "__main__":
-    main()
+    p = argparse.ArgumentParser(description="CPU/Memória quase em tempo real das instâncias RUNNING")
+    p.add_argument("--watch", type=float, metavar="SEGUNDOS", help="atualiza continuamente a cada N segundos")
+    p.add_argument("--top", type=int, help="mostra apenas as N instâncias mais quentes")
+    args = p.parse_args()
+    main(args.watch, args.top)
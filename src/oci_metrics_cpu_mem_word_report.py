@@ -1,20 +1,34 @@
 import os
 import csv
+import argparse
 from datetime import datetime
 
-from docx import Document
-from docx.shared import Pt
+from oci_pricing import as_floats, get_prices
 
 homedir = os.path.expanduser("~")
 DAYS = int(os.getenv("METRICS_DAYS", "30"))
 
 CSV_PATH = os.path.join(homedir, f"Relatorio_CPU_Memoria_media_{DAYS}d_multi_region.csv")
 DOCX_PATH = os.path.join(homedir, f"Relatorio_FinOps_CPU_Mem_{DAYS}d_multi_region.docx")
-
-# Valores aproximados por hora em USD (ajustáveis)
-OCPU_PRICE_HOUR = 0.05
-MEM_GB_PRICE_HOUR = 0.003
-HOURS_MONTH = 730
+DATASET_PATH = os.getenv("METRICS_DATASET", os.path.splitext(CSV_PATH)[0] + ".parquet")
+
+# colunas lidas do dataset Parquet
+COLUMNS = [
+    "region",
+    "compartment",
+    "instance_name",
+    "shape",
+    "ocpus",
+    "memory_gb",
+    "cpu_mean_percent",
+    "cpu_p95_percent",
+    "mem_mean_percent",
+    "mem_p95_percent",
+    "finops_recommendation",
+]
+
+# Valores em USD da tabela local versionada (oci_pricing / OCI_PRICE_LIST)
+CURRENCY = "USD"
 
 
 def to_float(value):
@@ -26,11 +40,19 @@ def to_float(value):
         return None
 
 
-def estimate_monthly_cost(ocpus, mem_gb):
-    ocpus = ocpus or 0
-    mem_gb = mem_gb or 0
-    hourly = ocpus * OCPU_PRICE_HOUR + mem_gb * MEM_GB_PRICE_HOUR
-    return hourly * HOURS_MONTH
+def cost_deltas(rows, targets):
+    """Custo de destino - custo atual (por mês) de cada linha, em uma chamada vetorizada."""
+    if not rows:
+        return []
+    current, target = get_prices().fleet_costs(
+        [r["shape"] for r in rows],
+        as_floats(r["ocpus"] for r in rows),
+        as_floats(r["memory_gb"] for r in rows),
+        CURRENCY,
+        [t[0] for t in targets],
+        [t[1] for t in targets],
+    )
+    return (target - current).tolist()
 
 
 def format_money_usd(v):
@@ -38,6 +60,15 @@ def format_money_usd(v):
 
 
 def load_rows():
+    # dataset Parquet tipado (projeção de colunas); CSV como alternativa
+    if os.path.isdir(DATASET_PATH):
+        try:
+            from oci_dataset import is_current, read_rows
+            if is_current(DATASET_PATH, CSV_PATH):
+                return read_rows(DATASET_PATH, COLUMNS)
+        except ImportError:
+            pass
+
     rows = []
     if not os.path.exists(CSV_PATH):
         print(f"CSV não encontrado: {CSV_PATH}")
@@ -50,12 +81,7 @@ def load_rows():
     return rows
 
 
-def build_downsize_text(row):
-    inst = row["instance_name"]
-    shape = row["shape"]
-    region = row["region"]
-    comp = row["compartment"]
-
+def downsize_target(row):
     cpu_mean = to_float(row["cpu_mean_percent"]) or 0
     mem_mean = to_float(row["mem_mean_percent"]) or 0
     ocpus = to_float(row["ocpus"]) or 0
@@ -65,12 +91,27 @@ def build_downsize_text(row):
     if cpu_mean < 5 and mem_mean < 40:
         fator = 0.25
 
-    new_ocpus = max(1, ocpus * fator)
-    new_mem = max(1, mem_gb * fator)
+    return max(1, ocpus * fator), max(1, mem_gb * fator)
 
-    current_cost = estimate_monthly_cost(ocpus, mem_gb)
-    new_cost = estimate_monthly_cost(new_ocpus, new_mem)
-    savings = max(0, current_cost - new_cost)
+
+def upscale_target(row):
+    fator = 2.0
+    return (to_float(row["ocpus"]) or 0) * fator, (to_float(row["memory_gb"]) or 0) * fator
+
+
+def build_downsize_text(row, target, delta):
+    inst = row["instance_name"]
+    shape = row["shape"]
+    region = row["region"]
+    comp = row["compartment"]
+
+    cpu_mean = to_float(row["cpu_mean_percent"]) or 0
+    mem_mean = to_float(row["mem_mean_percent"]) or 0
+    ocpus = to_float(row["ocpus"]) or 0
+    mem_gb = to_float(row["memory_gb"]) or 0
+
+    new_ocpus, new_mem = target
+    savings = max(0, -delta)
 
     text = (
         f"Instância: {inst} | Região: {region} | Compartment: {comp}\n"
@@ -82,7 +123,7 @@ def build_downsize_text(row):
     return text, savings
 
 
-def build_upscale_text(row):
+def build_upscale_text(row, target, delta):
     inst = row["instance_name"]
     shape = row["shape"]
     region = row["region"]
@@ -95,13 +136,8 @@ def build_upscale_text(row):
     ocpus = to_float(row["ocpus"]) or 0
     mem_gb = to_float(row["memory_gb"]) or 0
 
-    fator = 2.0
-    new_ocpus = ocpus * fator
-    new_mem = mem_gb * fator
-
-    current_cost = estimate_monthly_cost(ocpus, mem_gb)
-    new_cost = estimate_monthly_cost(new_ocpus, new_mem)
-    extra = max(0, new_cost - current_cost)
+    new_ocpus, new_mem = target
+    extra = max(0, delta)
 
     text = (
         f"Instância: {inst} | Região: {region} | Compartment: {comp}\n"
@@ -114,82 +150,82 @@ def build_upscale_text(row):
     return text, extra
 
 
-def generate_report():
-    rows = load_rows()
+def generate_report(rows=None):
+    from oci_docx import DocxWriter
+
+    rows = load_rows() if rows is None else rows
     if not rows:
         return
 
-    doc = Document()
-    title = doc.add_heading(
-        "Relatório FinOps – Análise de CPU e Memória (OCI)",
-        level=0
-    )
-    title.alignment = 0
+    doc = DocxWriter()
+    doc.heading("Relatório FinOps – Análise de CPU e Memória (OCI)", level=0, align="left")
 
-    p = doc.add_paragraph()
-    run = p.add_run(
+    doc.paragraph(
         "Gerado automaticamente a partir das métricas do OCI Monitoring. "
-        "Responsável: Bruno Mendes Augusto."
+        "Responsável: Bruno Mendes Augusto.",
+        italic=True,
+        size=9,
     )
-    run.italic = True
-    run.font.size = Pt(9)
 
-    doc.add_paragraph(f"\nJanela de análise: últimos {DAYS} dias.")
+    doc.paragraph(f"\nJanela de análise: últimos {DAYS} dias.")
 
     total_down_savings = 0.0
     total_up_extra = 0.0
 
     # === DOWNSIZE ===
-    doc.add_heading("1. Recomendações de Redução (Downsize)", level=1)
-    found = False
-    for r in rows:
-        if r.get("finops_recommendation", "").startswith("DOWNSIZE"):
-            text, savings = build_downsize_text(r)
-            doc.add_paragraph(text)
-            total_down_savings += savings
-            found = True
-
-    if not found:
-        doc.add_paragraph("Nenhuma instância com forte indicação de redução.")
+    # cada seção é montada inteira e gravada de uma vez (oci_docx)
+    doc.heading("1. Recomendações de Redução (Downsize)", level=1)
+    downs = [r for r in rows if (r.get("finops_recommendation") or "").startswith("DOWNSIZE")]
+    targets = [downsize_target(r) for r in downs]
+    texts = []
+    for r, target, delta in zip(downs, targets, cost_deltas(downs, targets)):
+        text, savings = build_downsize_text(r, target, delta)
+        texts.append(text)
+        total_down_savings += savings
+    doc.paragraphs(texts)
+
+    if not downs:
+        doc.paragraph("Nenhuma instância com forte indicação de redução.")
 
     # === UPSCALE ===
-    doc.add_heading("2. Recomendações de Aumento (Upscale)", level=1)
-    found = False
-    for r in rows:
-        if r.get("finops_recommendation") == "UPSCALE":
-            text, extra = build_upscale_text(r)
-            doc.add_paragraph(text)
-            total_up_extra += extra
-            found = True
-
-    if not found:
-        doc.add_paragraph("Nenhuma instância com forte indicação de aumento.")
+    doc.heading("2. Recomendações de Aumento (Upscale)", level=1)
+    ups = [r for r in rows if r.get("finops_recommendation") == "UPSCALE"]
+    targets = [upscale_target(r) for r in ups]
+    texts = []
+    for r, target, delta in zip(ups, targets, cost_deltas(ups, targets)):
+        text, extra = build_upscale_text(r, target, delta)
+        texts.append(text)
+        total_up_extra += extra
+    doc.paragraphs(texts)
+
+    if not ups:
+        doc.paragraph("Nenhuma instância com forte indicação de aumento.")
 
     # === RESUMO ===
-    doc.add_heading("3. Resumo Financeiro Consolidado (Estimativa)", level=1)
+    doc.heading("3. Resumo Financeiro Consolidado (Estimativa)", level=1)
 
-    doc.add_paragraph(
+    doc.paragraph(
         f"Economia potencial com reduções (Downsize): "
         f"{format_money_usd(total_down_savings)}/mês."
     )
 
-    doc.add_paragraph(
+    doc.paragraph(
         f"Impacto potencial com aumentos (Upscale): "
         f"+{format_money_usd(total_up_extra)}/mês."
     )
 
     net = total_down_savings - total_up_extra
     if net >= 0:
-        doc.add_paragraph(
+        doc.paragraph(
             f"\nEconomia líquida potencial estimada: {format_money_usd(net)}/mês."
         )
     else:
-        doc.add_paragraph(
+        doc.paragraph(
             f"\nImpacto líquido potencial estimado: +{format_money_usd(abs(net))}/mês."
         )
 
-    doc.add_paragraph(
-        "\nObservação: valores estimados com base em preços de tabela simplificados. "
+    doc.paragraph(
+        f"\nObservação: valores estimados com base na tabela de preços {get_prices().version}. "
         "Os valores de OCPU e memória podem variar conforme contrato."
     )
 
@@ -198,4 +234,5 @@ def generate_report():
 
 
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="Relatório executivo Word a partir da última coleta (METRICS_DAYS)").parse_args()
     generate_report()
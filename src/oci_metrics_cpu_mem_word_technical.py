@@ -1,9 +1,9 @@
 import os
 import csv
+import argparse
 from datetime import datetime
 
-from docx import Document
-from docx.shared import Pt
+from oci_pricing import as_floats, get_prices
 
 DEFAULT_DAYS = 30
 DAYS = int(os.getenv("METRICS_DAYS", DEFAULT_DAYS))
@@ -12,37 +12,26 @@ homedir = os.path.expanduser("~")
 DAYS = int(os.getenv("METRICS_DAYS", "30"))
 
 CSV_PATH = os.path.join(homedir, f"Relatorio_CPU_Memoria_media_{DAYS}d_multi_region.csv")
-DOCX_PATH = os.path.join(homedir, f"Relatorio_FinOps_CPU_Mem_{DAYS}d_multi_region.docx")
+DOCX_PATH = os.path.join(homedir, f"Relatorio_FinOps_CPU_Mem_Tecnico_{DAYS}d_multi_region.docx")
+DATASET_PATH = os.getenv("METRICS_DATASET", os.path.splitext(CSV_PATH)[0] + ".parquet")
 
+# colunas lidas do dataset Parquet
+COLUMNS = [
+    "region",
+    "instance_name",
+    "shape",
+    "ocpus",
+    "memory_gb",
+    "cpu_mean_percent",
+    "mem_mean_percent",
+    "burstable_enabled",
+    "baseline_percent",
+    "finops_recommendation",
+]
 
-# Preços em BRL (R$) por hora – tabela pública Oracle (estimativa)
-PRICE_MATRIX = {
-    "E5": {"ocpu": 0.165336,  "mem": 0.0110224},
-    "E6": {"ocpu": 0.165336,  "mem": 0.0110224},
-    "E4": {"ocpu": 0.13778,   "mem": 0.0082668},
-    "E3": {"ocpu": 0.13778,   "mem": 0.0082668},
-    "A1": {"ocpu": 0.055112,  "mem": 0.0082668},
-    "A2": {"ocpu": 0.0771568, "mem": 0.0110224},
-    "X9": {"ocpu": 0.220448,  "mem": 0.0082668},
-}
 
-HOURS_MONTH = 730
-
-
-def infer_family(shape: str) -> str:
-    if not shape:
-        return "E4"
-    s = shape.upper()
-    for fam in ("E5", "E6", "E4", "E3", "A1", "A2", "X9"):
-        if fam in s:
-            return fam
-    return "E4"
-
-
-def get_unit_prices(shape: str):
-    fam = infer_family(shape)
-    prices = PRICE_MATRIX.get(fam, PRICE_MATRIX["E4"])
-    return prices["ocpu"], prices["mem"]
+# Preços em BRL (R$) por hora: tabela local versionada (oci_pricing / OCI_PRICE_LIST)
+CURRENCY = "BRL"
 
 
 def to_float(value):
@@ -54,19 +43,20 @@ def to_float(value):
         return None
 
 
-def estimate_monthly_cost_brl(ocpus, mem_gb, shape):
-    ocpus = ocpus or 0
-    mem_gb = mem_gb or 0
-    ocpu_price_hour, mem_price_hour = get_unit_prices(shape)
-    hourly = ocpus * ocpu_price_hour + mem_gb * mem_price_hour
-    return hourly * HOURS_MONTH
-
-
 def format_money_brl(v):
     return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 
 def load_rows():
+    # dataset Parquet tipado (projeção de colunas); CSV como alternativa
+    if os.path.isdir(DATASET_PATH):
+        try:
+            from oci_dataset import is_current, read_rows
+            if is_current(DATASET_PATH, CSV_PATH):
+                return read_rows(DATASET_PATH, COLUMNS)
+        except ImportError:
+            pass
+
     rows = []
     if not os.path.exists(CSV_PATH):
         print(f"CSV não encontrado: {CSV_PATH}")
@@ -79,38 +69,31 @@ def load_rows():
     return rows
 
 
-def build_downsize(row):
+def downsize_target(row):
+    """(OCPUs, memória) sugeridos para DOWNSIZE."""
     cpu_mean = to_float(row["cpu_mean_percent"]) or 0
     mem_mean = to_float(row["mem_mean_percent"]) or 0
     ocpus = to_float(row["ocpus"]) or 0
     mem_gb = to_float(row["memory_gb"]) or 0
-    shape = row["shape"]
 
     fator = 0.5
     if cpu_mean < 5 and mem_mean < 40:
         fator = 0.25
 
-    new_ocpus = max(1, ocpus * fator)
-    new_mem = max(1, mem_gb * fator)
+    return max(1, ocpus * fator), max(1, mem_gb * fator)
 
-    current_cost = estimate_monthly_cost_brl(ocpus, mem_gb, shape)
-    new_cost = estimate_monthly_cost_brl(new_ocpus, new_mem, shape)
-    savings = max(0, current_cost - new_cost)
 
-    return savings
-
-
-def build_burstable(row):
+def burstable_target(row):
+    """(OCPUs efetivas, memória) com baseline burstable, ou None se não se aplica."""
     burst_enabled = row.get("burstable_enabled", "NO")
     baseline_percent = (row.get("baseline_percent") or "").strip()
 
     cpu_mean = to_float(row["cpu_mean_percent"]) or 0
     ocpus = to_float(row["ocpus"]) or 0
     mem_gb = to_float(row["memory_gb"]) or 0
-    shape = row["shape"]
 
     if burst_enabled == "YES" and baseline_percent in ("12.5%", "50%"):
-        return 0
+        return None
 
     frac = None
     if cpu_mean < 8:
@@ -119,86 +102,87 @@ def build_burstable(row):
         frac = 0.5
 
     if not frac:
-        return 0
-
-    current_cost = estimate_monthly_cost_brl(ocpus, mem_gb, shape)
-    new_cost = estimate_monthly_cost_brl(ocpus * frac, mem_gb, shape)
-    return max(0, current_cost - new_cost)
+        return None
+    return ocpus * frac, mem_gb
 
 
 def get_top5_finops_impact(rows):
-    candidates = []
+    candidates, targets = [], []
 
     for r in rows:
-        rec = r.get("finops_recommendation", "")
+        rec = r.get("finops_recommendation", "") or ""
         if rec.startswith("DOWNSIZE"):
-            savings = build_downsize(r)
+            target = downsize_target(r)
         elif rec.startswith("BURSTABLE"):
-            savings = build_burstable(r)
+            target = burstable_target(r)
         else:
             continue
+        if target is not None:
+            candidates.append(r)
+            targets.append(target)
+
+    if not candidates:
+        return []
+
+    # custo atual e de destino de todos os candidatos em uma chamada
+    current, target = get_prices().fleet_costs(
+        [r["shape"] for r in candidates],
+        as_floats(r["ocpus"] for r in candidates),
+        as_floats(r["memory_gb"] for r in candidates),
+        CURRENCY,
+        [t[0] for t in targets],
+        [t[1] for t in targets],
+    )
+    savings = (current - target).clip(min=0)
 
-        if savings > 0:
-            candidates.append((r, savings))
+    ranked = [(r, float(v)) for r, v in zip(candidates, savings) if v > 0]
+    ranked.sort(key=lambda x: x[1], reverse=True)
+    return ranked[:5]
 
-    candidates.sort(key=lambda x: x[1], reverse=True)
-    return candidates[:5]
 
+def generate_report(rows=None):
+    from oci_docx import DocxWriter
 
-def generate_report():
-    rows = load_rows()
+    rows = load_rows() if rows is None else rows
     if not rows:
         return
 
-    doc = Document()
-    doc.add_heading("Relatório FinOps – OCI (CPU, Memória e Burstable)", level=0)
+    doc = DocxWriter()
+    doc.heading("Relatório FinOps – OCI (CPU, Memória e Burstable)", level=0)
 
-    p = doc.add_paragraph()
-    run = p.add_run("Autor: Bruno Mendes Augusto | Relatório gerado automaticamente.")
-    run.italic = True
-    run.font.size = Pt(9)
+    doc.paragraph("Autor: Bruno Mendes Augusto | Relatório gerado automaticamente.", italic=True, size=9)
 
-    doc.add_paragraph(f"Janela de análise: últimos {DAYS} dias.")
-    doc.add_paragraph("Valores estimados em real brasileiro (BRL).")
+    doc.paragraph(f"Janela de análise: últimos {DAYS} dias.")
+    doc.paragraph("Valores estimados em real brasileiro (BRL).")
 
     # ================= TOP 5 =================
-    doc.add_heading("🏆 TOP 5 Oportunidades de Economia (Baixo Risco)", level=1)
+    doc.heading("🏆 TOP 5 Oportunidades de Economia (Baixo Risco)", level=1)
 
     top5 = get_top5_finops_impact(rows)
-    total_top5 = 0
+    total_top5 = sum(savings for _r, savings in top5)
 
     if top5:
-        table = doc.add_table(rows=1, cols=6)
-        hdr = table.rows[0].cells
-        hdr[0].text = "Rank"
-        hdr[1].text = "Instância"
-        hdr[2].text = "Região"
-        hdr[3].text = "Shape"
-        hdr[4].text = "Recomendação"
-        hdr[5].text = "Economia Estimada (R$/mês)"
-
-        for idx, (r, savings) in enumerate(top5, start=1):
-            row = table.add_row().cells
-            row[0].text = str(idx)
-            row[1].text = r["instance_name"]
-            row[2].text = r["region"]
-            row[3].text = r["shape"]
-            row[4].text = r["finops_recommendation"]
-            row[5].text = format_money_brl(savings)
-            total_top5 += savings
-
-        doc.add_paragraph(f"\nEconomia potencial total do TOP 5: {format_money_brl(total_top5)}/mês.")
+        doc.table(
+            ["Rank", "Instância", "Região", "Shape", "Recomendação", "Economia Estimada (R$/mês)"],
+            [
+                [str(idx), r["instance_name"], r["region"], r["shape"], r["finops_recommendation"],
+                 format_money_brl(savings)]
+                for idx, (r, savings) in enumerate(top5, start=1)
+            ],
+        )
+
+        doc.paragraph(f"\nEconomia potencial total do TOP 5: {format_money_brl(total_top5)}/mês.")
     else:
-        doc.add_paragraph("Nenhuma oportunidade relevante identificada.")
+        doc.paragraph("Nenhuma oportunidade relevante identificada.")
 
     # ================= RESUMO =================
-    doc.add_heading("📊 Resumo Executivo", level=1)
-    doc.add_paragraph(
+    doc.heading("📊 Resumo Executivo", level=1)
+    doc.paragraph(
         "Recomendação estratégica: atuar mensalmente apenas sobre as TOP 5 instâncias, "
         "minimizando risco operacional e maximizando retorno financeiro."
     )
 
-    doc.add_paragraph(
+    doc.paragraph(
         "\nObservação: valores estimados com base em preços públicos OCI. "
         "Licenças de sistema operacional não estão incluídas."
     )
@@ -208,4 +192,5 @@ def generate_report():
 
 
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="Relatório técnico Word a partir da última coleta (METRICS_DAYS)").parse_args()
     generate_report()
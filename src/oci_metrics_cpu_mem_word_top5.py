@@ -1,58 +1,76 @@
-import os
-import csv
-from docx import Document
-
-DEFAULT_DAYS = 30
-DAYS = int(os.getenv("METRICS_DAYS", DEFAULT_DAYS))
-
-HOME = os.path.expanduser("~")
-CSV_PATH = os.path.join(HOME, f"Relatorio_CPU_Memoria_media_{DAYS}d_multi_region.csv")
-DOCX_PATH = os.path.join(HOME, f"Relatorio_FinOps_TOP5_{DAYS}d.docx")
-
-def load_rows():
-    with open(CSV_PATH, newline="") as f:
-        return list(csv.DictReader(f))
-
-def get_top5(rows):
-    savings, costs = [], []
-
-    for r in rows:
-        try:
-            value = float(r.get("monthly_savings_brl", 0))
-        except:
-            continue
-
-        rec = r.get("finops_recommendation", "")
-        if value <= 0:
-            continue
-
-        if rec.startswith("DOWNSIZE") or "BURSTABLE" in rec:
-            savings.append((r, value))
-        elif rec == "UPSCALE":
-            costs.append((r, value))
-
-    return (
-        sorted(savings, key=lambda x: x[1], reverse=True)[:5],
-        sorted(costs, key=lambda x: x[1], reverse=True)[:5],
-    )
-
-def generate():
-    rows = load_rows()
-    top_save, top_cost = get_top5(rows)
-
-    doc = Document()
-    doc.add_heading("Relatório Executivo – Top 5 FinOps (OCI)", 0)
-
-    doc.add_heading("Top 5 – Maior Economia Potencial", 1)
-    for r, v in top_save:
-        doc.add_paragraph(f"{r['instance_name']} – {r['finops_recommendation']} – R$ {v:,.2f}")
-
-    doc.add_heading("Top 5 – Maior Impacto de Aumento", 1)
-    for r, v in top_cost:
-        doc.add_paragraph(f"{r['instance_name']} – UPSCALE – R$ {v:,.2f}")
-
-    doc.save(DOCX_PATH)
-    print(f"Relatório Top 5 gerado: {DOCX_PATH}")
-
-if __name__ == "__main__":
-    generate()
+import os
+import csv
+import argparse
+
+DEFAULT_DAYS = 30
+DAYS = int(os.getenv("METRICS_DAYS", DEFAULT_DAYS))
+
+HOME = os.path.expanduser("~")
+CSV_PATH = os.path.join(HOME, f"Relatorio_CPU_Memoria_media_{DAYS}d_multi_region.csv")
+DOCX_PATH = os.path.join(HOME, f"Relatorio_FinOps_TOP5_{DAYS}d.docx")
+DATASET_PATH = os.getenv("METRICS_DATASET", os.path.splitext(CSV_PATH)[0] + ".parquet")
+
+# colunas lidas do dataset Parquet
+COLUMNS = [
+    "instance_name",
+    "finops_recommendation",
+    "monthly_savings_brl",
+]
+
+def load_rows():
+    # dataset Parquet tipado (projeção de colunas); CSV como alternativa
+    if os.path.isdir(DATASET_PATH):
+        try:
+            from oci_dataset import is_current, read_rows
+            if is_current(DATASET_PATH, CSV_PATH):
+                return read_rows(DATASET_PATH, COLUMNS)
+        except ImportError:
+            pass
+
+    with open(CSV_PATH, newline="") as f:
+        return list(csv.DictReader(f))
+
+def get_top5(rows):
+    savings, costs = [], []
+
+    for r in rows:
+        try:
+            value = float(r.get("monthly_savings_brl", 0))
+        except:
+            continue
+
+        rec = r.get("finops_recommendation", "")
+        if value <= 0:
+            continue
+
+        if rec.startswith("DOWNSIZE") or "BURSTABLE" in rec:
+            savings.append((r, value))
+        elif rec == "UPSCALE":
+            costs.append((r, value))
+
+    return (
+        sorted(savings, key=lambda x: x[1], reverse=True)[:5],
+        sorted(costs, key=lambda x: x[1], reverse=True)[:5],
+    )
+
+def generate(rows=None):
+    from oci_docx import DocxWriter
+
+    rows = load_rows() if rows is None else rows
+    top_save, top_cost = get_top5(rows)
+
+    doc = DocxWriter()
+    doc.heading("Relatório Executivo – Top 5 FinOps (OCI)", 0)
+
+    doc.heading("Top 5 – Maior Economia Potencial", 1)
+    doc.paragraphs(f"{r['instance_name']} – {r['finops_recommendation']} – R$ {v:,.2f}" for r, v in top_save)
+
+    doc.heading("Top 5 – Maior Impacto de Aumento", 1)
+    doc.paragraphs(f"{r['instance_name']} – UPSCALE – R$ {v:,.2f}" for r, v in top_cost)
+
+    doc.save(DOCX_PATH)
+    print(f"Relatório Top 5 gerado: {DOCX_PATH}")
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description="Relatório Word TOP 5 FinOps a partir da última coleta (METRICS_DAYS)").parse_args()
+    generate()
@@ -0,0 +1,181 @@
+"""
+Exporter Prometheus/OpenMetrics de CPU/Memória das instâncias RUNNING.
+
+Uma thread em segundo plano atualiza o coletor de tempo real
+(oci_metrics_cpu_mem_realtime.RealtimeCollector) e pré-renderiza o texto de
+/metrics; cada scrape só devolve os bytes já prontos, sem tocar na OCI.
+
+Uso:
+    python src/oci_metrics_exporter.py --port 9877 --refresh 60
+"""
+import os
+import time
+import argparse
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from oci_metrics_cpu_mem_realtime import RealtimeCollector
+
+# ================= CONFIG =================
+BIND = os.getenv("EXPORTER_BIND", "0.0.0.0")
+PORT = int(os.getenv("EXPORTER_PORT", "9877"))
+REFRESH = float(os.getenv("EXPORTER_REFRESH", "60"))
+
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# "instance" é o rótulo do alvo no Prometheus (viraria exported_instance)
+LABELS = ("region", "compartment", "shape", "instance_name", "instance_ocid")
+GAUGES = [
+    ("oci_instance_cpu_utilization_percent", "CPU do intervalo mais recente (%)", "cpu"),
+    ("oci_instance_cpu_utilization_avg_percent", "CPU média da janela móvel (%)", "cpu_avg"),
+    ("oci_instance_cpu_utilization_max_percent", "CPU máxima da janela móvel (%)", "cpu_max"),
+    ("oci_instance_memory_utilization_percent", "Memória do intervalo mais recente (%)", "mem"),
+    ("oci_instance_memory_utilization_avg_percent", "Memória média da janela móvel (%)", "mem_avg"),
+    ("oci_instance_memory_utilization_max_percent", "Memória máxima da janela móvel (%)", "mem_max"),
+]
+# contadores acumulados desde o início do processo (família, ajuda, chave em meta)
+COUNTERS = [
+    ("oci_exporter_query_errors", "Consultas de métricas com erro desde o início", "errors"),
+]
+# =========================================
+
+
+# ---------- renderização ----------
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(rows, meta):
+    """Texto de exposição (formato Prometheus) do snapshot."""
+    lines = []
+    labels = [
+        ",".join(f'{k}="{escape(v)}"' for k, v in zip(LABELS, (
+            r["region"], r["compartment"], r["shape"], r["instance_name"], r["instance_ocid"]
+        )))
+        for r in rows
+    ]
+    for name, help_text, key in GAUGES:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for r, lbl in zip(rows, labels):
+            if r[key] is not None:
+                lines.append(f"{name}{{{lbl}}} {r[key]:.3f}")
+
+    for name, help_text, kind, value in (
+        ("oci_exporter_up", "1 se a última atualização funcionou", "gauge", meta["up"]),
+        ("oci_exporter_instances", "Instâncias RUNNING acompanhadas", "gauge", len(rows)),
+        ("oci_exporter_last_refresh_timestamp_seconds", "Fim da última atualização (epoch)", "gauge", meta["ts"]),
+        ("oci_exporter_refresh_duration_seconds", "Duração da última atualização", "gauge", meta["duration"]),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def render_counters(meta, openmetrics=False):
+    """
+    Contadores: a amostra sempre termina em _total; no OpenMetrics o HELP/TYPE
+    usam o nome da família (sem o sufixo), no formato Prometheus o da amostra.
+    """
+    lines = []
+    for family, help_text, key in COUNTERS:
+        name = family if openmetrics else f"{family}_total"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{family}_total {meta[key]}")
+    return "\n".join(lines) + "\n"
+
+
+class Snapshot:
+    """Corpo pré-renderizado nos dois formatos; trocado por referência a cada atualização."""
+    __slots__ = ("prometheus", "openmetrics")
+
+    def __init__(self, text, meta):
+        self.prometheus = (text + render_counters(meta)).encode()
+        self.openmetrics = (text + render_counters(meta, openmetrics=True) + "# EOF\n").encode()
+
+
+# ---------- atualização em segundo plano ----------
+class Exporter:
+    def __init__(self, refresh=REFRESH):
+        self.refresh = refresh
+        self.collector = RealtimeCollector()
+        meta = {"up": 0, "ts": 0, "duration": 0, "errors": 0}
+        self.snapshot = Snapshot(render([], meta), meta)
+
+    def update(self):
+        started = time.monotonic()
+        up = 1
+        try:
+            self.collector.poll()
+        except Exception:
+            up = 0
+            traceback.print_exc()
+        meta = {
+            "up": up,
+            "ts": int(time.time()),
+            "duration": round(time.monotonic() - started, 3),
+            "errors": self.collector.errors,
+        }
+        self.snapshot = Snapshot(render(self.collector.snapshot(), meta), meta)
+
+    def loop(self):
+        while True:
+            started = time.monotonic()
+            self.update()
+            time.sleep(max(1.0, self.refresh - (time.monotonic() - started)))
+
+    def start(self):
+        threading.Thread(target=self.loop, name="exporter-refresh", daemon=True).start()
+
+
+def make_handler(exporter):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] == "/metrics":
+                snap = exporter.snapshot
+                if "application/openmetrics-text" in self.headers.get("Accept", ""):
+                    body, ctype = snap.openmetrics, OPENMETRICS_TYPE
+                else:
+                    body, ctype = snap.prometheus, PROMETHEUS_TYPE
+                self.send_response(200)
+            elif self.path == "/healthz":
+                body, ctype = b"ok\n", "text/plain"
+                self.send_response(200)
+            else:
+                body, ctype = b"/metrics\n", "text/plain"
+                self.send_response(404)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    p = argparse.ArgumentParser(description="Exporter Prometheus de CPU/Memória das instâncias OCI")
+    p.add_argument("--bind", default=BIND)
+    p.add_argument("--port", type=int, default=PORT)
+    p.add_argument("--refresh", type=float, default=REFRESH, help="segundos entre atualizações na OCI")
+    args = p.parse_args()
+
+    exporter = Exporter(args.refresh)
+    exporter.start()
+    server = ThreadingHTTPServer((args.bind, args.port), make_handler(exporter))
+    server.daemon_threads = True
+    print(f"📡 Exporter em http://{args.bind}:{args.port}/metrics (atualização a cada {args.refresh:g}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nEncerrado.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ---------- helpers ----------
+def interleave_by_key(tasks):
+    """
+    Reordena os índices das tarefas alternando entre as chaves (ex.: regiões),
+    para que o pool global não fique parado esperando o limite de uma só região.
+    """
+    queues = defaultdict(list)
+    order = []
+    for idx, (key, _fn) in enumerate(tasks):
+        if key not in queues:
+            order.append(key)
+        queues[key].append(idx)
+
+    result = []
+    pos = 0
+    while len(result) < len(tasks):
+        for key in order:
+            if pos < len(queues[key]):
+                result.append(queues[key][pos])
+        pos += 1
+    return result
+
+
+def run_ordered(tasks, workers, per_key):
+    """
+    Executa tarefas (key, fn) em um pool limitado e devolve os resultados
+    na mesma ordem da lista de entrada.
+
+    - workers: limite global de threads
+    - per_key: limite de tarefas simultâneas por chave (ex.: região)
+    """
+    if not tasks:
+        return []
+
+    workers = max(1, workers)
+    per_key = max(1, per_key)
+    semaphores = defaultdict(lambda: threading.BoundedSemaphore(per_key))
+    for key, _fn in tasks:
+        semaphores[key]
+
+    def run(key, fn):
+        with semaphores[key]:
+            return fn()
+
+    results = [None] * len(tasks)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for idx in interleave_by_key(tasks):
+            key, fn = tasks[idx]
+            futures[idx] = pool.submit(run, key, fn)
+        try:
+            for idx in range(len(tasks)):
+                results[idx] = futures[idx].result()
+        except BaseException:
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+    return results
@@ -0,0 +1,175 @@
+"""
+Preços de compute (OCPU e GB de memória por hora) e custo mensal da frota.
+
+A tabela de preços é um arquivo local versionado (src/oci_prices.json ou
+OCI_PRICE_LIST), com preços por família de shape em cada moeda. Um CSV
+também é aceito (colunas family, currency, ocpu, mem; a versão é o nome
+do arquivo).
+
+A família de cada shape sai dos segmentos do nome ("VM.Standard.E4.Flex"
+-> E4; apelidos como Standard3 -> X9) e fica memorizada, então cada shape
+distinto é resolvido uma vez. fleet_costs calcula o custo mensal atual e
+o de destino da frota inteira de uma vez (numpy), sem laço por linha.
+
+Uso (tabela carregada e custo de exemplo):
+    python src/oci_pricing.py
+    python src/oci_pricing.py --currency USD --shape VM.Standard.E5.Flex --ocpus 4 --memory 64
+"""
+import argparse
+import csv
+import json
+import os
+import threading
+
+PRICE_LIST = os.getenv("OCI_PRICE_LIST", os.path.join(os.path.dirname(os.path.abspath(__file__)), "oci_prices.json"))
+HOURS_MONTH = 730
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+class PriceList:
+    def __init__(self, families, version="", source="", currencies=None, aliases=None,
+                 default_family="E4", hours_month=HOURS_MONTH):
+        self.families = families            # família -> moeda -> {"ocpu", "mem"}
+        self.version = version
+        self.source = source
+        self.currencies = currencies or sorted({c for prices in families.values() for c in prices})
+        self.aliases = {k.upper(): v for k, v in (aliases or {}).items()}
+        self.default_family = default_family
+        self.hours_month = hours_month
+        self._family = {}                   # shape -> família (memorizado)
+        self._units = {}                    # (shape, moeda) -> (ocpu, mem)
+
+    # ---------- carga ----------
+    @classmethod
+    def load(cls, path=PRICE_LIST):
+        if path.lower().endswith(".csv"):
+            families = {}
+            with open(path, newline="", encoding="utf-8") as f:
+                for r in csv.DictReader(f):
+                    families.setdefault(r["family"].upper(), {})[r["currency"].upper()] = {
+                        "ocpu": float(r["ocpu"]), "mem": float(r["mem"]),
+                    }
+            return cls(families, version=os.path.basename(path))
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            data["families"],
+            version=data.get("version", ""),
+            source=data.get("source", ""),
+            currencies=data.get("currencies"),
+            aliases=data.get("aliases"),
+            default_family=data.get("default_family", "E4"),
+            hours_month=data.get("hours_month", HOURS_MONTH),
+        )
+
+    # ---------- consulta ----------
+    def family(self, shape):
+        """Família de preço do shape (a padrão quando nenhum segmento é conhecido)."""
+        fam = self._family.get(shape)
+        if fam is None:
+            fam = self.default_family
+            for part in (shape or "").upper().split("."):
+                if part in self.families:
+                    fam = part
+                    break
+                if part in self.aliases:
+                    fam = self.aliases[part]
+                    break
+            self._family[shape] = fam
+        return fam
+
+    def unit_prices(self, shape, currency):
+        """(preço/hora por OCPU, preço/hora por GB de memória)."""
+        key = (shape, currency)
+        units = self._units.get(key)
+        if units is None:
+            prices = self.families.get(self.family(shape)) or self.families[self.default_family]
+            if currency not in prices:
+                raise KeyError(f"moeda {currency} ausente na tabela de preços {self.version}")
+            units = self._units[key] = (prices[currency]["ocpu"], prices[currency]["mem"])
+        return units
+
+    def monthly_cost(self, shape, ocpus, memory_gb, currency):
+        ocpu_price, mem_price = self.unit_prices(shape, currency)
+        return ((ocpus or 0) * ocpu_price + (memory_gb or 0) * mem_price) * self.hours_month
+
+    def unit_arrays(self, shapes, currency):
+        """Preços/hora de OCPU e memória alinhados com `shapes` (um lookup por shape distinto)."""
+        import numpy as np
+
+        index = {}
+        codes = np.fromiter((index.setdefault(s, len(index)) for s in shapes), dtype=np.int64, count=len(shapes))
+        table = np.array([self.unit_prices(s, currency) for s in index], dtype=float).reshape(-1, 2)
+        return table[codes, 0], table[codes, 1]
+
+    def fleet_costs(self, shapes, ocpus, memory_gb, currency, target_ocpus=None, target_memory_gb=None):
+        """
+        Custo mensal de toda a frota em uma chamada vetorizada. Retorna
+        `current` (np.ndarray) ou, com os alvos, (current, target).
+        Valores ausentes (None/NaN) contam como zero.
+        """
+        import numpy as np
+
+        ocpu_price, mem_price = self.unit_arrays(shapes, currency)
+
+        def cost(o, m):
+            o = np.nan_to_num(np.asarray(o, dtype=float))
+            m = np.nan_to_num(np.asarray(m, dtype=float))
+            return (o * ocpu_price + m * mem_price) * self.hours_month
+
+        current = cost(ocpus, memory_gb)
+        if target_ocpus is None and target_memory_gb is None:
+            return current
+        target = cost(ocpus if target_ocpus is None else target_ocpus,
+                      memory_gb if target_memory_gb is None else target_memory_gb)
+        return current, target
+
+
+def get_prices(path=PRICE_LIST):
+    """Tabela carregada uma vez por processo (e por caminho)."""
+    with _lock:
+        prices = _loaded.get(path)
+        if prices is None:
+            prices = _loaded[path] = PriceList.load(path)
+        return prices
+
+
+def as_floats(values):
+    """Colunas vindas de CSV ("", "no-data", texto) -> float, NaN quando não numérico."""
+    out = []
+    for v in values:
+        try:
+            out.append(float(v))
+        except (TypeError, ValueError):
+            out.append(float("nan"))
+    return out
+
+
+# ---------- main ----------
+def main():
+    p = argparse.ArgumentParser(description="Tabela de preços de compute OCI e custo mensal estimado")
+    p.add_argument("--prices", default=PRICE_LIST, help="tabela JSON/CSV (OCI_PRICE_LIST)")
+    p.add_argument("--currency", default="BRL")
+    p.add_argument("--shape")
+    p.add_argument("--ocpus", type=float, default=1.0)
+    p.add_argument("--memory", type=float, default=16.0, help="GB")
+    args = p.parse_args()
+
+    prices = PriceList.load(args.prices)
+    print(f"💲 Tabela {prices.version} ({', '.join(prices.currencies)}) – {prices.source or args.prices}")
+    print(f"   {'FAMÍLIA':8} " + " ".join(f"{c + ' OCPU/h':>14} {c + ' GB/h':>12}" for c in prices.currencies))
+    for fam, by_currency in prices.families.items():
+        print(f"   {fam:8} " + " ".join(
+            f"{by_currency.get(c, {}).get('ocpu', float('nan')):14.6f} {by_currency.get(c, {}).get('mem', float('nan')):12.7f}"
+            for c in prices.currencies
+        ))
+    if args.shape:
+        cost = prices.monthly_cost(args.shape, args.ocpus, args.memory, args.currency)
+        print(f"\n{args.shape} ({prices.family(args.shape)}), {args.ocpus:g} OCPUs, {args.memory:g} GB: "
+              f"{args.currency} {cost:,.2f}/mês")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Limitador de taxa compartilhado para chamadas à API da OCI.
+
+- Um token bucket por (região, API), único no processo.
+- A taxa é aprendida com AIMD: sobe aos poucos a cada sucesso e cai pela
+  metade a cada HTTP 429.
+- Retentativas com backoff exponencial com jitter, respeitando Retry-After.
+"""
+import logging
+import os
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+from oci_telemetry import record_retry
+
+RATE_INITIAL = float(os.getenv("OCI_RATE_INITIAL", "10"))   # req/s por (região, API)
+RATE_MIN = float(os.getenv("OCI_RATE_MIN", "0.5"))
+RATE_MAX = float(os.getenv("OCI_RATE_MAX", "100"))
+RATE_STEP = float(os.getenv("OCI_RATE_STEP", "1"))          # +req/s por segundo sem 429
+BURST = float(os.getenv("OCI_RATE_BURST", "5"))
+
+MAX_RETRIES = int(os.getenv("OCI_MAX_RETRIES", "8"))
+BACKOFF_BASE = float(os.getenv("OCI_BACKOFF_BASE", "1"))
+BACKOFF_CAP = float(os.getenv("OCI_BACKOFF_CAP", "60"))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+logger = logging.getLogger("oci-ratelimit")
+
+# região no host (telemetry.sa-saopaulo-1.oraclecloud.com) ou no caminho
+# de um endpoint customizado (http://127.0.0.1:8765/sa-saopaulo-1)
+_REGION_RE = re.compile(r"[./]([a-z]+-[a-z]+-\d+)(?:[./]|$)")
+
+
+class TokenBucket:
+    def __init__(self, rate=RATE_INITIAL, burst=BURST):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def on_success(self):
+        # aumento aditivo: ~RATE_STEP req/s a cada segundo de tráfego sem 429
+        with self.lock:
+            self.rate = min(RATE_MAX, self.rate + RATE_STEP / self.rate)
+
+    def on_throttle(self, delay):
+        # redução multiplicativa (uma vez por janela) e pausa do bucket inteiro
+        with self.lock:
+            now = time.monotonic()
+            if now - self.last_decrease >= 1.0 / self.rate:
+                self.rate = max(RATE_MIN, self.rate / 2)
+                self.last_decrease = now
+            self.tokens = 0
+            self.paused_until = max(self.paused_until, now + delay)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+# ---------- helpers ----------
+def region_of(client):
+    endpoint = getattr(getattr(client, "base_client", None), "endpoint", "") or ""
+    match = _REGION_RE.search(endpoint)
+    return match.group(1) if match else endpoint
+
+
+def get_bucket(region, api):
+    with _buckets_lock:
+        key = (region, api)
+        if key not in _buckets:
+            _buckets[key] = TokenBucket()
+        return _buckets[key]
+
+
+def retry_after(error):
+    headers = getattr(error, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff(attempt):
+    # full jitter: aleatório entre 0 e base * 2^tentativa (limitado)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def call(fn, *args, **kwargs):
+    """
+    Chama um método de cliente OCI (ex.: monitoring.summarize_metrics_data)
+    passando pelo limitador da (região, API) e com retentativas.
+    """
+    import oci  # já carregado por quem criou o cliente
+
+    region = region_of(getattr(fn, "__self__", None))
+    api = getattr(fn, "__name__", "call")
+    bucket = get_bucket(region, api)
+    # o limitador cuida das retentativas; desliga a estratégia padrão do SDK
+    kwargs.setdefault("retry_strategy", oci.retry.NoneRetryStrategy())
+
+    for attempt in range(MAX_RETRIES + 1):
+        bucket.acquire()
+        try:
+            resp = fn(*args, **kwargs)
+        except oci.exceptions.ServiceError as e:
+            if e.status not in RETRYABLE_STATUS or attempt == MAX_RETRIES:
+                raise
+            delay = retry_after(e)
+            if delay is None:
+                delay = backoff(attempt)
+            if e.status == 429:
+                bucket.on_throttle(delay)
+            logger.debug(
+                "%s %s status=%s opc-request-id=%s tentativa=%d espera=%.1fs",
+                region, api, e.status, getattr(e, "request_id", None), attempt + 1, delay
+            )
+            record_retry(region, api, delay)
+            time.sleep(delay)
+            continue
+        bucket.on_success()
+        return resp
+
+
+def limited(fn):
+    """Versão de `fn` que passa por `call` (útil com oci.pagination)."""
+    def wrapper(*args, **kwargs):
+        return call(fn, *args, **kwargs)
+    wrapper.__name__ = getattr(fn, "__name__", "call")
+    return wrapper
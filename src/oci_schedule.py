@@ -0,0 +1,303 @@
+"""
+Perfil semanal de utilização (dia da semana x hora) e agendas de start/stop.
+
+O coletor (oci_metrics_cpu_mem_media_ndays) monta o perfil a partir dos
+mesmos datapoints das estatísticas, sem chamadas extras: média de CPU e de
+memória em cada uma das 168 horas da semana, no fuso SCHEDULE_TZ. Os perfis
+ficam em um .npz ao lado do CSV (uma matriz float32 instâncias x 168 por
+métrica, NaN onde não houve dado).
+
+A varredura é vetorizada sobre a frota inteira: uma hora é ociosa quando a
+CPU média fica abaixo de SCHEDULE_IDLE_CPU; cada agenda candidata é uma
+máscara das horas em que a instância ficaria desligada e serve para a
+instância quando pelo menos SCHEDULE_MIN_IDLE dessas horas são ociosas.
+A economia é o custo de OCPU + memória (oci_pricing; parada, a instância
+não cobra compute) proporcional às horas desligadas no mês.
+
+Uso (perfis da última coleta):
+    python src/oci_schedule.py
+    python src/oci_schedule.py --profiles ~/Relatorio_CPU_Memoria_media_30d_multi_region.profiles.npz
+"""
+import argparse
+import csv
+import os
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+# ================= CONFIG =================
+HOME = os.path.expanduser("~")
+DAYS = int(os.getenv("METRICS_DAYS", "30"))
+CSV_PATH = os.path.join(HOME, f"Relatorio_CPU_Memoria_media_{DAYS}d_multi_region.csv")
+DEFAULT_PATH = os.path.splitext(CSV_PATH)[0] + ".profiles.npz"
+OUT_CSV = os.path.join(HOME, f"Relatorio_FinOps_Agendamento_{DAYS}d.csv")
+
+TZ = os.getenv("SCHEDULE_TZ", "America/Sao_Paulo")
+IDLE_CPU = float(os.getenv("SCHEDULE_IDLE_CPU", "5"))       # % de CPU média na hora
+MIN_IDLE = float(os.getenv("SCHEDULE_MIN_IDLE", "0.9"))     # fração das horas desligadas que precisa ser ociosa
+CURRENCY = os.getenv("SCHEDULE_CURRENCY", "USD")             # moeda da tabela de preços
+# =========================================
+
+SLOTS = 7 * 24
+WEEKDAYS = ("seg", "ter", "qua", "qui", "sex", "sáb", "dom")
+
+
+def off_mask(days=range(7), hours=range(24)):
+    """Máscara (168,) das horas desligadas: `hours` (locais) nos `days` (0 = segunda)."""
+    mask = np.zeros((7, 24), dtype=bool)
+    mask[np.ix_(list(days), list(hours))] = True
+    return mask.reshape(SLOTS)
+
+
+NIGHTS = list(range(20, 24)) + list(range(0, 7))
+
+# da agenda que desliga mais para a que desliga menos; fica a primeira que serve
+SCHEDULES = (
+    ("noites_e_fds", "seg-sex 20h-07h + sáb e dom", off_mask(range(5), NIGHTS) | off_mask(range(5, 7))),
+    ("noites", "todo dia 20h-07h", off_mask(hours=NIGHTS)),
+    ("fds", "sáb e dom o dia todo", off_mask(range(5, 7))),
+    ("madrugada", "todo dia 00h-06h", off_mask(hours=range(0, 6))),
+)
+MASKS = np.array([mask for _name, _desc, mask in SCHEDULES])
+
+
+# ---------- helpers ----------
+def get_tz(name=TZ):
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        print(f"⚠️ Fuso {name} indisponível; perfis em UTC.")
+        return timezone.utc
+
+
+def week_slots(ts, tz):
+    """
+    Hora da semana (0 = segunda 00h) de cada timestamp em epoch. O ponto
+    cobre o intervalo que termina em `ts`, por isso conta na hora de ts - 1.
+    O deslocamento do fuso é calculado uma vez por hora UTC distinta.
+    """
+    ts = ts - 1
+    hours, inverse = np.unique(ts // 3600, return_inverse=True)
+    offsets = np.array([
+        datetime.fromtimestamp(int(h) * 3600, tz).utcoffset().total_seconds() for h in hours
+    ], dtype=np.int64)
+    local = ts + offsets[inverse]
+    # 01/01/1970 foi uma quinta-feira (3)
+    return ((local // 86400 + 3) % 7) * 24 + local // 3600 % 24
+
+
+def describe_slot(slot):
+    return f"{WEEKDAYS[slot // 24]} {slot % 24:02d}h"
+
+
+class Profiles:
+    """Perfis semanais acumulados durante a coleta (um por instância e métrica)."""
+
+    def __init__(self, tz=None):
+        self.tz = tz or get_tz()
+        self.data = {"cpu": {}, "mem": {}}
+        self.lock = threading.Lock()
+
+    def add(self, metric, ids, series):
+        """`series`: {instance_id: [(ts, value), ...]}; uma passada vetorizada no lote."""
+        counts = [len(series.get(i, ())) for i in ids]
+        total = sum(counts)
+        if not total:
+            return
+        ts = np.fromiter((t for i in ids for t, _v in series.get(i, ())), dtype=np.int64, count=total)
+        values = np.fromiter((v for i in ids for _t, v in series.get(i, ())), dtype=float, count=total)
+        index = np.repeat(np.arange(len(ids)), counts) * SLOTS + week_slots(ts, self.tz)
+        sums = np.bincount(index, weights=values, minlength=len(ids) * SLOTS)
+        hits = np.bincount(index, minlength=len(ids) * SLOTS)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = (sums / hits).astype(np.float32).reshape(len(ids), SLOTS)
+        with self.lock:
+            self.data[metric].update((i, means[pos]) for pos, i in enumerate(ids) if counts[pos])
+
+    def export(self, ids):
+        """{instance_id: {"cpu": [...], "mem": [...]}} para o journal (None onde não houve dado)."""
+        result = {}
+        with self.lock:
+            for i in ids:
+                profile = {
+                    metric: [None if np.isnan(v) else round(float(v), 3) for v in self.data[metric][i]]
+                    for metric in ("cpu", "mem") if i in self.data[metric]
+                }
+                if profile:
+                    result[i] = profile
+        return result
+
+    def restore(self, profiles):
+        """Recarrega perfis exportados (coleta retomada a partir do journal)."""
+        with self.lock:
+            for i, profile in profiles.items():
+                for metric, values in profile.items():
+                    self.data[metric][i] = np.array([np.nan if v is None else v for v in values], dtype=np.float32)
+
+    def save(self, path):
+        ids = sorted(set(self.data["cpu"]) | set(self.data["mem"]))
+        empty = np.full(SLOTS, np.nan, dtype=np.float32)
+        write_profiles(
+            path, ids,
+            np.array([self.data["cpu"].get(i, empty) for i in ids], dtype=np.float32).reshape(-1, SLOTS),
+            np.array([self.data["mem"].get(i, empty) for i in ids], dtype=np.float32).reshape(-1, SLOTS),
+            self.tz,
+        )
+        return len(ids)
+
+
+def write_profiles(path, ids, cpu, mem, tz):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, ids=np.array(ids, dtype=str), cpu=cpu, mem=mem, tz=np.array(str(tz)))
+    os.replace(tmp, path)
+
+
+def merge_profiles(paths, out):
+    """Junta os .npz dos shards (instâncias disjuntas) em um único arquivo."""
+    zones = set()
+    for path in paths:
+        with np.load(os.path.expanduser(path)) as data:
+            zones.add(str(data["tz"]))
+    if len(zones) > 1:
+        raise SystemExit(f"❌ Perfis dos shards em fusos diferentes: {sorted(zones)}")
+    ids, cpu, mem = load_profiles(paths)
+    write_profiles(out, ids, cpu, mem, zones.pop() if zones else TZ)
+    return len(ids)
+
+
+def load_profiles(paths):
+    """(ids, cpu, mem) de um ou mais .npz (ex.: um por shard)."""
+    ids, cpu, mem = [], [], []
+    for path in paths:
+        with np.load(os.path.expanduser(path)) as data:
+            ids.extend(data["ids"].tolist())
+            cpu.append(data["cpu"])
+            mem.append(data["mem"])
+    if not ids:
+        return [], np.empty((0, SLOTS), np.float32), np.empty((0, SLOTS), np.float32)
+    return ids, np.concatenate(cpu), np.concatenate(mem)
+
+
+# ---------- varredura ----------
+def longest_run(mask):
+    """Maior sequência circular de True por linha: (tamanho, hora de início)."""
+    n = mask.shape[0]
+    doubled = np.concatenate([mask, mask], axis=1).astype(np.int32)
+    cum = np.cumsum(doubled, axis=1)
+    # a soma acumulada "zera" em cada False: subtrai o valor no último False
+    reset = np.maximum.accumulate(np.where(doubled == 0, cum, 0), axis=1)
+    runs = cum - reset
+    end = runs.argmax(axis=1)
+    length = np.minimum(runs[np.arange(n), end], SLOTS)
+    start = (end - length + 1) % SLOTS
+    return length, start
+
+
+def fit_schedules(cpu, idle_cpu=IDLE_CPU, min_idle=MIN_IDLE):
+    """
+    Varre a frota de uma vez. `cpu`: (instâncias, 168). Retorna dict com
+    "idle" (horas ociosas por semana), "window"/"window_start" (maior janela
+    ociosa contínua), "fit" (instâncias x agendas, bool) e "best" (índice da
+    agenda escolhida em SCHEDULES, -1 se nenhuma serve).
+    """
+    known = ~np.isnan(cpu)
+    idle = known & (np.nan_to_num(cpu, nan=np.inf) < idle_cpu)
+    # fração ociosa de cada agenda = horas ociosas na máscara / horas da máscara
+    ratio = (idle.astype(np.float32) @ MASKS.T.astype(np.float32)) / MASKS.sum(axis=1)
+    covered = (known.astype(np.float32) @ MASKS.T.astype(np.float32)) / MASKS.sum(axis=1)
+    fit = (ratio >= min_idle) & (covered >= min_idle)
+    best = np.where(fit.any(axis=1), fit.argmax(axis=1), -1)
+    window, window_start = longest_run(idle)
+    return {"idle": idle.sum(axis=1), "window": window, "window_start": window_start,
+            "fit": fit, "best": best}
+
+
+def monthly_savings(shapes, ocpus, memory_gb, best):
+    """Economia/mês (CURRENCY) de desligar cada instância nas horas da agenda `best`."""
+    from oci_pricing import get_prices
+
+    off_hours = np.where(best >= 0, MASKS.sum(axis=1)[np.maximum(best, 0)], 0)
+    return get_prices().fleet_costs(shapes, ocpus, memory_gb, CURRENCY) * off_hours / SLOTS
+
+
+def schedule_rows(ids, cpu, specs):
+    """
+    Uma linha por instância com a agenda sugerida e a economia estimada.
+    `specs`: {instance_ocid: (shape, ocpus, memory_gb)}.
+    """
+    from oci_pricing import as_floats
+
+    scan = fit_schedules(cpu)
+    shape, ocpus, memory = zip(*[specs.get(i, (None, None, None)) for i in ids]) if ids else ((), (), ())
+    savings = monthly_savings(list(shape), as_floats(ocpus), as_floats(memory), scan["best"])
+    rows = []
+    for pos, i in enumerate(ids):
+        best = scan["best"][pos]
+        window = int(scan["window"][pos])
+        rows.append({
+            "instance_ocid": i,
+            "idle_hours_week": int(scan["idle"][pos]),
+            "longest_idle_window": (f"{describe_slot(int(scan['window_start'][pos]))} +{window}h"
+                                    if window else ""),
+            "suggested_schedule": SCHEDULES[best][0] if best >= 0 else "",
+            "schedule_off_hours_week": int(MASKS[best].sum()) if best >= 0 else 0,
+            "schedule_savings_month": round(float(savings[pos]), 2),
+        })
+    return rows
+
+
+def load_specs(path):
+    """{instance_ocid: linha} do CSV do coletor (nome, shape, OCPUs, memória)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline="", encoding="utf-8") as f:
+        return {r["instance_ocid"]: r for r in csv.DictReader(f) if r.get("instance_ocid")}
+
+
+# ---------- main ----------
+def main():
+    p = argparse.ArgumentParser(description="Janelas ociosas e agendas de start/stop a partir dos perfis semanais")
+    p.add_argument("--profiles", nargs="+", default=[DEFAULT_PATH], help="arquivos .npz do coletor")
+    p.add_argument("--csv", default=CSV_PATH, help="CSV do coletor (nomes, OCPUs e memória)")
+    p.add_argument("--output", default=OUT_CSV)
+    args = p.parse_args()
+
+    missing = [path for path in args.profiles if not os.path.exists(os.path.expanduser(path))]
+    if missing:
+        p.error(f"perfis não encontrados: {', '.join(missing)} (rode a coleta no modo raw)")
+
+    ids, cpu, _mem = load_profiles(args.profiles)
+    info = load_specs(os.path.expanduser(args.csv))
+    specs = {i: (r.get("shape"), r.get("ocpus"), r.get("memory_gb")) for i, r in info.items()}
+    rows = schedule_rows(ids, cpu, specs)
+    for r in rows:
+        extra = info.get(r["instance_ocid"], {})
+        r.update({k: extra.get(k, "") for k in ("region", "compartment", "instance_name", "shape", "ocpus", "memory_gb")})
+
+    print(f"\n🕒 Perfis de {len(ids)} instâncias (CPU ociosa < {IDLE_CPU:g}%, "
+          f"agenda serve com {MIN_IDLE:.0%} das horas desligadas ociosas)\n")
+    for n, (name, desc, mask) in enumerate(SCHEDULES):
+        chosen = [r for r in rows if r["suggested_schedule"] == name]
+        total = sum(r["schedule_savings_month"] for r in chosen)
+        print(f"  {name:14} {desc:28} {int(mask.sum()):3d}h/sem  {len(chosen):6d} instâncias  {CURRENCY} {total:12,.2f}/mês")
+    total = sum(r["schedule_savings_month"] for r in rows)
+    print(f"\n💰 Economia estimada com start/stop: {CURRENCY} {total:,.2f}/mês")
+
+    headers = ["region", "compartment", "instance_name", "instance_ocid", "shape", "ocpus", "memory_gb",
+               "idle_hours_week", "longest_idle_window", "suggested_schedule",
+               "schedule_off_hours_week", "schedule_savings_month"]
+    rows.sort(key=lambda r: r["schedule_savings_month"], reverse=True)
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=headers)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"➡ CSV : {args.output}")
+
+
+if __name__ == "__main__":
+    main()
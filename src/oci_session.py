@@ -0,0 +1,91 @@
+"""
+Configuração e clientes OCI criados sob demanda.
+
+Nada é lido nem construído na importação: o ~/.oci/config, o IdentityClient
+e os clientes regionais são montados no primeiro uso e reaproveitados.
+Os módulos do SDK também só são importados quando um cliente é pedido, então
+`--help` e execuções apenas de relatório não pagam o custo do `import oci`.
+
+Cada cliente sai embrulhado por oci_telemetry.instrument (latência, erros e
+bytes por região/API).
+"""
+import importlib
+import threading
+
+from oci_telemetry import instrument
+
+# tipo -> (módulo do SDK, classe do cliente)
+CLIENTS = {
+    "identity": ("oci.identity", "IdentityClient"),
+    "compute": ("oci.core", "ComputeClient"),
+    "monitoring": ("oci.monitoring", "MonitoringClient"),
+    "search": ("oci.resource_search", "ResourceSearchClient"),
+    "logging": ("oci.logging", "LoggingManagementClient"),
+}
+
+_lock = threading.RLock()
+_config = None
+_identity = None
+_factory = None
+
+
+def get_config():
+    global _config
+    with _lock:
+        if _config is None:
+            import oci
+            _config = oci.config.from_file()
+        return _config
+
+
+def tenancy_id():
+    return get_config()["tenancy"]
+
+
+def region_config(region=None):
+    cfg = dict(get_config())
+    if region:
+        cfg["region"] = region
+    return cfg
+
+
+def set_factory(factory, config=None):
+    """
+    Troca a criação de clientes: `factory(kind, config)` passa a ser usado no
+    lugar das classes do SDK (ex.: clientes falsos do benchmarks/).
+    Com `config`, o ~/.oci/config não é lido. `set_factory(None)` desfaz.
+    """
+    global _config, _factory, _identity
+    with _lock:
+        _factory = factory
+        _config = config
+        _identity = None
+
+
+def make_client(kind, region=None):
+    """Novo cliente do SDK (`kind` em CLIENTS) para a região indicada."""
+    cfg = region_config(region)
+    factory = _factory or sdk_client
+    return instrument(factory(kind, cfg), cfg.get("region"))
+
+
+def sdk_client(kind, config, **kwargs):
+    """
+    Classe do SDK para `kind`, sem o circuit breaker padrão: 429/5xx em
+    sequência abririam o circuito e derrubariam chamadas que o oci_ratelimit
+    ainda ia repetir com backoff.
+    """
+    import oci
+
+    module, name = CLIENTS[kind]
+    cls = getattr(importlib.import_module(module), name)
+    kwargs.setdefault("circuit_breaker_strategy", oci.circuit_breaker.NoCircuitBreakerStrategy())
+    return cls(config, **kwargs)
+
+
+def get_identity():
+    global _identity
+    with _lock:
+        if _identity is None:
+            _identity = make_client("identity")
+        return _identity
@@ -0,0 +1,267 @@
+"""
+Sketches diários mescláveis (histograma de bins fixos) para métricas de
+utilização em %.
+
+Cada (instância, métrica, dia) vira um histograma de 0,1 p.p. com contagem,
+soma, mínimo e máximo exatos. Estatísticas de qualquer janela de N dias saem
+da soma dos histogramas diários, sem refazer a coleta.
+
+Uso (estatísticas de 7 dias a partir dos sketches já gravados):
+    python src/oci_sketch.py --days 7 --names ~/Relatorio_CPU_Memoria_media_30d_multi_region.csv
+"""
+import argparse
+import csv
+import math
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from array import array
+from collections import defaultdict
+from itertools import chain
+
+BIN_WIDTH = 0.1                      # p.p. de utilização
+BINS = int(100 / BIN_WIDTH) + 1      # 0.0 .. 100.0
+DAY = 86400
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".oci_finops", "sketches.sqlite")
+
+_HEADER = struct.Struct("<Iddd")     # count, total, min, max
+
+
+class Sketch:
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = array("I", bytes(4 * BINS))
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.add_many([value])
+
+    def add_many(self, values):
+        """Bina um array de valores de uma vez (numpy)."""
+        import numpy as np
+
+        values = np.asarray(values, dtype=float)
+        if not values.size:
+            return self
+        bins = np.clip(np.rint(values / BIN_WIDTH), 0, BINS - 1).astype(np.int64)
+        counts = np.frombuffer(self.counts, dtype=np.uint32)
+        counts += np.bincount(bins, minlength=BINS).astype(np.uint32)
+        self.count += int(values.size)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        return self
+
+    def merge(self, other):
+        counts = self.counts
+        for b, c in enumerate(other.counts):
+            if c:
+                counts[b] += c
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q):
+        """Nearest-rank sobre os bins (erro máximo de meio bin)."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for b, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                # resultado na precisão do bin (evita 51.800000000000004 no CSV)
+                return round(min(self.max, max(self.min, b * BIN_WIDTH)), 1)
+        return round(self.max, 1)
+
+    def to_bytes(self):
+        # formato esparso: pares (bin, contagem) dos bins não vazios
+        pairs = array("I")
+        for b, c in enumerate(self.counts):
+            if c:
+                pairs.append(b)
+                pairs.append(c)
+        return _HEADER.pack(self.count, self.total, self.min, self.max) + zlib.compress(pairs.tobytes())
+
+    def merge_bytes(self, data):
+        """Mescla um sketch serializado direto dos pares esparsos (O(bins não vazios))."""
+        count, total, lo, hi = _HEADER.unpack_from(data)
+        pairs = array("I")
+        pairs.frombytes(zlib.decompress(data[_HEADER.size:]))
+        counts = self.counts
+        for i in range(0, len(pairs), 2):
+            counts[pairs[i]] += pairs[i + 1]
+        self.count += count
+        self.total += total
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+        return self
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls().merge_bytes(data)
+
+
+def daily_sketches(points, first_day, last_day):
+    """
+    Agrupa [(ts, value)] em sketches por dia (epoch // 86400), apenas para
+    dias completos entre first_day e last_day (inclusive). Cada dia é binado
+    de uma vez (numpy).
+    """
+    import numpy as np
+
+    data = np.fromiter(chain.from_iterable(points), dtype=float, count=2 * len(points)).reshape(-1, 2)
+    days = data[:, 0].astype(np.int64) // DAY
+    keep = (days >= first_day) & (days <= last_day)
+    days, values = days[keep], data[keep, 1]
+    order = np.argsort(days, kind="stable")
+    days, values = days[order], values[order]
+    cuts = np.flatnonzero(np.diff(days)) + 1
+    return {
+        int(d[0]): Sketch().add_many(v)
+        for d, v in zip(np.split(days, cuts), np.split(values, cuts))
+        if d.size
+    }
+
+
+class SketchStore:
+    def __init__(self, path=DEFAULT_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sketches ("
+            " region TEXT NOT NULL, resource_id TEXT NOT NULL, metric TEXT NOT NULL,"
+            " interval TEXT NOT NULL, day INTEGER NOT NULL, data BLOB NOT NULL,"
+            " PRIMARY KEY (region, resource_id, metric, interval, day)) WITHOUT ROWID"
+        )
+
+    def stored_days(self, region, resource_id, metric, interval):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT day FROM sketches WHERE region=? AND resource_id=? AND metric=? AND interval=?",
+                (region, resource_id, metric, interval),
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def store(self, region, resource_id, metric, interval, sketches):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sketches VALUES (?, ?, ?, ?, ?, ?)",
+                [(region, resource_id, metric, interval, day, s.to_bytes()) for day, s in sketches.items()],
+            )
+
+    def update_from_points(self, region, resource_id, metric, interval, points, start_ts, end_ts):
+        """Grava os sketches dos dias completos da janela que ainda não existem."""
+        first_day = -(-start_ts // DAY)        # primeiro dia inteiro dentro da janela
+        last_day = end_ts // DAY - 1           # último dia já encerrado
+        if last_day < first_day:
+            return
+        missing = set(range(first_day, last_day + 1)) - self.stored_days(region, resource_id, metric, interval)
+        if not missing:
+            return
+        sketches = daily_sketches(points, min(missing), max(missing))
+        self.store(region, resource_id, metric, interval,
+                   {d: s for d, s in sketches.items() if d in missing})
+
+    def window(self, metric, interval, first_day, last_day):
+        """Mescla os sketches diários da janela: {(region, resource_id): Sketch}."""
+        merged = defaultdict(Sketch)
+        with self.lock:
+            cursor = self.conn.execute(
+                "SELECT region, resource_id, data FROM sketches "
+                "WHERE metric=? AND interval=? AND day BETWEEN ? AND ?",
+                (metric, interval, first_day, last_day),
+            )
+            for region, resource_id, data in cursor:
+                merged[(region, resource_id)].merge_bytes(data)
+        return merged
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def open_store(path):
+    """`path` vazio ou "off" desativa os sketches."""
+    if not path or path.lower() in ("off", "0", "no", "false"):
+        return None
+    return SketchStore(os.path.expanduser(path))
+
+
+# ---------- CLI ----------
+def load_names(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, newline="", encoding="utf-8") as f:
+        return {r["instance_ocid"]: r for r in csv.DictReader(f) if r.get("instance_ocid")}
+
+
+def main():
+    p = argparse.ArgumentParser(description="Estatísticas de N dias a partir dos sketches diários")
+    p.add_argument("--days", type=int, default=int(os.getenv("METRICS_DAYS", "30")))
+    p.add_argument("--interval", default=os.getenv("METRICS_INTERVAL", "5m"))
+    p.add_argument("--store", default=os.getenv("METRICS_SKETCHES", DEFAULT_PATH))
+    p.add_argument("--names", help="CSV do coletor para trazer nome/compartment das instâncias")
+    p.add_argument("--out", help="CSV de saída")
+    args = p.parse_args()
+
+    store = open_store(args.store)
+    if store is None:
+        print("Sketches desativados.")
+        return
+
+    last_day = int(time.time()) // DAY - 1
+    first_day = last_day - args.days + 1
+    stats = {}
+    for metric, prefix in (("CpuUtilization", "cpu"), ("MemoryUtilization", "mem")):
+        for key, sketch in store.window(metric, args.interval, first_day, last_day).items():
+            stats.setdefault(key, {}).update({
+                f"{prefix}_mean_percent": sketch.mean(),
+                f"{prefix}_p95_percent": sketch.quantile(0.95),
+                f"{prefix}_p99_percent": sketch.quantile(0.99),
+                f"{prefix}_max_percent": sketch.max,
+            })
+    store.close()
+
+    if not stats:
+        print("Nenhum sketch encontrado para a janela.")
+        return
+
+    names = load_names(os.path.expanduser(args.names) if args.names else None)
+    out = os.path.expanduser(args.out or os.path.join("~", f"Relatorio_CPU_Memoria_sketch_{args.days}d.csv"))
+    headers = ["region", "compartment", "instance_name", "instance_ocid"] + [
+        f"{p}_{s}_percent" for p in ("cpu", "mem") for s in ("mean", "p95", "p99", "max")
+    ]
+    with open(out, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=headers)
+        writer.writeheader()
+        for (region, resource_id), values in sorted(stats.items()):
+            info = names.get(resource_id, {})
+            writer.writerow({
+                "region": region,
+                "compartment": info.get("compartment", ""),
+                "instance_name": info.get("instance_name", ""),
+                "instance_ocid": resource_id,
+                **values,
+            })
+
+    print(f"✅ Estatísticas de {args.days} dias ({len(stats)} instâncias): {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Motor de estatísticas vetorizado (NumPy) para séries de utilização.
+
+Definição única de percentil para todos os scripts: nearest-rank, ou seja,
+o menor valor cujo rank (1..n) é >= ceil(q * n).
+"""
+import math
+
+import numpy as np
+
+QUANTILES = (0.50, 0.90, 0.95, 0.99)
+
+
+def rank_index(n, q):
+    """Índice (0-based) do percentil q em uma série ordenada de n pontos."""
+    return min(n - 1, max(0, math.ceil(q * n) - 1))
+
+
+def mean_p95(values):
+    if not values:
+        return None, None
+    arr = np.asarray(values, dtype=float)
+    k = rank_index(arr.size, 0.95)
+    return float(arr.mean()), float(np.partition(arr, k)[k])
+
+
+def fleet_stats(series, expected_points=None):
+    """
+    Estatísticas de várias séries (listas de tamanhos diferentes) de uma vez.
+
+    As séries são agrupadas por tamanho e cada grupo vira uma matriz;
+    percentis saem de np.partition (seleção) em vez de ordenação completa.
+
+    Retorna {nome: np.ndarray} com "mean", "p50", "p90", "p95", "p99",
+    "max", "std", "count" e "coverage" (NaN quando a série está vazia).
+    """
+    lengths = np.fromiter((len(s) for s in series), dtype=np.int64, count=len(series))
+    out = {
+        name: np.full(len(series), np.nan)
+        for name in ("mean", "std", "max") + tuple(f"p{int(q * 100)}" for q in QUANTILES)
+    }
+
+    for n in np.unique(lengths):
+        if n == 0:
+            continue
+        n = int(n)
+        rows = np.flatnonzero(lengths == n)
+        mat = np.array([series[i] for i in rows], dtype=float).reshape(len(rows), n)
+
+        kth = sorted({rank_index(n, q) for q in QUANTILES} | {n - 1})
+        part = np.partition(mat, kth, axis=1)
+
+        for q in QUANTILES:
+            out[f"p{int(q * 100)}"][rows] = part[:, rank_index(n, q)]
+        out["max"][rows] = part[:, n - 1]
+        out["mean"][rows] = mat.mean(axis=1)
+        out["std"][rows] = mat.std(axis=1)
+
+    out["count"] = lengths
+    if expected_points:
+        out["coverage"] = np.minimum(1.0, lengths / float(expected_points)) * 100
+    else:
+        out["coverage"] = np.where(lengths > 0, 100.0, 0.0)
+    return out
+
+
+def as_python(value):
+    """np.float64/NaN -> float/None (para CSV/XLSX)."""
+    value = float(value)
+    return None if math.isnan(value) else value
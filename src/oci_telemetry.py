@@ -0,0 +1,234 @@
+"""
+Telemetria das chamadas à API da OCI.
+
+Todo cliente criado por oci_session.make_client passa por `instrument`, que
+mede cada chamada (inclusive cada página do oci.pagination e cada tentativa
+feita pelo oci_ratelimit) e acumula, por (região, API):
+
+- quantidade de chamadas, erros por status HTTP e 429 (throttle);
+- retentativas e tempo de espera entre elas (informados pelo oci_ratelimit);
+- latência (histograma + p50/p95/máx);
+- bytes recebidos (Content-Length da resposta).
+
+No fim do processo grava um JSON com as estatísticas e imprime um resumo.
+OCI_TELEMETRY=off desliga; OCI_TELEMETRY_FILE muda o caminho do JSON.
+
+Uso (resumo de um arquivo já gravado):
+    python src/oci_telemetry.py ~/oci_run_stats_20240101_020000.json
+"""
+import argparse
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime
+
+ENABLED = os.getenv("OCI_TELEMETRY", "on").lower() not in ("off", "0", "no", "false")
+STATS_FILE = os.getenv(
+    "OCI_TELEMETRY_FILE",
+    os.path.join(os.path.expanduser("~"), f"oci_run_stats_{datetime.now():%Y%m%d_%H%M%S}.json"),
+)
+
+# limites superiores dos baldes do histograma (ms); o último é +Inf
+BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_lock = threading.Lock()
+_stats = {}
+_started = time.time()
+_registered = False
+
+
+class ApiStats:
+    __slots__ = ("calls", "errors", "throttled", "retries", "retry_wait", "bytes", "latencies")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = {}
+        self.throttled = 0
+        self.retries = 0
+        self.retry_wait = 0.0
+        self.bytes = 0
+        self.latencies = array("f")   # segundos, uma entrada por chamada
+
+    def as_dict(self):
+        lat = sorted(self.latencies)
+        hist = [0] * (len(BUCKETS_MS) + 1)
+        for v in lat:
+            ms = v * 1000
+            hist[next((i for i, b in enumerate(BUCKETS_MS) if ms <= b), len(BUCKETS_MS))] += 1
+        return {
+            "calls": self.calls,
+            "errors": dict(sorted(self.errors.items())),
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "retry_wait_seconds": round(self.retry_wait, 3),
+            "bytes": self.bytes,
+            "latency_seconds": {
+                "total": round(sum(lat), 3),
+                "p50": round(percentile(lat, 50), 4),
+                "p95": round(percentile(lat, 95), 4),
+                "max": round(lat[-1], 4) if lat else 0.0,
+            },
+            "histogram_ms": dict(zip([str(b) for b in BUCKETS_MS] + ["+Inf"], hist)),
+        }
+
+
+# ---------- helpers ----------
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def _entry(region, api):
+    global _registered
+    key = (region or "-", api)
+    stats = _stats.get(key)
+    if stats is None:
+        stats = _stats[key] = ApiStats()
+        if not _registered:
+            atexit.register(report)
+            _registered = True
+    return stats
+
+
+def _payload_size(resp):
+    headers = getattr(resp, "headers", None) or {}
+    try:
+        return int(headers.get("content-length") or headers.get("Content-Length") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def record(region, api, elapsed, status=None, size=0):
+    with _lock:
+        stats = _entry(region, api)
+        stats.calls += 1
+        stats.latencies.append(elapsed)
+        stats.bytes += size
+        if status is not None:
+            key = str(status)
+            stats.errors[key] = stats.errors.get(key, 0) + 1
+            if status == 429:
+                stats.throttled += 1
+
+
+def record_retry(region, api, delay):
+    """Chamado pelo oci_ratelimit antes de cada nova tentativa."""
+    if not ENABLED:
+        return
+    with _lock:
+        stats = _entry(region, api)
+        stats.retries += 1
+        stats.retry_wait += delay
+
+
+# ---------- proxy do cliente ----------
+def _timed(method, region, api):
+    def wrapper(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            resp = method(*args, **kwargs)
+        except Exception as e:
+            record(region, api, time.perf_counter() - t0, getattr(e, "status", None) or type(e).__name__)
+            raise
+        record(region, api, time.perf_counter() - t0, size=_payload_size(resp))
+        return resp
+
+    wrapper.__name__ = api
+    # oci_ratelimit.region_of usa fn.__self__.base_client.endpoint
+    wrapper.__self__ = getattr(method, "__self__", None)
+    return wrapper
+
+
+class InstrumentedClient:
+    """Repassa tudo ao cliente do SDK; os métodos públicos são medidos."""
+
+    def __init__(self, client, region):
+        self._client = client
+        self._region = region
+        self._methods = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        method = self._methods.get(name)
+        if method is None:
+            method = self._methods[name] = _timed(attr, self._region, name)
+        return method
+
+
+def instrument(client, region):
+    return InstrumentedClient(client, region) if ENABLED else client
+
+
+# ---------- relatório ----------
+def snapshot():
+    with _lock:
+        return {f"{region}|{api}": s.as_dict() for (region, api), s in sorted(_stats.items())}
+
+
+def write(path=STATS_FILE):
+    data = {
+        "started": datetime.fromtimestamp(_started).isoformat(timespec="seconds"),
+        "wall_seconds": round(time.time() - _started, 3),
+        "argv": sys.argv,
+        "apis": snapshot(),
+    }
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+    return data
+
+
+def print_summary(data, out=sys.stderr):
+    apis = data["apis"]
+    if not apis:
+        return
+    rows = sorted(apis.items(), key=lambda kv: kv[1]["latency_seconds"]["total"], reverse=True)
+    out.write(f"\n📊 Chamadas à API da OCI (execução de {data['wall_seconds']:.1f}s)\n")
+    out.write(f"{'REGIÃO':16} {'API':32} {'CHAMADAS':>8} {'ERROS':>6} {'429':>5} {'RETRY':>6} "
+              f"{'ESPERA':>7} {'p50':>7} {'p95':>7} {'MÁX':>7} {'TOTAL':>8} {'MB':>8}\n")
+    for key, s in rows:
+        region, api = key.split("|", 1)
+        lat = s["latency_seconds"]
+        out.write(
+            f"{region[:16]:16} {api[:32]:32} {s['calls']:8d} {sum(s['errors'].values()):6d} "
+            f"{s['throttled']:5d} {s['retries']:6d} {s['retry_wait_seconds']:6.1f}s "
+            f"{lat['p50']:6.2f}s {lat['p95']:6.2f}s {lat['max']:6.2f}s {lat['total']:7.1f}s "
+            f"{s['bytes'] / 1e6:8.2f}\n"
+        )
+    calls = sum(s["calls"] for _k, s in rows)
+    total = sum(s["latency_seconds"]["total"] for _k, s in rows)
+    out.write(f"{'TOTAL':49} {calls:8d} {'':51} {total:7.1f}s\n")
+    out.flush()
+
+
+def report():
+    """atexit: grava o JSON e imprime o resumo, se houve alguma chamada."""
+    if not ENABLED or not _stats:
+        return
+    try:
+        data = write()
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar a telemetria em {STATS_FILE}: {e}", file=sys.stderr)
+        return
+    print_summary(data)
+    print(f"➡ Telemetria: {STATS_FILE}", file=sys.stderr)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Resumo de um arquivo de telemetria das chamadas à OCI")
+    p.add_argument("path", help="JSON gravado por uma execução anterior")
+    args = p.parse_args()
+    with open(args.path, encoding="utf-8") as f:
+        print_summary(json.load(f), sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Cache local (JSON) da estrutura da tenancy, com TTL.
+
+- regiões assinadas;
+- árvore de compartments ativos (+ raiz);
+- mapa negativo de acesso: (API, região, compartment) que responderam
+  401/403/404, para não repetir a mesma falha de permissão a cada execução.
+
+O cache é por tenancy e fica em ~/.oci_finops/tenancy.json
+(OCI_TENANCY_CACHE, "off" desativa). OCI_TENANCY_REFRESH=1 ignora o
+conteúdo gravado e recarrega tudo na próxima consulta.
+
+Uso (recarregar agora ou ver o que está em cache):
+    python src/oci_tenancy.py --refresh
+    python src/oci_tenancy.py --show
+"""
+import argparse
+import atexit
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+from oci_ratelimit import call, limited
+from oci_session import get_identity, tenancy_id
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".oci_finops", "tenancy.json")
+CACHE_PATH = os.getenv("OCI_TENANCY_CACHE", DEFAULT_PATH)
+TTL = float(os.getenv("OCI_TENANCY_TTL_HOURS", "24")) * 3600
+DENIED_TTL = float(os.getenv("OCI_DENIED_TTL_HOURS", "24")) * 3600
+REFRESH = os.getenv("OCI_TENANCY_REFRESH", "0").lower() in ("1", "yes", "true")
+
+DENIED_STATUS = {401, 403, 404}
+
+_lock = threading.RLock()
+_state = None
+_dirty = False
+
+
+# ---------- persistência ----------
+def _enabled():
+    return bool(CACHE_PATH) and CACHE_PATH.lower() not in ("off", "0", "no", "false")
+
+
+def _load():
+    """Entrada da tenancy atual (carregada uma vez por processo)."""
+    global _state
+    with _lock:
+        if _state is not None:
+            return _state
+        data = {}
+        if _enabled() and not REFRESH:
+            try:
+                with open(os.path.expanduser(CACHE_PATH), encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+        _state = data.get(tenancy_id(), {})
+        _state.setdefault("denied", {})
+        atexit.register(save)
+        return _state
+
+
+def save():
+    """Grava o cache (escrita atômica); só faz algo se houve mudança."""
+    global _dirty
+    with _lock:
+        if not _dirty or _state is None or not _enabled():
+            return
+        path = os.path.expanduser(CACHE_PATH)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data[tenancy_id()] = _state
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+        _dirty = False
+
+
+def _fresh(entry, ttl):
+    return entry is not None and time.time() - entry["ts"] < ttl
+
+
+def _cached(key, fetch):
+    global _dirty
+    with _lock:
+        state = _load()
+        if not _fresh(state.get(key), TTL):
+            state[key] = {"ts": time.time(), "items": fetch()}
+            _dirty = True
+            save()
+        return state[key]["items"]
+
+
+# ---------- regiões e compartments ----------
+def _fetch_regions():
+    return [r.region_name for r in call(get_identity().list_region_subscriptions, tenancy_id()).data]
+
+
+def _fetch_compartments():
+    import oci
+
+    identity = get_identity()
+    comps = oci.pagination.list_call_get_all_results(
+        limited(identity.list_compartments),
+        tenancy_id(),
+        compartment_id_in_subtree=True
+    ).data
+    root = call(identity.get_compartment, tenancy_id()).data
+    return [
+        {"id": c.id, "name": c.name, "parent": getattr(c, "compartment_id", None)}
+        for c in comps if c.lifecycle_state == "ACTIVE"
+    ] + [{"id": root.id, "name": root.name, "parent": None}]
+
+
+def get_regions():
+    return list(_cached("regions", _fetch_regions))
+
+
+def get_compartments():
+    """Compartments ativos + raiz, como objetos com .id, .name e .parent."""
+    return [SimpleNamespace(**c) for c in _cached("compartments", _fetch_compartments)]
+
+
+# ---------- mapa negativo de acesso ----------
+def _denied_key(api, region, compartment_id):
+    return f"{api}|{region}|{compartment_id}"
+
+
+def accessible(api, region, compartments):
+    """Remove os compartments que negaram `api` nesta região dentro do TTL."""
+    with _lock:
+        denied = _load()["denied"]
+        now = time.time()
+        return [
+            c for c in compartments
+            if now - denied.get(_denied_key(api, region, c.id), {"ts": 0})["ts"] >= DENIED_TTL
+        ]
+
+
+def mark_denied(api, region, compartment_id, status):
+    """Registra uma falha de permissão (401/403/404). Retorna True se registrou."""
+    global _dirty
+    if status not in DENIED_STATUS:
+        return False
+    with _lock:
+        _load()["denied"][_denied_key(api, region, compartment_id)] = {"ts": time.time(), "status": status}
+        _dirty = True
+    return True
+
+
+def refresh():
+    """Descarta o cache da tenancy e recarrega regiões e compartments."""
+    global _dirty
+    with _lock:
+        state = _load()
+        state.clear()
+        state["denied"] = {}
+        _dirty = True
+        return get_regions(), get_compartments()
+
+
+# ---------- CLI ----------
+def main():
+    p = argparse.ArgumentParser(description="Cache local de regiões, compartments e acessos negados")
+    p.add_argument("--refresh", action="store_true", help="recarrega regiões e compartments e limpa os acessos negados")
+    p.add_argument("--show", action="store_true", help="mostra o conteúdo do cache")
+    args = p.parse_args()
+
+    if args.refresh:
+        regions, compartments = refresh()
+    else:
+        regions, compartments = get_regions(), get_compartments()
+
+    denied = _load()["denied"]
+    print(f"🌎 Regiões: {len(regions)} | 📁 Compartments: {len(compartments)} | 🚫 Acessos negados: {len(denied)}")
+    if args.show:
+        print("\nRegiões: " + ", ".join(regions))
+        for key, entry in sorted(denied.items()):
+            api, region, comp = key.split("|")
+            print(f"  🚫 {api} {region} {comp} (HTTP {entry['status']})")
+    save()
+    print(f"➡ Cache: {os.path.expanduser(CACHE_PATH)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Exportador XLSX compartilhado.
+
+- Workbook em modo write-only (linhas são gravadas em streaming, memória constante).
+- Cores por recomendação/estado como formatação condicional da planilha
+  (uma regra por cor para a coluna inteira, em vez de um fill por célula).
+- Células numéricas gravadas como número.
+
+O openpyxl só é importado ao gravar (as regras/cores não dependem dele).
+"""
+
+GREEN = "C6EFCE"
+RED = "FFC7CE"
+YELLOW = "FFEB9C"
+
+
+# ---------- regras de cor ----------
+def starts_with(text, color):
+    return f'LEFT({{cell}},{len(text)})="{text}"', color
+
+
+def equals(text, color):
+    return f'{{cell}}="{text}"', color
+
+
+def otherwise(color):
+    return "TRUE", color
+
+
+# ---------- helpers ----------
+def to_number(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def write_xlsx(path, headers, rows, title, color_column=None, rules=(),
+               numeric=(), autofilter=False, freeze=False):
+    """
+    Grava `rows` (dicts) em `path`.
+
+    - color_column/rules: coluna colorida e lista de regras (starts_with,
+      equals, otherwise), avaliadas em ordem; a primeira que casar vence.
+    - numeric: colunas convertidas para número (ex.: vindas de CSV).
+    """
+    from openpyxl import Workbook
+    from openpyxl.formatting.rule import FormulaRule
+    from openpyxl.styles import PatternFill
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    if freeze:
+        ws.freeze_panes = "A2"
+
+    numeric = set(numeric)
+    ws.append(headers)
+    count = 0
+    for r in rows:
+        ws.append([to_number(r.get(h)) if h in numeric else r.get(h) for h in headers])
+        count += 1
+
+    last_row = count + 1
+    if color_column and count:
+        col = get_column_letter(headers.index(color_column) + 1)
+        cell_range = f"{col}2:{col}{last_row}"
+        for formula, color in rules:
+            ws.conditional_formatting.add(cell_range, FormulaRule(
+                formula=[formula.format(cell=f"${col}2")],
+                fill=PatternFill(start_color=color, end_color=color, fill_type="solid"),
+                stopIfTrue=True,
+            ))
+
+    if autofilter:
+        ws.auto_filter.ref = f"A1:{get_column_letter(len(headers))}{last_row}"
+
+    wb.save(path)
@@ -1,7 +1,9 @@
+import argparse
 import csv
 import json
 import os
-from openpyxl import Workbook
+
+from oci_xlsx import write_xlsx
 
 # ================= CONFIG =================
 HOME = os.path.expanduser("~")
@@ -68,19 +70,12 @@ def main():
         writer.writerows(rows_out)
 
     # ---------------- XLSX ----------------
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "INSTANCIAS_TAGS"
-
-    ws.append(headers)
-
-    for r in rows_out:
-        ws.append([r[h] for h in headers])
-
-    ws.auto_filter.ref = ws.dimensions
-    ws.freeze_panes = "A2"
-
-    wb.save(OUT_XLSX)
+    write_xlsx(
+        OUT_XLSX, headers, rows_out, "INSTANCIAS_TAGS",
+        numeric=("ocpus", "memory_gb"),
+        autofilter=True,
+        freeze=True,
+    )
 
     print("\n✅ Tags organizadas com sucesso:")
     print(f"➡ CSV : {OUT_CSV}")
@@ -90,4 +85,5 @@ def main():
 
 
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="Organiza as tags do inventário de instâncias em colunas (CSV/XLSX)").parse_args()
     main()
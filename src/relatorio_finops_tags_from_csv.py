@@ -1,8 +1,9 @@
+import argparse
 import csv
 import json
 import os
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill
+
+from oci_xlsx import GREEN, RED, equals, otherwise, write_xlsx
 
 # ================= CONFIG =================
 HOME = os.path.expanduser("~")
@@ -10,6 +11,12 @@ HOME = os.path.expanduser("~")
 INPUT_CSV = os.path.join(HOME, "Relatorio_Instancias_Tags_OCI.csv")
 OUT_CSV = os.path.join(HOME, "Relatorio_FinOps_StartStop.csv")
 OUT_XLSX = os.path.join(HOME, "Relatorio_FinOps_StartStop.xlsx")
+# perfis semanais gravados pelo coletor; sem eles o status sai só das tags
+DAYS = int(os.getenv("METRICS_DAYS", "30"))
+PROFILES_PATH = os.getenv(
+    "METRICS_PROFILES",
+    os.path.join(HOME, f"Relatorio_CPU_Memoria_media_{DAYS}d_multi_region.profiles.npz"),
+)
 # =========================================
 
 
@@ -29,40 +36,61 @@ def parse_json(value):
         return {}
 
 
+def load_schedules(rows):
+    """{instance_ocid: agenda sugerida} a partir dos perfis de uso, se existirem."""
+    if not os.path.exists(PROFILES_PATH):
+        return None
+    from oci_schedule import load_profiles, schedule_rows
+
+    ids, cpu, _mem = load_profiles([PROFILES_PATH])
+    specs = {r.get("instance_ocid"): (r.get("shape"), r.get("ocpus"), r.get("memory_gb")) for r in rows}
+    return {s["instance_ocid"]: s for s in schedule_rows(ids, cpu, specs)}
+
+
 def main():
     rows_out = []
 
     with open(INPUT_CSV, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+        rows_in = list(csv.DictReader(f))
+
+    schedules = load_schedules(rows_in)
+    if schedules is not None:
+        print(f"🕒 Perfis de uso: {PROFILES_PATH} ({len(schedules)} instâncias)")
 
-        for r in reader:
-            freeform = parse_json(r.get("freeform_tags") or r.get("all_freeform_tags"))
+    for r in rows_in:
+        freeform = parse_json(r.get("freeform_tags") or r.get("all_freeform_tags"))
 
-            env = extract_tag(freeform, "Environment", "Env")
-            autostop = extract_tag(freeform, "AutoStop", "autostop", "Schedule")
-            owner = extract_tag(freeform, "Owner", "Responsavel")
-            cost = extract_tag(freeform, "CostCenter", "CentroCusto")
+        env = extract_tag(freeform, "Environment", "Env")
+        autostop = extract_tag(freeform, "AutoStop", "autostop", "Schedule")
+        owner = extract_tag(freeform, "Owner", "Responsavel")
+        cost = extract_tag(freeform, "CostCenter", "CentroCusto")
 
-            has_autostop = "YES" if autostop.lower() in ("true", "yes", "1") else "NO"
+        has_autostop = "YES" if autostop.lower() in ("true", "yes", "1") else "NO"
 
-            status = "OK"
-            if r["instance_state"] == "RUNNING" and has_autostop == "NO":
+        # com perfil de uso, só é risco se houver janela ociosa que uma agenda cobriria
+        schedule = (schedules or {}).get(r.get("instance_ocid"))
+        status = "OK"
+        if r["instance_state"] == "RUNNING" and has_autostop == "NO":
+            if schedule is None or schedule["suggested_schedule"]:
                 status = "RISK"
 
-            rows_out.append({
-                "region": r["region"],
-                "compartment": r["compartment"],
-                "instance_name": r["instance_name"],
-                "state": r["instance_state"],
-                "shape": r["shape"],
-                "ocpus": r["ocpus"],
-                "memory_gb": r["memory_gb"],
-                "environment": env,
-                "autostop": has_autostop,
-                "owner": owner,
-                "cost_center": cost,
-                "finops_status": status
-            })
+        rows_out.append({
+            "region": r["region"],
+            "compartment": r["compartment"],
+            "instance_name": r["instance_name"],
+            "state": r["instance_state"],
+            "shape": r["shape"],
+            "ocpus": r["ocpus"],
+            "memory_gb": r["memory_gb"],
+            "environment": env,
+            "autostop": has_autostop,
+            "owner": owner,
+            "cost_center": cost,
+            "idle_hours_week": schedule["idle_hours_week"] if schedule else "",
+            "suggested_schedule": schedule["suggested_schedule"] if schedule else "",
+            "schedule_savings_month": schedule["schedule_savings_month"] if schedule else "",
+            "finops_status": status
+        })
 
     # ================= CSV =================
     headers = list(rows_out[0].keys())
@@ -72,28 +100,14 @@ def main():
         writer.writerows(rows_out)
 
     # ================= XLSX =================
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "FINOPS"
-
-    ws.append(headers)
-
-    fill_ok = PatternFill("solid", fgColor="C6EFCE")
-    fill_risk = PatternFill("solid", fgColor="FFC7CE")
-
-    col_status = headers.index("finops_status") + 1
-
-    for r in rows_out:
-        ws.append([r[h] for h in headers])
-        row = ws.max_row
-        ws.cell(row=row, column=col_status).fill = (
-            fill_risk if r["finops_status"] == "RISK" else fill_ok
-        )
-
-    ws.auto_filter.ref = ws.dimensions
-    ws.freeze_panes = "A2"
-
-    wb.save(OUT_XLSX)
+    write_xlsx(
+        OUT_XLSX, headers, rows_out, "FINOPS",
+        color_column="finops_status",
+        rules=[equals("RISK", RED), otherwise(GREEN)],
+        numeric=("ocpus", "memory_gb", "idle_hours_week", "schedule_savings_month"),
+        autofilter=True,
+        freeze=True,
+    )
 
     print("\n✅ Relatórios FinOps gerados:")
     print(f"➡ CSV : {OUT_CSV}")
@@ -101,4 +115,5 @@ def main():
 
 
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="Relatório FinOps de tags a partir do inventário de instâncias (CSV/XLSX)").parse_args()
     main()